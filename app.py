@@ -1,46 +1,262 @@
-from flask import Flask, render_template, request
+from flask import Flask, jsonify, render_template, request
 import json
-from strategies import (
-    recommend_day_trade,
-    recommend_swing_trade,
-    recommend_long_term,
-    find_undervalued
-)
+import os
+
+import snapshot
+from cache import ResultCache, config_key
+from features import SCREEN_RULES, feature_matrix
+from loader import DataLoader
+from paging import filter_rows, page, parse_filter, sort_rows
+from schema import load_schema
+from sectors import STAT_FIELDS, sector_index, sector_stats
 
 app = Flask(__name__)
 
-def load_data():
-    with open("stocks.json", "r") as f:
-        raw = json.load(f)
-        return raw
+DATA_FILE = "stocks.json"
+SNAPSHOT_FILE = "stocks.snap"
+
+results_cache = ResultCache(maxsize=64)
+# Sorted/filtered views of the results, kept apart so paging through many
+# views never evicts the feature matrices above
+view_cache = ResultCache(maxsize=8)
+
+def data_file():
+    # Prefer the memory-mapped snapshot unless stocks.json is newer than it
+    if os.path.exists(SNAPSHOT_FILE) and (
+        not os.path.exists(DATA_FILE)
+        or os.path.getmtime(SNAPSHOT_FILE) >= os.path.getmtime(DATA_FILE)
+    ):
+        return SNAPSHOT_FILE
+    return DATA_FILE
+
+def load_data(path=None):
+    path = path or data_file()
+    if path == SNAPSHOT_FILE:
+        return snapshot.load(SNAPSHOT_FILE)
+
+    # Plain dicts: the per-symbol screens read them directly, and the
+    # feature columns come from batch.load_columns either way
+    with open(path, "r") as f:
+        return json.load(f)
+
+# Parsed once in the background and hot-swapped when the file is rewritten
+data_loader = DataLoader(data_file, load_data).start()
+# Requests never wait on the first load: until it is done they get a 503
+# straight away instead of holding a worker thread
+LOAD_TIMEOUT = 0
+
+TITLES = {
+    "day": "Day Trading Recommendations",
+    "swing": "Swing Trading Recommendations",
+    "long": "Long Term Investing Recommendations",
+    "undervalued": "Undervalued Stocks",
+}
+CHOICES = tuple(TITLES)
+
+def sectors_of(data, fingerprint):
+    return results_cache.get_or_compute(fingerprint, ("sectors", None), lambda: sector_index(data))
+
+def screen_features(data, fingerprint, sector=None):
+    # Extracted once per data file (and sector); every choice and weighting
+    # is a cheap reduction over it. A sector's features only read its rows.
+    def compute():
+        if sector is None:
+            return feature_matrix(data)
+        return feature_matrix(sectors_of(data, fingerprint).subset(data, sector))
+
+    return results_cache.get_or_compute(fingerprint, ("features", sector), compute)
+
+def run_choice(features, choice, weights=None, top_k=None):
+    # Rows (and their reasons) are only built for the rows that are shown
+    if choice not in TITLES:
+        return [], "Unknown Selection"
+    return features.rank(choice, weights if choice == "swing" else None, top_k), TITLES[choice]
+
+def ranked_results(data, fingerprint, choice, weights=None, top_k=None, sector=None):
+    # Same choice + weights + top_k + sector on an unchanged data file → cached results
+    return results_cache.get_or_compute(
+        fingerprint,
+        (choice, config_key(weights), top_k, sector),
+        lambda: run_choice(screen_features(data, fingerprint, sector), choice, weights, top_k),
+    )
+
+def parse_top_k(value):
+    # "" / missing → every row; otherwise a non-negative row count
+    if not value:
+        return None
+    top_k = int(value)
+    if top_k < 0:
+        raise ValueError(f"top_k must be >= 0, got {top_k}")
+    return top_k
+
+def parse_weights(value):
+    # "" / missing / null → default weights; otherwise a JSON object of
+    # numbers, e.g. {"rsi_oversold": 3} (bad JSON raises ValueError too)
+    weights = json.loads(value) if value else None
+    if weights is None:
+        return None
+    if not isinstance(weights, dict) or not all(
+        isinstance(w, (int, float)) and not isinstance(w, bool) for w in weights.values()
+    ):
+        raise ValueError("weights must be a JSON object of numbers")
+    return weights
+
+def parse_sector(value, data, fingerprint):
+    # "" / missing → the whole universe; otherwise a sector code of the data
+    if not value:
+        return None
+    if value not in sectors_of(data, fingerprint):
+        raise ValueError(f"unknown sector {value!r}")
+    return value
+
+def parse_fields(values):
+    # none → sectors.STAT_FIELDS; otherwise number fields of columns.json
+    # or the feed (a typo or a text field like nm has no statistics)
+    if not values:
+        return STAT_FIELDS
+    numeric = set(load_schema().numeric())
+    unknown = [field for field in values if field not in numeric]
+    if unknown:
+        raise ValueError(f"unknown or non-numeric fields {unknown}")
+    return tuple(values)
 
 @app.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "POST":
         choice = request.form.get("choice")
+        try:
+            # Optional swing weights as a JSON object, e.g. {"rsi_oversold": 3}
+            weights = parse_weights(request.form.get("weights"))
+            top_k = parse_top_k(request.form.get("top_k"))
+        except ValueError as e:
+            return str(e), 400
+
+        data, fingerprint = data_loader.get(LOAD_TIMEOUT)
+        if data is None:
+            return "Data is still loading, try again shortly", 503
+        try:
+            sector = parse_sector(request.form.get("sector"), data, fingerprint)
+        except ValueError as e:
+            return str(e), 400
 
-        data = load_data()
-
-        if choice == "day":
-            results = recommend_day_trade(data)
-            title = "Day Trading Recommendations"
-        elif choice == "swing":
-            results = recommend_swing_trade(data)
-            title = "Swing Trading Recommendations"
-        elif choice == "long":
-            results = recommend_long_term(data)
-            title = "Long Term Investing Recommendations"
-        elif choice == "undervalued":
-            results = find_undervalued(data)
-            title = "Undervalued Stocks"
-        else:
-            results = []
-            title = "Unknown Selection"
-
-        return render_template("table.html", results=results, title=title)
+        results, title = ranked_results(data, fingerprint, choice, weights, top_k, sector)
+
+        # Rows are fetched page by page from /api/results
+        columns = list(results[0].keys()) if results else []
+        return render_template(
+            "table.html", title=title, columns=columns, choice=choice,
+            weights=json.dumps(weights) if weights else "",
+            top_k="" if top_k is None else top_k, sector=sector or "",
+        )
 
     return render_template("index.html")
 
 
+@app.route("/api/results")
+def api_results():
+    """
+    One page of a strategy's ranked results as JSON.
+
+    Query args: choice, weights (JSON), top_k (only the best top_k ranked
+    rows), sector (only that sector's symbols), offset/limit, sort + dir (asc|desc), search (text in any column)
+    and any number of filter=field<op>value (e.g. filter=roe>15). DataTables server-side parameters (draw, start,
+    length, search[value], order[0][column], order[0][dir]) work as well.
+    """
+    args = request.args
+    choice = args.get("choice")
+    if choice not in CHOICES:
+        return jsonify({"error": f"unknown choice {choice!r}"}), 400
+    try:
+        weights = parse_weights(args.get("weights"))
+        top_k = parse_top_k(args.get("top_k"))
+        offset = int(args.get("offset", args.get("start", 0)))
+        limit = int(args.get("limit", args.get("length", 50)))
+        draw = int(args.get("draw", 0))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    sort = args.get("sort")
+    direction = args.get("dir", "asc")
+    if sort is None and "order[0][column]" in args:
+        index = args["order[0][column]"]
+        sort = args.get(f"columns[{index}][name]") or args.get(f"columns[{index}][data]")
+        direction = args.get("order[0][dir]", "asc")
+    search = args.get("search", args.get("search[value]")) or None
+
+    data, fingerprint = data_loader.get(LOAD_TIMEOUT)
+    if data is None:
+        return jsonify({"error": "data is still loading"}), 503
+    try:
+        sector = parse_sector(args.get("sector"), data, fingerprint)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    results, title = ranked_results(data, fingerprint, choice, weights, top_k, sector)
+    columns = SCREEN_RULES[choice].row_keys()
+    try:
+        # Filter fields must be result columns
+        filters = tuple(parse_filter(f, columns) for f in args.getlist("filter"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Filtered + sorted view, cached so paging through it is just a slice
+    view_key = (choice, config_key(weights), top_k, sector, sort, direction == "desc", search, filters)
+    rows = view_cache.get_or_compute(
+        fingerprint, view_key,
+        lambda: sort_rows(filter_rows(results, search, filters), sort, direction == "desc"),
+    )
+
+    return jsonify({
+        "draw": draw,
+        "title": title,
+        "recordsTotal": len(results),
+        "recordsFiltered": len(rows),
+        "columns": columns,
+        "data": page(rows, offset, limit),
+    })
+
+
+@app.route("/screens")
+def screens():
+    # Every screen over the cached features, e.g. for the morning dashboard
+    data, fingerprint = data_loader.get(LOAD_TIMEOUT)
+    if data is None:
+        return jsonify({"error": "data is still loading"}), 503
+    features = screen_features(data, fingerprint)
+    results = results_cache.get_or_compute(
+        fingerprint, ("screens", None), lambda: {name: list(features.rank(name)) for name in features.screens}
+    )
+    return jsonify(results)
+
+
+@app.route("/sectors")
+def sectors():
+    """
+    Per-sector count, mean, min, max and percentiles of the fundamentals.
+    Query args: field (repeatable number field; default sectors.STAT_FIELDS).
+    """
+    try:
+        fields = parse_fields(request.args.getlist("field"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    data, fingerprint = data_loader.get(LOAD_TIMEOUT)
+    if data is None:
+        return jsonify({"error": "data is still loading"}), 503
+    return jsonify(results_cache.get_or_compute(
+        fingerprint, ("sector_stats", fields),
+        lambda: sector_stats(data, fields, index=sectors_of(data, fingerprint)),
+    ))
+
+
+@app.route("/health")
+def health():
+    status = data_loader.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@app.route("/stats")
+def stats():
+    return jsonify({"cache": results_cache.stats(), "views": view_cache.stats()})
+
+
 if __name__ == "__main__":
     app.run(debug=True)
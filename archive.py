@@ -0,0 +1,241 @@
+import json
+import sys
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for Parquet / Arrow archives
+    pa = None
+
+from bars import FIELDS, load_equities
+
+# The nested "pp" dict is stored as flat columns, like in the snapshot
+PIVOT_KEYS = ("pp", "r1", "r2", "r3", "s1", "s2", "s3")
+
+# `ints` flags (bit i for FIELDS[i + 1]) the bar values that were JSON ints
+BAR_TYPE = None if pa is None else pa.list_(pa.struct(
+    [("ts", pa.int64())] + [(name, pa.float64()) for name in FIELDS[1:]] + [("ints", pa.uint8())]
+))
+
+# Companion bool column of a column mixing ints and floats: which rows were ints
+INT_SUFFIX = ":int"
+# Field metadata of a column stored as JSON text (nested or mixed values)
+JSON_METADATA = {"encoding": "json"}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet/Arrow archives need pyarrow: pip install pyarrow")
+
+
+def _format(path):
+    """"parquet" for *.parquet / *.pq, else Arrow IPC ("feather")."""
+    return "parquet" if path.endswith((".parquet", ".pq")) else "feather"
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _columns(key, values):
+    """
+    [(field, array), ...] storing one value column without losing types:
+    Arrow infers int64 / double / string / bool; ints mixed with floats get
+    a `key:int` companion column; dicts, lists and mixed kinds (e.g. bt)
+    are stored as JSON text and decoded on read.
+    """
+    if not any(isinstance(v, (dict, list)) for v in values):
+        try:
+            array = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+            array = None
+        if array is not None:
+            columns = [(pa.field(key, array.type), array)]
+            if pa.types.is_floating(array.type) and any(_is_int(v) for v in values):
+                ints = pa.array([None if v is None else _is_int(v) for v in values], type=pa.bool_())
+                columns.append((pa.field(key + INT_SUFFIX, pa.bool_()), ints))
+            return columns
+    text = pa.array([None if v is None else json.dumps(v, ensure_ascii=False) for v in values], type=pa.string())
+    return [(pa.field(key, pa.string(), metadata=JSON_METADATA), text)]
+
+
+def _table(columns):
+    # {key: [values]} → Arrow table of the _columns of every key
+    pairs = [pair for key, values in columns.items() for pair in _columns(key, values)]
+    return pa.Table.from_arrays([array for _, array in pairs], schema=pa.schema([field for field, _ in pairs]))
+
+
+def _bar(bar):
+    ints = 0
+    for i, value in enumerate(bar[1:]):
+        if _is_int(value):
+            ints |= 1 << i
+    return dict(zip(FIELDS, bar), ints=ints)
+
+
+def _unbar(bar):
+    ints = bar.get("ints") or 0
+    return [bar["ts"]] + [
+        int(bar[name]) if ints >> i & 1 and bar[name] is not None else bar[name]
+        for i, name in enumerate(FIELDS[1:])
+    ]
+
+
+def _decode(table):
+    """table.to_pylist() with JSON columns decoded and the ints of mixed columns restored."""
+    schema = table.schema
+    json_keys = [field.name for field in schema if field.metadata and field.metadata.get(b"encoding") == b"json"]
+    int_keys = [name for name in schema.names if name.endswith(INT_SUFFIX)]
+    rows = table.to_pylist()
+    for row in rows:
+        for key in json_keys:
+            if row[key] is not None:
+                row[key] = json.loads(row[key])
+        for name in int_keys:
+            key = name[:-len(INT_SUFFIX)]
+            if row.pop(name) and row.get(key) is not None:
+                row[key] = int(row[key])
+    return rows
+
+
+# ------------------ Writers ------------------
+def write_table(table, path, compression="zstd"):
+    """Write an Arrow table as Parquet or Arrow IPC, chosen by the file extension."""
+    _require_pyarrow()
+    if _format(path) == "parquet":
+        pq.write_table(table, path, compression=compression)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path, compression=compression)
+    return path
+
+
+def universe_table(equities):
+    """
+    The merged {symbol: details} universe as one Arrow table: a `symbol`
+    column, one column per field (pivots flattened to pp, r1 … s3) and the
+    bars as a list<struct<ts, open, high, low, close, volume>> column.
+    """
+    _require_pyarrow()
+    symbols = list(equities)
+    keys = []
+    seen = set()
+    for details in equities.values():
+        for key in details:
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+
+    columns = {"symbol": symbols}
+    for key in keys:
+        if key == "technicals":
+            continue
+        if key == "pp":
+            pivots = [details.get("pp") or {} for details in equities.values()]
+            for level in PIVOT_KEYS:
+                columns[level] = [pp.get(level) for pp in pivots]
+            continue
+        columns[key] = [details.get(key) for details in equities.values()]
+    table = _table(columns)
+
+    if "technicals" in seen:
+        bars = []
+        for details in equities.values():
+            technicals = details.get("technicals")
+            bars.append(None if technicals is None else [
+                _bar(bar) for bar in (technicals.tolist() if hasattr(technicals, "tolist") else technicals)
+            ])
+        table = table.append_column("technicals", pa.array(bars, type=BAR_TYPE))
+
+    return table
+
+
+def write_universe(equities, path, compression="zstd"):
+    """Archive the merged universe to `path` (.parquet or .arrow/.feather)."""
+    return write_table(universe_table(equities), path, compression)
+
+
+def write_results(results, path, compression="zstd"):
+    """Archive one strategy's ranked results (list of row dicts), keeping the rank order."""
+    _require_pyarrow()
+    rows = list(results)
+    keys = list(rows[0].keys()) if rows else []
+    columns = {"rank": list(range(1, len(rows) + 1))}
+    columns.update((key, [row.get(key) for row in rows]) for key in keys)
+    return write_table(_table(columns), path, compression)
+
+
+# ------------------ Readers ------------------
+def read_table(path, columns=None, filters=None):
+    """
+    Read an archive as an Arrow table.
+
+    Args:
+        path (str): .parquet or Arrow IPC file
+        columns (list): only these columns are read (projection), plus
+            the `key:int` companions of the ones that have one
+        filters: predicates in pyarrow's DNF form, e.g.
+            [("per", "<", 10), ("roe", ">", 15)]; for Parquet they are
+            pushed down and row groups are skipped by their statistics
+
+    Returns:
+        pyarrow.Table
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(path, format=_format(path))
+    if columns is not None:
+        names = set(dataset.schema.names)
+        columns = [name for column in columns for name in (column, column + INT_SUFFIX)
+                   if name == column or name in names]
+    expression = pq.filters_to_expression(filters) if filters else None
+    return dataset.to_table(columns=columns, filter=expression)
+
+
+def read_results(path, columns=None, filters=None):
+    """Ranked result rows (list of dicts) from write_results, in rank order."""
+    table = read_table(path, columns, filters)
+    if "rank" in table.column_names and (columns is None or "rank" not in columns):
+        table = table.sort_by("rank").drop_columns(["rank"])
+    return _decode(table)
+
+
+def read_universe(path, columns=None, filters=None):
+    """
+    {symbol: details} universe from write_universe, ready for the strategies.
+    Pivot columns are folded back into the "pp" dict, bars into
+    [[ts, o, h, l, c, v], ...] lists, and ints, floats and nested values
+    (bt, li, ...) come back as they were written. A null value and a missing
+    key both read back as a missing key.
+    """
+    if columns is not None and "symbol" not in columns:
+        columns = ["symbol"] + list(columns)
+    table = read_table(path, columns, filters)
+
+    equities = {}
+    for row in _decode(table):
+        symbol = row.pop("symbol")
+        details = {}
+        pivots = {}
+        for key, value in row.items():
+            if value is None:
+                continue
+            if key in PIVOT_KEYS:
+                pivots[key] = value
+            elif key == "technicals":
+                details[key] = [_unbar(bar) for bar in value]
+            else:
+                details[key] = value
+        if pivots:
+            details["pp"] = pivots
+        equities[symbol] = details
+    return equities
+
+
+if __name__ == "__main__":
+    # Usage: python archive.py [stocks.json] [stocks.parquet] [stocks.bars.npz]
+    args = sys.argv[1:]
+    json_file = args[0] if args else "stocks.json"
+    out = args[1] if len(args) > 1 else "stocks.parquet"
+    write_universe(load_equities(json_file, args[2] if len(args) > 2 else None), out)
+    print(f"✅ Archive saved to {out}")
@@ -0,0 +1,338 @@
+import sys
+
+import numpy as np
+
+from bars import BarStore
+from indicators import IndicatorState, LiveBars
+from strategies import SCREENS, run_all_screens
+
+# Quote fields rebuilt from the bars on each replayed day; everything else on
+# a symbol (eps, roe, per, ...) is taken as-is from the current data
+QUOTE_FIELDS = ("c", "ldcp", "pch", "v", "vm", "rsi", "uc", "lc", "pp", "p1w", "p1m", "technicals")
+
+# Units follow the feed: "pch" is a fraction (0.0072 = 0.72%), "vm" is the
+# month's total volume (the feed's "vam" is vm / 21) and uc / lc are the
+# daily circuit limits, ±10% of ldcp but at least Rs 1
+CIRCUIT = 0.10
+CIRCUIT_FLOOR = 1.0
+VOLUME_DAYS = 21  # bars summed into "vm"
+WEEK, MONTH = 5, 21
+
+
+# ------------------ Bulk Per-Bar Fields ------------------
+def _shifted(values, position, k, fill=np.nan):
+    """values[i - k] within the same symbol (flat BarStore arrays), else fill."""
+    out = np.full(len(values), fill)
+    if k < len(values):
+        out[k:] = values[:len(values) - k]
+    out[position < k] = fill
+    return out
+
+
+def circuit_limits(ldcp):
+    """(uc, lc) of the feed: ldcp ± max(CIRCUIT * ldcp, CIRCUIT_FLOOR), lc not below 0."""
+    band = np.maximum(ldcp * CIRCUIT, CIRCUIT_FLOOR)
+    return ldcp + band, np.maximum(ldcp - band, 0.0)
+
+
+def quote_fields(store):
+    """
+    The screener's quote fields for every bar of every symbol, computed in
+    bulk over the flat BarStore arrays: previous close, change as a
+    fraction, total volume of the previous VOLUME_DAYS bars (a shorter
+    history is scaled up to VOLUME_DAYS), circuit limits, pivot levels from
+    the previous bar, and closes a week / month back.
+
+    Returns:
+        dict of float64 arrays aligned with store.close (NaN = not available)
+    """
+    lengths = np.diff(store.offsets)
+    position = np.arange(len(store.close)) - np.repeat(store.offsets[:-1], lengths)
+
+    prev_close = _shifted(store.close, position, 1)
+    prev_high = _shifted(store.high, position, 1)
+    prev_low = _shifted(store.low, position, 1)
+
+    # Rolling sum of the previous VOLUME_DAYS volumes via a per-symbol cumsum
+    cumulative = np.concatenate([[0.0], np.cumsum(store.volume)])
+    index = np.arange(len(store.close))
+    window = np.minimum(position, VOLUME_DAYS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vm = (cumulative[index] - cumulative[index - window]) / window * VOLUME_DAYS
+        pch = (store.close - prev_close) / prev_close
+
+    pivot = (prev_high + prev_low + prev_close) / 3
+    uc, lc = circuit_limits(prev_close)
+    return {
+        "ldcp": prev_close,
+        "pch": pch,
+        "vm": vm,
+        "uc": uc,
+        "lc": lc,
+        "pp": pivot,
+        "r1": 2 * pivot - prev_low,
+        "s1": 2 * pivot - prev_high,
+        "r2": pivot + (prev_high - prev_low),
+        "s2": pivot - (prev_high - prev_low),
+        "r3": prev_high + 2 * (pivot - prev_low),
+        "s3": prev_low - 2 * (prev_high - pivot),
+        "p1w": _shifted(store.close, position, WEEK),
+        "p1m": _shifted(store.close, position, MONTH),
+    }
+
+
+def check_units(equities, store=None, tolerance=0.02):
+    """
+    Compare the units of the replayed quote fields at each symbol's last
+    bar with the feed's own row, as ratios that do not depend on the price
+    level (the bars and the quote need not be from the same day):
+
+        pch: pch / ((c - ldcp) / ldcp)       1 when pch is a fraction
+        vm:  vm / daily average volume       days summed into vm (feed: vm / vam)
+        uc, lc: uc / ldcp, lc / ldcp         circuit band
+
+    Returns:
+        {field: {"feed": median ratio, "replay": median ratio, "ok": bool}}
+        (ratios are None without usable rows)
+    """
+    store = store if store is not None else BarStore.from_equities(equities)
+    fields = quote_fields(store)
+    feed = {"pch": [], "vm": [], "uc": [], "lc": []}
+    replay_ = {"pch": [], "vm": [], "uc": [], "lc": []}
+    for s, symbol in enumerate(store.symbols):
+        start, end = int(store.offsets[s]), int(store.offsets[s + 1])
+        details = equities.get(symbol) or {}
+        if end - start <= VOLUME_DAYS:
+            continue
+        c, ldcp = details.get("c") or 0, details.get("ldcp") or 0
+        if ldcp > 0 and c > 0 and c != ldcp and details.get("pch"):
+            feed["pch"].append(details["pch"] / ((c - ldcp) / ldcp))
+        if details.get("vm") and details.get("vam"):
+            feed["vm"].append(details["vm"] / details["vam"])
+        for key in ("uc", "lc"):
+            if ldcp > 0 and details.get(key):
+                feed[key].append(details[key] / ldcp)
+
+        i = end - 1
+        close, prev = store.close.item(i), fields["ldcp"].item(i)
+        if prev > 0 and close != prev:
+            replay_["pch"].append(fields["pch"].item(i) / ((close - prev) / prev))
+        average = store.volume[i - VOLUME_DAYS:i].mean()
+        if average > 0:
+            replay_["vm"].append(fields["vm"].item(i) / average)
+        for key in ("uc", "lc"):
+            if prev > 0:
+                replay_[key].append(fields[key].item(i) / prev)
+
+    report = {}
+    for key in feed:
+        a = float(np.median(feed[key])) if feed[key] else None
+        b = float(np.median(replay_[key])) if replay_[key] else None
+        report[key] = {"feed": a, "replay": b,
+                       "ok": a is not None and b is not None and abs(b - a) <= tolerance * abs(a)}
+    return report
+
+
+def _value(array, i, default=0):
+    value = array.item(i)
+    return default if value != value else value
+
+
+# ------------------ Walk-Forward Replay ------------------
+def replay(equities, warmup=50, every=1, store=None):
+    """
+    Replay the bars day by day and yield the universe as of selected closes.
+
+    Each symbol's quote fields are rebuilt from the bars, and RSI / SMA / MACD
+    come from an IndicatorState updated one bar at a time (the strategy
+    helpers take its O(1) path). Fundamentals are not historical: today's
+    values are used on every day.
+
+    Args:
+        equities: {symbol: details} with technicals (or pass `store`)
+        warmup (int): days replayed before the first yield
+        every (int): yield every `every`-th day after the warmup
+        store (BarStore): bars to replay; defaults to the equities' technicals
+
+    Yields:
+        (ts, universe, next_bar): the day, {symbol: as-of details} of the
+        symbols that traded that day, and {symbol: flat store index of its
+        next bar}. The last day is never yielded (nothing to trade after it).
+    """
+    store = store if store is not None else BarStore.from_equities(equities)
+    fields = quote_fields(store)
+    pivot_keys = ("pp", "r1", "r2", "r3", "s1", "s2", "s3")
+
+    # Bars grouped by trading day: day d holds the flat bar indexes traded on it
+    calendar, day_of_bar = np.unique(store.ts, return_inverse=True)
+    order = np.argsort(day_of_bar, kind="stable")
+    day_bounds = np.searchsorted(day_of_bar[order], np.arange(len(calendar) + 1))
+    symbol_of_bar = np.repeat(np.arange(len(store.symbols)), np.diff(store.offsets))
+
+    # Per-symbol replay state: as-of details, growing bars, indicator state
+    as_of = []
+    for symbol in store.symbols:
+        details = {k: v for k, v in (equities.get(symbol) or {}).items() if k not in QUOTE_FIELDS}
+        details["technicals"] = LiveBars([], IndicatorState())
+        as_of.append(details)
+
+    ts = store.ts.tolist()
+    opens, closes = store.open, store.close
+
+    for d in range(len(calendar)):
+        bars_today = order[day_bounds[d]:day_bounds[d + 1]].tolist()
+        for i in bars_today:
+            details = as_of[symbol_of_bar[i]]
+            details["technicals"].append([ts[i], opens.item(i), store.high.item(i),
+                                          store.low.item(i), closes.item(i), store.volume.item(i)])
+            details["c"] = closes.item(i)
+            details["v"] = store.volume.item(i)
+            for key in ("ldcp", "pch", "vm", "uc", "lc", "p1w", "p1m"):
+                details[key] = _value(fields[key], i)
+            details["pp"] = {key: fields[key].item(i) for key in pivot_keys if fields[key].item(i) == fields[key].item(i)}
+            details["rsi"] = details["technicals"].state.rsi()
+
+        if d < warmup or (d - warmup) % every or d + 1 >= len(calendar):
+            continue
+
+        universe = {}
+        next_bar = {}
+        for i in bars_today:
+            symbol = store.symbols[symbol_of_bar[i]]
+            universe[symbol] = as_of[symbol_of_bar[i]]
+            next_bar[symbol] = i + 1
+        yield int(calendar[d]), universe, next_bar
+
+
+def forward_trade(store, symbol, entry, hold):
+    """
+    Buy at the open of flat bar `entry`, sell at the close `hold` bars later.
+
+    Returns:
+        (entry_ts, entry_price, exit_ts, exit_price), or None if the symbol
+        has too few bars left or no entry price
+    """
+    s = store.index[symbol]
+    exit_ = entry + hold - 1
+    if entry >= store.offsets[s + 1] or exit_ >= store.offsets[s + 1]:
+        return None
+    entry_price = store.open.item(entry)
+    if not entry_price or entry_price != entry_price:
+        return None
+    return int(store.ts[entry]), entry_price, int(store.ts[exit_]), store.close.item(exit_)
+
+
+def backtest(equities, screen="swing", top_n=10, hold=5, rebalance=None, warmup=50,
+             swing_config=None, read_previous_day_price=False, store=None, by_score=False):
+    """
+    Walk-forward test of a screen's top picks.
+
+    On every `rebalance`-th replayed day (see replay) the screen ranks the
+    symbols that traded that day. The top `top_n` are bought at the next
+    bar's open and sold at the close `hold` bars later.
+
+    Args:
+        equities: {symbol: details} with technicals (or pass `store`)
+        screen (str): one of strategies.SCREENS
+        top_n (int): positions opened per rebalance
+        hold (int): bars each position is held
+        rebalance (int): days between rebalances; defaults to `hold`
+        warmup (int): days replayed before the first ranking
+        swing_config: swing weights, as for recommend_swing_trade
+        store (BarStore): bars to replay; defaults to the equities' technicals
+        by_score (bool): pick by score (ties in screen order) instead of the
+            screen's own order; the swing list, for one, is ordered by volume
+
+    Returns:
+        dict: trades, per-period returns, equity curve and summary stats
+    """
+    if screen not in SCREENS:
+        raise ValueError(f"Unknown screen {screen!r}; expected one of {SCREENS}")
+    rebalance = rebalance or hold
+    store = store if store is not None else BarStore.from_equities(equities)
+    trades = []
+    periods = []
+
+    for day, universe, next_bar in replay(equities, warmup, rebalance, store):
+        ranking = run_all_screens(universe, read_previous_day_price, swing_config, screens=(screen,))[screen]
+        if by_score:
+            ranking = sorted(ranking, key=lambda row: row["score"], reverse=True)
+
+        period = []
+        for row in ranking[:top_n]:
+            trade = forward_trade(store, row["symbol"], next_bar[row["symbol"]], hold)
+            if trade is None:
+                continue  # not enough future bars to close the trade
+            entry_ts, entry_price, exit_ts, exit_price = trade
+            trades.append({
+                "symbol": row["symbol"],
+                "signal_ts": day,
+                "entry_ts": entry_ts,
+                "entry": entry_price,
+                "exit_ts": exit_ts,
+                "exit": exit_price,
+                "score": row.get("score"),
+                "return": exit_price / entry_price - 1,
+            })
+            period.append(trades[-1]["return"])
+        if period:
+            periods.append({"ts": day, "trades": len(period), "return": sum(period) / len(period)})
+
+    return _summary(trades, periods, screen, top_n, hold, rebalance)
+
+
+def _summary(trades, periods, screen, top_n, hold, rebalance):
+    returns = np.array([t["return"] for t in trades])
+    curve = np.cumprod([1 + p["return"] for p in periods]) if periods else np.ones(0)
+    # Drawdown is measured from the starting capital (1.0) as well
+    peak = np.maximum.accumulate(np.maximum(curve, 1.0)) if len(curve) else curve
+    return {
+        "screen": screen,
+        "top_n": top_n,
+        "hold": hold,
+        "rebalance": rebalance,
+        "trades": trades,
+        "periods": periods,
+        "equity_curve": curve.tolist(),
+        "n_trades": len(trades),
+        "hit_rate": float((returns > 0).mean()) if len(returns) else None,
+        "avg_return": float(returns.mean()) if len(returns) else None,
+        "median_return": float(np.median(returns)) if len(returns) else None,
+        # Compounds period returns: exact when rebalance >= hold (no overlap)
+        "total_return": float(curve[-1] - 1) if len(curve) else 0.0,
+        "max_drawdown": float((1 - curve / peak).max()) if len(curve) else 0.0,
+    }
+
+
+def print_report(result):
+    print(f"📈 Backtest: {result['screen']} top {result['top_n']}, hold {result['hold']} bars, "
+          f"rebalance every {result['rebalance']}")
+    if not result["n_trades"]:
+        print("No trades")
+        return
+    print(f"  Trades:        {result['n_trades']}")
+    print(f"  Hit rate:      {result['hit_rate'] * 100:.1f}%")
+    print(f"  Avg return:    {result['avg_return'] * 100:.2f}% per trade")
+    print(f"  Total return:  {result['total_return'] * 100:.2f}%")
+    print(f"  Max drawdown:  {result['max_drawdown'] * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    # Usage: python backtest.py [screen] [top_n] [hold]
+    #        python backtest.py check      (replayed quote units vs the feed)
+    from bars import load_equities
+
+    args = sys.argv[1:]
+    data = load_equities("stocks.json", "stocks.bars.npz")
+    if args and args[0] == "check":
+        report = check_units(data)
+        for key, row in report.items():
+            feed, replayed = (f"{v:.4g}" if v is not None else "-" for v in (row["feed"], row["replay"]))
+            print(f"{'✅' if row['ok'] else '❌'} {key:<4} feed {feed:>8}  replay {replayed:>8}")
+        sys.exit(0 if all(row["ok"] for row in report.values()) else 1)
+    print_report(backtest(
+        data,
+        screen=args[0] if args else "swing",
+        top_n=int(args[1]) if len(args) > 1 else 10,
+        hold=int(args[2]) if len(args) > 2 else 5,
+    ))
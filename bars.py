@@ -0,0 +1,227 @@
+import json
+import os
+
+import numpy as np
+
+# Bar layout used by the /rq technicals: [timestamp, open, high, low, close, volume]
+FIELDS = ("ts", "open", "high", "low", "close", "volume")
+
+
+# ------------------ Per-Symbol View ------------------
+class Bars:
+    """
+    Columnar, read-only view of one symbol's bars.
+
+    Drop-in for the `technicals` list of lists: len(), slicing and bar[i][4]
+    still work, while indicator helpers read the `close` array directly.
+    """
+
+    __slots__ = ("ts", "open", "high", "low", "close", "volume", "state")
+
+    def __init__(self, ts, open, high, low, close, volume):
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.state = None
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Bars(*(getattr(self, name)[index] for name in FIELDS))
+        return [int(self.ts[index])] + [float(getattr(self, name)[index]) for name in FIELDS[1:]]
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def tolist(self):
+        """Back to the original [[ts, o, h, l, c, v], ...] layout."""
+        return [[int(t), o, h, l, c, v] for t, o, h, l, c, v in zip(
+            self.ts.tolist(), self.open.tolist(), self.high.tolist(),
+            self.low.tolist(), self.close.tolist(), self.volume.tolist(),
+        )]
+
+
+# ------------------ Store ------------------
+class BarStore:
+    """
+    OHLCV bars for many symbols in six flat arrays.
+
+    Symbol i owns rows offsets[i]:offsets[i + 1]; `store[symbol]` returns a
+    zero-copy Bars view over that range.
+    """
+
+    def __init__(self, symbols, offsets, ts, open, high, low, close, volume):
+        self.symbols = list(symbols)
+        self.offsets = offsets
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_technicals(cls, technicals_by_symbol):
+        """Build from {symbol: [[ts, o, h, l, c, v], ...]}."""
+        symbols = []
+        lengths = []
+        rows = []
+        for symbol, technicals in technicals_by_symbol.items():
+            symbols.append(symbol)
+            lengths.append(len(technicals))
+            rows.extend(technicals)
+
+        offsets = np.zeros(len(symbols) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        matrix = np.full((len(rows), len(FIELDS)), np.nan)
+        if rows:
+            try:
+                matrix[:] = np.array(rows, dtype=np.float64)
+            except (TypeError, ValueError):
+                # Ragged or non-numeric bars: fill row by row, missing → NaN
+                for i, bar in enumerate(rows):
+                    for j, value in enumerate(bar[:len(FIELDS)]):
+                        if isinstance(value, (int, float)):
+                            matrix[i, j] = value
+
+        return cls(
+            symbols, offsets,
+            np.nan_to_num(matrix[:, 0]).astype(np.int64),
+            *(np.ascontiguousarray(matrix[:, j]) for j in range(1, len(FIELDS))),
+        )
+
+    @classmethod
+    def from_equities(cls, equities):
+        """Build from the merged {symbol: {..., "technicals": [...]}} map."""
+        return cls.from_technicals({
+            symbol: details.get("technicals") or []
+            for symbol, details in equities.items()
+            if details.get("technicals")
+        })
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def __getitem__(self, symbol):
+        i = self.index[symbol]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return Bars(*(getattr(self, name)[start:end] for name in FIELDS))
+
+    def get(self, symbol, default=None):
+        return self[symbol] if symbol in self.index else default
+
+    def attach(self, equities):
+        """Replace each symbol's `technicals` list with its Bars view."""
+        for symbol, details in equities.items():
+            if symbol in self.index:
+                details["technicals"] = self[symbol]
+        return equities
+
+    def matrix(self, field="close", depth=None):
+        """Right-aligned padded matrix of every symbol's bars, see padded()."""
+        values = getattr(self, field)
+        starts, ends = self.offsets[:-1], self.offsets[1:]
+        lengths = ends - starts
+        if depth is None:
+            depth = int(lengths.max()) if len(lengths) else 0
+        index = ends[:, None] - depth + np.arange(depth)
+        valid = index >= starts[:, None]
+        matrix = np.full((len(lengths), depth), np.nan)
+        if len(values):
+            gathered = values[np.clip(index, 0, len(values) - 1)]
+            matrix = np.where(valid, gathered, np.nan)
+        return matrix, np.minimum(lengths, depth)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                symbols=np.array(self.symbols, dtype=str),
+                offsets=self.offsets,
+                **{name: getattr(self, name) for name in FIELDS},
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["symbols"].tolist(), data["offsets"],
+                *(data[name] for name in FIELDS),
+            )
+
+
+def padded(technicals_list, field="close", depth=None):
+    """
+    Right-aligned (symbols × depth) matrix of one bar field: each row ends with
+    the symbol's latest bar and is NaN-padded on the left.
+
+    Args:
+        technicals_list: sequence of technicals (bar lists or Bars views)
+        field (str): one of FIELDS
+        depth (int): bars per row; defaults to the longest history
+
+    Returns:
+        (matrix, lengths) where lengths[i] = bars available in row i (≤ depth)
+    """
+    column = FIELDS.index(field)
+    lengths = np.array([len(t) if t is not None else 0 for t in technicals_list], dtype=np.int64)
+    if depth is None:
+        depth = int(lengths.max()) if len(lengths) else 0
+    matrix = np.full((len(lengths), depth), np.nan)
+    for i, technicals in enumerate(technicals_list):
+        n = min(int(lengths[i]), depth)
+        if not n:
+            continue
+        if isinstance(technicals, Bars):
+            matrix[i, depth - n:] = getattr(technicals, field)[-n:]
+        else:
+            matrix[i, depth - n:] = [
+                bar[column] if len(bar) > column and isinstance(bar[column], (int, float)) else np.nan
+                for bar in technicals[-n:]
+            ]
+    return matrix, np.minimum(lengths, depth)
+
+
+def merge_bars(existing, new):
+    """
+    Add `new` bars to the `existing` list in place, keeping it sorted by
+    timestamp with one bar per timestamp; a repeated timestamp takes the
+    bar from `new` (the later capture).
+
+    Returns:
+        existing
+    """
+    if not new:
+        return existing
+    new_ts = [bar[0] for bar in new]
+    in_order = all(a < b for a, b in zip(new_ts, new_ts[1:]))
+    if in_order and (not existing or new_ts[0] > existing[-1][0]):
+        existing.extend(new)  # common case: a later capture only adds newer bars
+        return existing
+
+    by_ts = {bar[0]: bar for bar in existing}
+    by_ts.update(zip(new_ts, new))
+    existing[:] = [by_ts[ts] for ts in sorted(by_ts)]
+    return existing
+
+
+def load_equities(json_file="stocks.json", bars_file=None):
+    """
+    Load the merged equities and, if a bar store file exists, attach its
+    columnar bars in place of the JSON `technicals` lists.
+    """
+    with open(json_file, "r", encoding="utf-8") as f:
+        equities = json.load(f)
+    if bars_file and os.path.exists(bars_file):
+        BarStore.load(bars_file).attach(equities)
+    return equities
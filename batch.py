@@ -0,0 +1,145 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+# Pivot levels in the order the strategies check them, with their "pp" dict keys
+PIVOT_LEVELS = (("Pivot", "pp"), ("R1", "r1"), ("R2", "r2"), ("R3", "r3"),
+                ("S1", "s1"), ("S2", "s2"), ("S3", "s3"))
+PIVOT_KEYS = tuple(key for _, key in PIVOT_LEVELS)
+
+
+# ------------------ Column Loading ------------------
+def load_columns(json_data, keys):
+    """
+    Load the given fields of every symbol into float64 columns.
+
+    Args:
+        json_data: {symbol: details} dict, or a snapshot.SnapshotEquities
+        keys: field keys; pivot keys (pp, r1 … s3) are read from the "pp" dict
+
+    Returns:
+        (symbols, {key: np.ndarray}) with NaN wherever a value is missing
+    """
+    symbols = list(json_data)
+    snap = getattr(json_data, "snapshot", None)
+    if snap is not None:
+        columns = {}
+        for key in keys:
+            column = snap.column(key)
+            columns[key] = np.full(len(symbols), np.nan) if column is None else column
+        return symbols, columns
+
+    details_list = list(json_data.values())
+    pivots = None
+    columns = {}
+    for key in keys:
+        if key in PIVOT_KEYS:
+            if pivots is None:
+                pivots = [details.get("pp") or {} for details in details_list]
+            values = [pp.get(key) for pp in pivots]
+        else:
+            values = [details.get(key) for details in details_list]
+        columns[key] = _to_column(values)
+    return symbols, columns
+
+
+def _to_column(values):
+    try:
+        return np.array(values, dtype=np.float64)  # None → NaN
+    except (TypeError, ValueError):
+        return np.array([v if isinstance(v, (int, float)) else np.nan for v in values], dtype=np.float64)
+
+
+def _filled(column, default=0.0):
+    return np.where(np.isnan(column), default, column)
+
+
+def price_column(columns, read_previous_day_price=False):
+    """Array form of `read_previous_day_price and ldcp or c`, missing → 0."""
+    close = _filled(columns["c"])
+    if not read_previous_day_price:
+        return close
+    ldcp = _filled(columns["ldcp"])
+    return np.where(ldcp != 0, ldcp, close)
+
+
+def nearest_pivot(price, columns):
+    """
+    Index into PIVOT_LEVELS of the first level within 2% of `price`, or -1.
+    Mirrors the per-symbol loop: a missing pivot point falls back to the price.
+    """
+    levels = np.vstack([
+        np.where(np.isnan(columns["pp"]), price, columns["pp"]),
+        *(_filled(columns[key]) for key in PIVOT_KEYS[1:]),
+    ])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        near = (levels != 0) & (np.abs(price - levels) / price < 0.02)
+    return np.where(near.any(axis=0), near.argmax(axis=0), -1)
+
+
+def round2(values):
+    """
+    np.round(values, 2) that agrees with Python's round(): values sitting on a
+    .005 boundary after scaling are re-rounded one by one.
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6).tolist():
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def rank_order(keys, top_k=None):
+    """
+    Row indexes ordered by `keys` (equal-length columns, most significant
+    first), all descending with ties in row order, like sorted(...,
+    reverse=True) on the key tuples.
+
+    With `top_k`, only the best top_k rows are returned: rows that cannot
+    reach the top are dropped by a partition on the first key, so just the
+    candidates are sorted.
+    """
+    rows = np.arange(len(keys[0]))
+    if top_k is not None and top_k < len(rows):
+        if top_k <= 0:
+            return rows[:0]
+        primary = -keys[0]
+        kth = np.partition(primary, top_k - 1)[top_k - 1]
+        rows = np.flatnonzero(primary <= kth)  # keeps every row tied with the k-th
+    order = rows[np.lexsort(tuple(-key[rows] for key in reversed(keys)))]
+    return order if top_k is None else order[:top_k]
+
+
+class RankedRows(Sequence):
+    """
+    Ranked results whose row dicts are only built when accessed, so showing
+    the top rows of a 50k-symbol screen does not format 50k dicts.
+    Compares equal to the list returned by the per-symbol strategies.
+    """
+
+    def __init__(self, order, build_row):
+        self._order = order
+        self._build_row = build_row
+        self._rows = {}
+
+    def __len__(self):
+        return len(self._order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        i = self._order[index]
+        row = self._rows.get(i)
+        if row is None:
+            row = self._rows[i] = self._build_row(i)
+        return row
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<RankedRows {len(self)} rows>"
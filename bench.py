@@ -0,0 +1,676 @@
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import bulk
+import snapshot
+from backtest import backtest
+from batch import load_columns
+from features import feature_matrix, recommend_day_trade_batch
+from indicators import IndicatorMemo
+from momentum import HORIZONS, momentum
+from parallel import run_all_screens_parallel
+from parser import extract_and_merge, ingest
+from schema import COLUMNS_FILE
+from sectors import STAT_FIELDS, sector_index, sector_stats
+from strategies import (
+    calculate_macd,
+    calculate_macd_all,
+    calculate_pch,
+    calculate_rsi,
+    calculate_sma,
+    find_fundamentally_strong,
+    find_undervalued,
+    recommend_day_trade,
+    recommend_long_term,
+    recommend_swing_trade,
+)
+
+
+# ------------------ Synthetic Data ------------------
+SECTORS = 24  # sector codes "0801" … "0824", assigned round-robin
+def make_universe(n_symbols, n_bars=0, seed=0):
+    """
+    Synthetic {symbol: details} universe shaped like stocks.json, with
+    quote fields, pivots, fundamentals and optionally `n_bars` daily bars.
+    """
+    rng = random.Random(seed)
+    equities = {}
+    for i in range(n_symbols):
+        price = round(rng.uniform(2, 500), 2)
+        pp = round(price * rng.uniform(0.95, 1.05), 2)
+        step = price * rng.uniform(0.005, 0.03)
+        details = {
+            "nm": f"Synthetic {i}",
+            "sc": f"{801 + i % SECTORS:04d}",
+            "c": price,
+            "ldcp": round(price * rng.uniform(0.95, 1.05), 2),
+            "pch": round(rng.uniform(-6, 6), 2),
+            "v": rng.randint(0, 2_000_000),
+            "vm": rng.randint(0, 1_000_000),
+            "rsi": round(rng.uniform(5, 95), 4),
+            "uc": round(price * 1.075, 2),
+            "lc": round(price * 0.925, 2),
+            "pp": {
+                "pp": pp,
+                "r1": round(pp + step, 2), "r2": round(pp + 2 * step, 2), "r3": round(pp + 3 * step, 2),
+                "s1": round(pp - step, 2), "s2": round(pp - 2 * step, 2), "s3": round(pp - 3 * step, 2),
+            },
+            "p1w": round(price * rng.uniform(0.9, 1.1), 2),
+            "p1m": round(price * rng.uniform(0.8, 1.2), 2),
+            "p3m": round(price * rng.uniform(0.7, 1.3), 2),
+            "p1y": round(price * rng.uniform(0.5, 1.5), 2),
+            "eps": round(rng.uniform(-5, 40), 2),
+            "pat": rng.randint(-50_000, 500_000),
+            "roe": round(rng.uniform(-10, 40), 3),
+            "roa": round(rng.uniform(-5, 20), 3),
+            "roce": round(rng.uniform(-5, 30), 3),
+            "bval": round(price * rng.uniform(0.3, 2), 2),
+            "per": round(rng.uniform(1, 30), 3),
+            "pbr": round(rng.uniform(0.2, 5), 3),
+            "psr": round(rng.uniform(0.2, 5), 3),
+            "divy": round(rng.uniform(0, 15), 3),
+            "divc": round(rng.uniform(0, 5), 3),
+            "npm": round(rng.uniform(-10, 40), 3),
+            "opm": round(rng.uniform(-10, 40), 3),
+            "grat": round(rng.uniform(0, 3), 3),
+            "intc": round(rng.uniform(0, 10), 3),
+            "curr": round(rng.uniform(0.3, 4), 3),
+            "sales": rng.randint(0, 5_000_000),
+        }
+        if n_bars:
+            details["technicals"] = _random_walk(rng, price, n_bars)
+        equities[f"SYM{i:05d}"] = details
+    return equities
+
+
+def _random_walk(rng, price, n_bars, start=1_600_000_000):
+    bars = []
+    close = price
+    for k in range(n_bars):
+        open_ = close
+        close = max(0.5, close * (1 + rng.gauss(0, 0.02)))
+        bars.append([
+            start + k * 86400, round(open_, 2), round(max(open_, close) * 1.01, 2),
+            round(min(open_, close) * 0.99, 2), round(close, 2), rng.randint(100, 100_000),
+        ])
+    return bars
+
+
+def make_har(path, size_mb, n_symbols=500, n_bars=120, seed=0, started=1_700_000_000):
+    """
+    Write a synthetic HAR capture of about `size_mb` MB shaped like the
+    broker's: /req entries with quotes and fundamentals for a batch of
+    symbols, /req metric lists, and /rq entries with daily bars. Symbols
+    come back in later entries with shifted, overlapping bar windows, so
+    merging does real work. Entry times start at `started` (epoch seconds).
+    """
+    rng = random.Random(seed)
+    universe = make_universe(n_symbols, seed=seed)
+    symbols = list(universe)
+    batch = 50
+    walks = {symbol: _random_walk(rng, universe[symbol]["c"], n_bars + 250) for symbol in symbols}
+
+    target = size_mb * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as f:
+        written = f.write('{"log": {"version": "1.2", "creator": {"name": "bench", "version": "1"}, "entries": [\n')
+        k = 0
+        while written < target:
+            names = [symbols[(k // 3 * batch + i) % n_symbols] for i in range(batch)]
+            if k % 3 == 0:
+                url, payload = "/api/req", {"data": {"eq": {symbol: universe[symbol] for symbol in names}}}
+            elif k % 3 == 1:
+                url, payload = "/api/req", {"data": [
+                    {"symbol": symbol, "name": "roe", "period": "2024", "value": round(rng.uniform(-10, 40), 3)}
+                    for symbol in names
+                ]}
+            else:
+                day = (k // 3) % 250
+                url, payload = "/api/rq", {"data": {symbol: walks[symbol][day:day + n_bars] for symbol in names}}
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(started + k))
+            entry = {
+                "startedDateTime": f"{stamp}.000Z",
+                "request": {"method": "POST", "url": f"https://research.example.com{url}"},
+                "response": {"status": 200, "content": {"mimeType": "application/json", "text": json.dumps(payload)}},
+            }
+            written += f.write(("," if k else "") + json.dumps(entry) + "\n")
+            k += 1
+        f.write("]}}\n")
+    return path
+
+
+def timed(fn, *args, repeat=3, **kwargs):
+    """Best wall time of `repeat` calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+# ------------------ Benchmarks ------------------
+def synthetic_snapshot(equities, path):
+    """Write `equities` as a snapshot and map it back, as the app would."""
+    snapshot.write_snapshot(equities, path, COLUMNS_FILE)
+    return snapshot.load(path)
+
+
+def bench_day_trade(sizes=(5_000, 50_000)):
+    """
+    Per-symbol loop over dicts vs the batch screen over mapped snapshot
+    columns; both include building the top 50 rows.
+    """
+    print("recommend_day_trade: per-symbol loop vs batch")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            equities = make_universe(n)
+            columns = synthetic_snapshot(equities, os.path.join(tmp, f"day_{n}.snap"))
+            assert recommend_day_trade_batch(columns) == recommend_day_trade(equities)
+            assert recommend_day_trade_batch(equities) == recommend_day_trade(equities)
+
+            loop = timed(lambda: recommend_day_trade(equities)[:50])
+            from_dicts = timed(lambda: recommend_day_trade_batch(equities)[:50])
+            vec = timed(lambda: recommend_day_trade_batch(columns)[:50])
+            print(f"  {n:>7,} symbols  loop {loop * 1e3:8.1f} ms  "
+                  f"batch(dicts) {from_dicts * 1e3:8.1f} ms  batch(snapshot) {vec * 1e3:8.1f} ms  "
+                  f"({n / vec:,.0f} symbols/s, {loop / vec:.1f}x)")
+
+
+def bench_macd(n_symbols=5_000, n_bars=250):
+    """Three calculate_macd calls per symbol vs one calculate_macd_all vs one batched prefill."""
+    equities = make_universe(n_symbols, n_bars)
+    technicals = [details["technicals"] for details in equities.values()]
+
+    def three_calls():
+        for t in technicals:
+            calculate_macd(t, mode='M'), calculate_macd(t, mode='S'), calculate_macd(t, mode='H')
+
+    def one_call():
+        for t in technicals:
+            calculate_macd_all(t)
+
+    def batched():
+        IndicatorMemo().prefill_macd(equities)
+
+    print(f"MACD over {n_symbols:,} symbols × {n_bars} bars")
+    for label, fn in (("3× calculate_macd", three_calls), ("calculate_macd_all", one_call), ("batched prefill", batched)):
+        print(f"  {label:<20} {timed(fn) * 1e3:8.1f} ms")
+
+
+def bench_parallel(n_symbols=5_000, n_bars=500, workers=(1, 2, 4, 8)):
+    """find_fundamentally_strong in-process vs over a process pool of each size."""
+    equities = make_universe(n_symbols, n_bars)
+    serial_result = find_fundamentally_strong(equities)
+    serial = timed(find_fundamentally_strong, equities, repeat=1)
+
+    print(f"find_fundamentally_strong over {n_symbols:,} symbols × {n_bars} bars ({os.cpu_count()} CPUs)")
+    print(f"  {'in-process':<12} {serial * 1e3:8.1f} ms")
+    for n in workers:
+        run = lambda: run_all_screens_parallel(equities, n, screens=("strong",))["strong"]
+        assert run() == serial_result
+        elapsed = timed(run, repeat=1)
+        print(f"  {n} worker(s)  {elapsed * 1e3:8.1f} ms  ({serial / elapsed:.2f}x)")
+
+
+def bench_backtest(n_symbols=1_000, n_bars=750, screen="swing"):
+    """Walk-forward replay of one screen over every bar of a synthetic universe."""
+    equities = make_universe(n_symbols, n_bars)
+    started = time.perf_counter()
+    result = backtest(equities, screen, top_n=10, hold=5)
+    elapsed = time.perf_counter() - started
+    print(f"backtest({screen!r}) over {n_symbols:,} symbols × {n_bars} bars: {elapsed:.1f} s "
+          f"({n_symbols * n_bars / elapsed:,.0f} bars/s, {result['n_trades']} trades)")
+
+
+def bench_ingest(n_files=8, size_mb=10, workers=(1, 2, 4)):
+    """parser.ingest of a day's worth of gzip captures, serial vs a process pool."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(n_files):
+            har = make_har(os.path.join(tmp, f"capture_{i}.har"), size_mb, seed=i, started=1_700_000_000 + i * 3600)
+            with open(har, "rb") as src, gzip.open(f"{har}.gz", "wb", compresslevel=1) as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(har)
+
+        print(f"parser.ingest of {n_files} × {size_mb} MB .har.gz captures ({os.cpu_count()} CPUs)")
+        output = os.path.join(tmp, "stocks.json")
+        serial = None
+        for n in workers:
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed = timed(ingest, tmp, output, workers=n, repeat=1)
+            serial = serial or elapsed
+            print(f"  {n} worker(s)  {elapsed:8.2f} s  ({serial / elapsed:.2f}x)")
+
+
+# ------------------ Regression Suite ------------------
+# Sizes per benchmark group: bars per series, symbols, MB of HAR, symbols
+SUITE_SIZES = {
+    "indicators": (100, 1_000, 10_000),
+    "strategies": (500, 5_000, 50_000),
+    "parser": (10, 100, 1_000),
+    "sectors": (5_000, 50_000),
+    "momentum": (5_000, 50_000),
+    "bulk": (1_000, 10_000),
+    "app": (5_000,),
+}
+QUICK_SIZES = {
+    "indicators": (100, 1_000),
+    "strategies": (500, 5_000),
+    "parser": (10,),
+    "sectors": (5_000,),
+    "momentum": (5_000,),
+    "bulk": (1_000,),
+    "app": (500,),
+}
+SUITE_BARS = 60   # bars per symbol in the strategy universes (enough for SMA50 / MACD)
+BAR_POOL = 256    # distinct bar series, shared round-robin so 50k symbols fit in memory
+
+STRATEGIES = (
+    ("recommend_day_trade", recommend_day_trade),
+    ("recommend_swing_trade", recommend_swing_trade),
+    ("recommend_long_term", recommend_long_term),
+    ("find_undervalued", find_undervalued),
+    ("find_fundamentally_strong", find_fundamentally_strong),
+)
+
+
+def measure(fn, max_repeat=5, budget=2.0):
+    """
+    Best wall time of up to `max_repeat` calls, stopping early once
+    `budget` seconds have been spent (slow cases run once).
+
+    Returns:
+        (best seconds, calls made)
+    """
+    best = float("inf")
+    spent = 0.0
+    calls = 0
+    while calls < max_repeat and (calls == 0 or spent < budget):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        spent += elapsed
+        calls += 1
+    return best, calls
+
+
+def _record(name, size, unit, timing):
+    seconds, repeat = timing
+    return {"name": name, "size": size, "unit": unit, "seconds": seconds, "repeat": repeat}
+
+
+def strategy_universe(n_symbols, seed=0):
+    """make_universe with SUITE_BARS bars per symbol, drawn from BAR_POOL shared series."""
+    rng = random.Random(seed)
+    pool = [_random_walk(rng, rng.uniform(5, 500), SUITE_BARS) for _ in range(BAR_POOL)]
+    equities = make_universe(n_symbols, seed=seed)
+    for i, details in enumerate(equities.values()):
+        details["technicals"] = pool[i % BAR_POOL]
+    return equities
+
+
+def suite_indicators(sizes, tmp):
+    """calculate_rsi / calculate_sma / calculate_macd on one series of each length."""
+    rng = random.Random(0)
+    for n in sizes:
+        bars = _random_walk(rng, 100.0, n)
+        yield _record("indicators.calculate_rsi", n, "bars", measure(lambda: calculate_rsi(bars, 14), 20))
+        yield _record("indicators.calculate_sma", n, "bars", measure(lambda: calculate_sma(bars, 20), 20))
+        yield _record("indicators.calculate_macd", n, "bars", measure(lambda: calculate_macd(bars), 20))
+
+
+def suite_strategies(sizes, tmp):
+    """Each strategy function over synthetic universes with bars."""
+    for n in sizes:
+        equities = strategy_universe(n)
+        for name, strategy in STRATEGIES:
+            yield _record(f"strategies.{name}", n, "symbols", measure(lambda: strategy(equities), 3))
+        del equities
+
+
+def suite_parser(sizes, tmp):
+    """parser.extract_and_merge on generated HAR captures of each size (MB)."""
+    for mb in sizes:
+        har = make_har(os.path.join(tmp, f"capture_{mb}.har"), mb)
+        output = os.path.join(tmp, "stocks.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            timing = measure(lambda: extract_and_merge(har, output), 3)
+        os.remove(har)
+        yield _record("parser.extract_and_merge", mb, "MB", timing)
+
+
+def suite_sectors(sizes, tmp):
+    """
+    Sector index, per-sector statistics of the fundamentals and in-sector
+    ranks, then the screens' features over one sector vs the whole universe.
+    """
+    for n in sizes:
+        records = make_universe(n, 0)
+        index = sector_index(records)
+        symbols, columns = load_columns(records, ("per",))
+        yield _record("sectors.index", n, "symbols", measure(lambda: sector_index(records), 5))
+        yield _record("sectors.stats", n, "symbols", measure(lambda: sector_stats(records, STAT_FIELDS, index=index), 3))
+        yield _record("sectors.ranks", n, "symbols", measure(lambda: index.ranks(columns["per"]), 5))
+        yield _record("sectors.features_all", n, "symbols", measure(lambda: feature_matrix(records, screens=("long", "undervalued")), 3))
+        yield _record("sectors.features_one", n, "symbols", measure(
+            lambda: feature_matrix(index.subset(records, index.sectors[0]), screens=("long", "undervalued")), 3))
+        del records, index
+
+
+def suite_momentum(sizes, tmp):
+    """
+    Universe-wide momentum ranking: per-symbol calculate_pch over the
+    p1w / p1m / p3m / p1y fields plus a sort per horizon, vs
+    momentum.momentum from the fields and from the bars.
+    """
+    def per_symbol(equities):
+        ranked = {}
+        for name, field, _ in HORIZONS:
+            changes = [(calculate_pch(details.get("c", 0), details.get(field, 0)), symbol)
+                       for symbol, details in equities.items()]
+            ranked[name] = sorted(changes, reverse=True)
+        return ranked
+
+    for n in sizes:
+        equities = strategy_universe(n)
+        yield _record("momentum.per_symbol", n, "symbols", measure(lambda: per_symbol(equities), 3))
+        yield _record("momentum.fields", n, "symbols", measure(lambda: momentum(equities), 5))
+        yield _record("momentum.bars", n, "symbols", measure(lambda: momentum(equities, source="bars"), 3))
+        del equities
+
+
+def bulk_universe(n_symbols, seed=0):
+    """{symbol: {"technicals": bars}} with ragged histories of 10 … 250 bars, from BAR_POOL shared series."""
+    rng = random.Random(seed)
+    pool = [_random_walk(rng, rng.uniform(5, 500), rng.randint(10, 250)) for _ in range(BAR_POOL)]
+    return {f"SYM{i:05d}": {"technicals": pool[i % BAR_POOL]} for i in range(n_symbols)}
+
+
+# Plain per-symbol versions of the indicators strategies.py has no helper
+# for, as the baseline of the bulk library (same definitions as bulk.py)
+def _wilder_last(values, period):
+    average = 0
+    for k, x in enumerate(values):
+        if k < period:
+            average += x
+        if k == period - 1:
+            average /= period
+        if k >= period:
+            average = (average * (period - 1) + x) / period
+    return average if len(values) >= period else None
+
+
+def _scalar_ema(technicals, period=20):
+    closes = [bar[4] for bar in technicals]
+    if len(closes) < period:
+        return None
+    alpha = 2 / (period + 1)
+    average = sum(closes[:period]) / period
+    for close in closes[period:]:
+        average = alpha * close + (1 - alpha) * average
+    return average
+
+
+def _scalar_bollinger(technicals, period=20, width=2.0):
+    if len(technicals) < period:
+        return None
+    closes = [bar[4] for bar in technicals[-period:]]
+    middle = sum(closes) / period
+    spread = width * (sum((c - middle) ** 2 for c in closes) / period) ** 0.5
+    return middle, middle + spread, middle - spread
+
+
+def _true_ranges(technicals):
+    return [max(bar[2] - bar[3], abs(bar[2] - prev[4]), abs(bar[3] - prev[4]))
+            for prev, bar in zip(technicals, technicals[1:])]
+
+
+def _scalar_atr(technicals, period=14):
+    return _wilder_last(_true_ranges(technicals), period)
+
+
+def _scalar_adx(technicals, period=14):
+    if len(technicals) < 2 * period:
+        return None
+    tr = plus = minus = 0
+    dx = []
+    for k, (prev, bar) in enumerate(zip(technicals, technicals[1:])):
+        up, down = bar[2] - prev[2], prev[3] - bar[3]
+        values = (max(bar[2] - bar[3], abs(bar[2] - prev[4]), abs(bar[3] - prev[4])),
+                  up if up > down and up > 0 else 0.0, down if down > up and down > 0 else 0.0)
+        if k < period:
+            tr, plus, minus = tr + values[0], plus + values[1], minus + values[2]
+        if k == period - 1:
+            tr, plus, minus = tr / period, plus / period, minus / period
+        if k >= period:
+            tr, plus, minus = ((a * (period - 1) + x) / period for a, x in zip((tr, plus, minus), values))
+        if k >= period - 1:
+            total = plus + minus
+            dx.append(100 * abs(plus - minus) / total if total > 0 else 0.0)
+    return _wilder_last(dx, period)
+
+
+def _scalar_vwap(technicals, period=20):
+    if len(technicals) < period:
+        return None
+    window = technicals[-period:]
+    volume = sum(bar[5] for bar in window)
+    return sum((bar[2] + bar[3] + bar[4]) / 3 * bar[5] for bar in window) / volume if volume else None
+
+
+def suite_bulk(sizes, tmp):
+    """
+    Each indicator over a universe with ragged histories: the scalar version
+    called per symbol (strategies.py for SMA / RSI / MACD, the plain ones
+    above for the rest) vs one bulk.py call over the padded matrix.
+    bulk.matrix is the cost of padding the bars.
+    """
+    cases = (
+        ("sma", lambda t: calculate_sma(t, 20), lambda b: bulk.sma(b.close, b.lengths, 20)),
+        ("rsi", lambda t: calculate_rsi(t, 14), lambda b: bulk.rsi(b.close, b.lengths, 14)),
+        ("macd", calculate_macd_all, lambda b: bulk.macd(b.close, b.lengths)),
+        ("ema", _scalar_ema, lambda b: bulk.ema(b.close, b.lengths, 20)),
+        ("bollinger", _scalar_bollinger, lambda b: bulk.bollinger(b.close, b.lengths)),
+        ("atr", _scalar_atr, lambda b: bulk.atr(b.high, b.low, b.close, b.lengths)),
+        ("adx", _scalar_adx, lambda b: bulk.adx(b.high, b.low, b.close, b.lengths)),
+        ("vwap", _scalar_vwap, lambda b: bulk.vwap(b.high, b.low, b.close, b.volume, b.lengths)),
+    )
+    for n in sizes:
+        equities = bulk_universe(n)
+        technicals_list = [details["technicals"] for details in equities.values()]
+        bars = bulk.BarMatrix.from_equities(equities)
+        yield _record("bulk.matrix", n, "symbols", measure(lambda: bulk.BarMatrix.from_equities(equities), 3))
+        for name, scalar, batched in cases:
+            yield _record(f"bulk.{name}.scalar", n, "symbols",
+                          measure(lambda: [scalar(technicals) for technicals in technicals_list], 3))
+            yield _record(f"bulk.{name}.matrix", n, "symbols", measure(lambda: batched(bars), 5))
+        del equities, technicals_list, bars
+
+
+def suite_app(sizes, tmp):
+    """
+    Latency of a "/" POST for each choice through Flask's test client:
+    "cold" right after the data changed (empty result cache) and "cached".
+    """
+    cwd = os.getcwd()
+    for n in sizes:
+        folder = os.path.join(tmp, f"app_{n}")
+        os.makedirs(folder)
+        with open(os.path.join(folder, "stocks.json"), "w", encoding="utf-8") as f:
+            json.dump(strategy_universe(n), f)
+        os.chdir(folder)
+        try:
+            import app
+            app.data_loader.stop()  # no background polling while timing
+            app.data_loader.refresh()
+            client = app.app.test_client()
+
+            for choice in app.CHOICES:
+                def post():
+                    response = client.post("/", data={"choice": choice})
+                    assert response.status_code == 200, response.status_code
+
+                def cold():
+                    app.results_cache.clear()
+                    post()
+
+                yield _record(f"app.post.{choice}.cold", n, "symbols", measure(cold, 3))
+                yield _record(f"app.post.{choice}.cached", n, "symbols", measure(post, 20))
+        finally:
+            os.chdir(cwd)
+
+
+SUITES = {
+    "indicators": suite_indicators,
+    "strategies": suite_strategies,
+    "parser": suite_parser,
+    "sectors": suite_sectors,
+    "momentum": suite_momentum,
+    "bulk": suite_bulk,
+    "app": suite_app,
+}
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(sizes=SUITE_SIZES, groups=None):
+    """
+    Run the benchmark groups (default: all of `sizes`) and return
+    {"meta": machine / version info, "results": [{name, size, unit,
+    seconds, repeat}, ...]}. Times are the best of the calls made.
+    """
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for group in groups or sizes:
+            for record in SUITES[group](sizes[group], tmp):
+                print(f"  {record['name']:<40} {record['size']:>7,} {record['unit']:<8} "
+                      f"{record['seconds'] * 1e3:10.2f} ms  (best of {record['repeat']})", flush=True)
+                report["results"].append(record)
+    return report
+
+
+def compare(report, baseline, tolerance=0.25, min_delta=0.002):
+    """
+    Compare a run_suite report with a baseline report.
+
+    A benchmark is "slower" when it takes more than (1 + tolerance) times
+    its baseline and at least `min_delta` seconds more (so sub-millisecond
+    jitter is not a regression), "faster" for the mirror case, and "new"
+    when the baseline does not have it.
+
+    Returns:
+        list of dicts: name, size, baseline, seconds, ratio, status
+    """
+    base = {(r["name"], r["size"]): r["seconds"] for r in baseline["results"]}
+    rows = []
+    for record in report["results"]:
+        before = base.get((record["name"], record["size"]))
+        seconds = record["seconds"]
+        if before is None:
+            status, ratio = "new", None
+        else:
+            ratio = seconds / before if before else float("inf")
+            if seconds > before * (1 + tolerance) and seconds - before >= min_delta:
+                status = "slower"
+            elif before > seconds * (1 + tolerance) and before - seconds >= min_delta:
+                status = "faster"
+            else:
+                status = "ok"
+        rows.append({"name": record["name"], "size": record["size"], "baseline": before,
+                     "seconds": seconds, "ratio": ratio, "status": status})
+    return rows
+
+
+def print_comparison(rows, baseline_meta=None, meta=None):
+    if baseline_meta and meta:
+        for key in ("cpus", "platform", "python"):
+            if baseline_meta.get(key) != meta.get(key):
+                print(f"⚠️ Baseline {key} differs: {baseline_meta.get(key)} vs {meta.get(key)}")
+    for row in rows:
+        before = "-" if row["baseline"] is None else f"{row['baseline'] * 1e3:10.2f}"
+        ratio = "" if row["ratio"] is None else f"{row['ratio']:.2f}x"
+        mark = {"slower": "❌", "faster": "🚀", "new": "🆕"}.get(row["status"], "✅")
+        print(f"{mark} {row['name']:<40} {row['size']:>7,}  {before:>10} → {row['seconds'] * 1e3:10.2f} ms  {ratio}")
+
+
+def save_report(report, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main_suite(argv):
+    cli = argparse.ArgumentParser(prog="bench.py suite", description="Benchmark suite with baseline comparison")
+    cli.add_argument("--quick", action="store_true", help="smaller sizes (no 100 MB / 1 GB HARs)")
+    cli.add_argument("--only", help="comma-separated groups: " + ",".join(SUITES))
+    cli.add_argument("--output", default="bench_results.json", help="where to write this run's results")
+    cli.add_argument("--baseline", default="bench_baseline.json", help="baseline to compare against")
+    cli.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    cli.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    args = cli.parse_args(argv)
+
+    groups = args.only.split(",") if args.only else None
+    report = run_suite(QUICK_SIZES if args.quick else SUITE_SIZES, groups)
+    save_report(report, args.output)
+    print(f"\n✅ Results saved to {args.output}")
+
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(report, baseline, args.tolerance)
+    print_comparison(rows, baseline.get("meta"), report["meta"])
+    slower = [row for row in rows if row["status"] == "slower"]
+    if slower:
+        print(f"\n❌ {len(slower)} benchmark(s) slower than the baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    # Usage: python bench.py [sizes ...]   or   python bench.py suite [--quick] [--save-baseline] ...
+    if sys.argv[1:2] == ["suite"]:
+        sys.exit(main_suite(sys.argv[2:]))
+    bench_day_trade(*[tuple(int(n) for n in sys.argv[1:])] if len(sys.argv) > 1 else ())
+    bench_macd()
+    bench_parallel()
+    bench_backtest()
+    bench_ingest()
@@ -0,0 +1,279 @@
+import sys
+
+import numpy as np
+
+from bars import load_equities, padded
+from batch import round2
+from indicators import macd_matrix
+
+BAR_FIELDS = ("close", "high", "low", "volume")
+
+
+# ------------------ Bar Matrix ------------------
+class BarMatrix:
+    """
+    Right-aligned (symbols × bars) OHLCV matrices of a universe: each row
+    ends with the symbol's latest bar and is NaN-padded on the left, so
+    histories of any length line up on their last bar.
+
+    Attributes:
+        symbols: symbol of each row
+        lengths (np.ndarray): bars in each row
+        close, high, low, volume (np.ndarray): float64 matrices (None if not loaded)
+    """
+
+    def __init__(self, symbols, lengths, close, high=None, low=None, volume=None):
+        self.symbols = symbols
+        self.lengths = lengths
+        self.close = close
+        self.high = high
+        self.low = low
+        self.volume = volume
+
+    @classmethod
+    def from_equities(cls, json_data, symbols=None, depth=None, fields=BAR_FIELDS):
+        """
+        Matrices of the given bar fields for `symbols` (default: every
+        symbol). A snapshot is read from its bar store in one gather per
+        field, a {symbol: details} dict through bars.padded.
+        `depth` keeps only the latest bars (RSI and EMA read the whole history).
+        """
+        symbols = list(json_data) if symbols is None else symbols
+        matrices = {}
+        snap = getattr(json_data, "snapshot", None)
+        if snap is not None:
+            store = snap.bar_store()
+            rows = None if symbols == snap.symbols else [snap.row[symbol] for symbol in symbols]
+            for field in fields:
+                matrix, lengths = store.matrix(field, depth)
+                matrices[field] = matrix if rows is None else matrix[rows]
+            lengths = lengths if rows is None else lengths[rows]
+        else:
+            technicals = [json_data[symbol].get("technicals") for symbol in symbols]
+            for field in fields:
+                matrices[field], lengths = padded(technicals, field, depth)
+        return cls(symbols, lengths, **matrices)
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+def _first(matrix, lengths):
+    # Column of each row's first bar
+    return matrix.shape[1] - np.asarray(lengths)
+
+
+# ------------------ Recurrences ------------------
+# `first` is the column of each row's first value; a row's k-th value sits at
+# first + k. The seed window is gathered once, then each later column is one
+# whole-column step, so the cost is (bars × a few) numpy calls however many
+# symbols there are.
+def _seed(values, first, period):
+    # Sum of each row's first `period` values, left to right like the scalar
+    # loops; also the column each row's recurrence starts at
+    rows, depth = values.shape
+    if not depth:
+        return np.full(rows, np.nan), np.zeros(rows, dtype=np.intp)
+    row = np.arange(rows)
+    total = np.zeros(rows)
+    for k in range(period):
+        total = total + values[row, np.clip(first + k, 0, depth - 1)]
+    seeded = first + period - 1 < depth
+    return np.where(seeded, total / period, np.nan), np.where(seeded, first + period, depth)
+
+
+def _wilder(values, first, period, series=False):
+    """
+    Wilder average of every row: the mean of its first `period` values, then
+    (previous * (period - 1) + value) / period, in the order calculate_rsi
+    uses. Returns the last average per row (NaN if never seeded), or with
+    `series` the running average per column, NaN until seeded.
+    """
+    rows, depth = values.shape
+    average, start = _seed(values, first, period)
+    out = np.full((rows, depth), np.nan) if series else None
+    for t in range(int(start.min()) - 1 if rows else depth, depth):
+        if t >= 0 and out is not None:
+            out[:, t] = np.where(start - 1 == t, average, out[:, t])
+        active = start <= t
+        if not active.any():
+            continue
+        average = np.where(active, (average * (period - 1) + values[:, t]) / period, average)
+        if out is not None:
+            out[:, t] = np.where(active, average, out[:, t])
+    return out if series else average
+
+
+def _ema(values, first, period):
+    # EMA seeded with the mean of the first `period` values; last value per row
+    alpha = 2 / (period + 1)
+    average, start = _seed(values, first, period)
+    for t in range(int(start.min()) if len(start) else 0, values.shape[1]):
+        average = np.where(start <= t, alpha * values[:, t] + (1 - alpha) * average, average)
+    return average
+
+
+def _last(series, lengths, required):
+    return np.where(np.asarray(lengths) >= required, series[:, -1], np.nan) if series.shape[1] else \
+        np.full(series.shape[0], np.nan)
+
+
+def _tail_sum(matrix, period):
+    # Left-to-right sum of the last `period` columns, like sum() over the window
+    total = np.zeros(matrix.shape[0])
+    for k in range(matrix.shape[1] - period, matrix.shape[1]):
+        total = total + matrix[:, k]
+    return total
+
+
+# ------------------ Indicators ------------------
+def sma(close, lengths, period=20):
+    """Mean of the last `period` closes rounded to 2 decimals, like strategies.calculate_sma."""
+    if close.shape[1] < period:
+        return np.full(close.shape[0], np.nan)
+    valid = np.asarray(lengths) >= period
+    mean = np.where(valid, _tail_sum(close, period) / period, 0.0)
+    return np.where(valid, round2(mean), np.nan)
+
+
+def ema(close, lengths, period=20):
+    """Exponential moving average (alpha = 2 / (period + 1)) of the whole history, seeded with its first SMA."""
+    return _ema(close, _first(close, lengths), period)
+
+
+def rsi(close, lengths, period=14):
+    """Wilder RSI of the whole history, equal to strategies.calculate_rsi."""
+    n = int(period)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        diff = np.full(close.shape, np.nan)
+        diff[:, 1:] = close[:, 1:] - close[:, :-1]
+        first = _first(close, lengths) + 1  # diffs start at each row's second bar
+        avg_gain = _wilder(np.where(diff > 0, diff, 0.0), first, n)
+        avg_loss = _wilder(np.where(diff < 0, -diff, 0.0), first, n)
+        return np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+
+
+def macd(close, lengths, short_period=12, long_period=26, signal_period=9):
+    """
+    (macd, signal, histogram) like strategies.calculate_macd_all (SMA based,
+    rounded to 2 decimals); NaN without long_period + signal_period bars.
+    """
+    lines = macd_matrix(close, short_period, long_period, signal_period)
+    return tuple(np.array(line, dtype=np.float64) for line in lines)
+
+
+def bollinger(close, lengths, period=20, width=2.0):
+    """(middle, upper, lower) band: SMA of the last `period` closes ± `width` population std."""
+    if close.shape[1] < period:
+        missing = np.full(close.shape[0], np.nan)
+        return missing, missing, missing
+    valid = np.asarray(lengths) >= period
+    tail = np.where(valid[:, None], close[:, -period:], 0.0)
+    middle = tail.mean(axis=1)
+    spread = width * tail.std(axis=1)
+    return tuple(np.where(valid, band, np.nan) for band in (middle, middle + spread, middle - spread))
+
+
+def true_range(high, low, close):
+    """True range of every bar after the first (column 0 is NaN)."""
+    tr = np.full(close.shape, np.nan)
+    previous = close[:, :-1]
+    h, l = high[:, 1:], low[:, 1:]
+    tr[:, 1:] = np.maximum(h - l, np.maximum(np.abs(h - previous), np.abs(l - previous)))
+    return tr
+
+
+def atr(high, low, close, lengths, period=14):
+    """Wilder average true range; needs period + 1 bars."""
+    with np.errstate(invalid="ignore"):
+        return _wilder(true_range(high, low, close), _first(close, lengths) + 1, period)
+
+
+def adx(high, low, close, lengths, period=14):
+    """
+    (adx, plus_di, minus_di) with Wilder smoothing; the DIs need period + 1
+    bars and the ADX (the Wilder average of DX) 2 * period.
+    """
+    first = _first(close, lengths) + 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        up = np.full(close.shape, np.nan)
+        down = np.full(close.shape, np.nan)
+        up[:, 1:] = high[:, 1:] - high[:, :-1]
+        down[:, 1:] = low[:, :-1] - low[:, 1:]
+        plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+        minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+
+        tr = _wilder(true_range(high, low, close), first, period, series=True)
+        plus_di = 100 * _wilder(plus_dm, first, period, series=True) / tr
+        minus_di = 100 * _wilder(minus_dm, first, period, series=True) / tr
+        total = plus_di + minus_di
+        dx = np.where(total > 0, 100 * np.abs(plus_di - minus_di) / total, 0.0)
+        dx = np.where(np.isnan(total), np.nan, dx)
+        adx_value = _wilder(dx, first + period - 1, period)
+    return (adx_value,
+            _last(plus_di, lengths, period + 1), _last(minus_di, lengths, period + 1))
+
+
+def vwap(high, low, close, volume, lengths, period=20):
+    """
+    Volume-weighted typical price ((h + l + c) / 3) of the last `period`
+    bars (None: the whole history); NaN without volume.
+    """
+    lengths = np.asarray(lengths)
+    if period is None:
+        window, valid = slice(None), lengths > 0
+    elif close.shape[1] < period:
+        return np.full(close.shape[0], np.nan)
+    else:
+        window, valid = slice(-period, None), lengths >= period
+    typical = (high[:, window] + low[:, window] + close[:, window]) / 3
+    weights = volume[:, window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        traded = np.nansum(weights, axis=1)
+        value = np.nansum(typical * weights, axis=1) / traded
+    return np.where(valid & (traded > 0), value, np.nan)
+
+
+def bulk_indicators(bars):
+    """
+    Every indicator with its usual parameters for a BarMatrix (it needs
+    all of BAR_FIELDS).
+
+    Returns:
+        {name: np.ndarray per symbol}, NaN where a history is too short
+    """
+    close, high, low, volume, lengths = bars.close, bars.high, bars.low, bars.volume, bars.lengths
+    values = {
+        "sma20": sma(close, lengths, 20),
+        "sma50": sma(close, lengths, 50),
+        "ema12": ema(close, lengths, 12),
+        "ema26": ema(close, lengths, 26),
+        "rsi": rsi(close, lengths, 14),
+        "atr": atr(high, low, close, lengths, 14),
+        "vwap": vwap(high, low, close, volume, lengths, 20),
+    }
+    values["macd"], values["macd_signal"], values["macd_hist"] = macd(close, lengths)
+    values["bb_middle"], values["bb_upper"], values["bb_lower"] = bollinger(close, lengths, 20)
+    values["adx"], values["plus_di"], values["minus_di"] = adx(high, low, close, lengths, 14)
+    return values
+
+
+if __name__ == "__main__":
+    # Usage: python bulk.py [stocks.json] [symbol ...]
+    import time
+
+    args = sys.argv[1:]
+    data = load_equities(args[0] if args else "stocks.json", "stocks.bars.npz")
+    started = time.perf_counter()
+    bars = BarMatrix.from_equities(data)
+    values = bulk_indicators(bars)
+    elapsed = time.perf_counter() - started
+    print(f"📈 {len(values)} indicators for {len(bars)} symbols × {bars.close.shape[1]} bars in {elapsed:.2f}s")
+    row = {symbol: i for i, symbol in enumerate(bars.symbols)}
+    for symbol in args[1:] or bars.symbols[:3]:
+        if symbol not in row:
+            print(f"❌ Unknown symbol {symbol}")
+            continue
+        i = row[symbol]
+        cells = ", ".join(f"{name}={value[i]:.2f}" for name, value in values.items() if value[i] == value[i])
+        print(f"  {symbol} ({bars.lengths[i]} bars): {cells or 'not enough bars'}")
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+# ------------------ Data Fingerprint ------------------
+def file_fingerprint(path):
+    """
+    (path, mtime_ns, size) of a data file, or None if it does not exist.
+    The parser and snapshot writers replace files atomically, so any
+    rewrite changes the fingerprint.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+def config_key(config):
+    """Hashable, order-independent form of a weights/config dict."""
+    return json.dumps(config, sort_keys=True) if config else None
+
+
+# ------------------ LRU Result Cache ------------------
+class ResultCache:
+    """
+    Bounded LRU cache of screen results for one data file.
+
+    Entries are tied to the data fingerprint they were computed from: a
+    lookup with a different fingerprint drops every entry first, so a
+    rewritten stocks.json / snapshot is never served stale results.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._fingerprint = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check(self, fingerprint):
+        if fingerprint != self._fingerprint:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._fingerprint = fingerprint
+
+    def get(self, fingerprint, key, default=None):
+        with self._lock:
+            self._check(fingerprint)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, fingerprint, key, value):
+        with self._lock:
+            self._check(fingerprint)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, fingerprint, key, compute):
+        """
+        Cached value for `key`, computing and storing it on a miss.
+        Concurrent misses may compute twice; the last result wins.
+        """
+        missing = object()
+        value = self.get(fingerprint, key, missing)
+        if value is missing:
+            value = compute()
+            self.put(fingerprint, key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "data": self._fingerprint,
+            }
@@ -0,0 +1,80 @@
+import csv
+import gzip
+import itertools
+import os
+
+BATCH_SIZE = 1000
+
+
+# ------------------ Output Naming ------------------
+def next_output_path(output_dir, filename):
+    """
+    First free name among output_dir/filename, <base>_1<ext>, <base>_2<ext>, ...
+    found from a single directory listing instead of one stat per candidate.
+    A ".gz" suffix stays outside the counter: day_trade_1.csv.gz.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    existing = set(os.listdir(output_dir))
+
+    stem, gz = (filename[:-3], ".gz") if filename.endswith(".gz") else (filename, "")
+    base, ext = os.path.splitext(stem)
+    candidate = filename
+    counter = 1
+    while candidate in existing:
+        candidate = f"{base}_{counter}{ext}{gz}"
+        counter += 1
+    return os.path.join(output_dir, candidate)
+
+
+# ------------------ Streaming CSV ------------------
+def stream_csv(path, rows, fieldnames, compress=None, batch_size=BATCH_SIZE, extrasaction="raise"):
+    """
+    Write result rows to CSV as they arrive.
+
+    Args:
+        path (str): output file; gzip-compressed when it ends in ".gz"
+        rows: any iterable of dicts, e.g. a generator from the screening loop
+        fieldnames (list): CSV columns, in order
+        compress (bool): force gzip on/off; defaults to the ".gz" suffix
+        batch_size (int): rows handed to the writer at a time
+        extrasaction (str): "raise" or "ignore", as for csv.DictWriter
+
+    Returns:
+        int: number of rows written
+    """
+    if compress is None:
+        compress = path.endswith(".gz")
+    # Written under a temp name and renamed at the end: a failed export
+    # never leaves a truncated CSV behind
+    tmp_path = f"{path}.tmp"
+    if compress:
+        f = gzip.open(tmp_path, "wt", newline="", encoding="utf-8")
+    else:
+        f = open(tmp_path, "w", newline="", encoding="utf-8", buffering=1 << 20)
+
+    count = 0
+    try:
+        with f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction=extrasaction)
+            writer.writeheader()
+            rows = iter(rows)
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+                writer.writerows(batch)
+                count += len(batch)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return count
+
+
+def export_csv(rows, filename, fieldnames, output_dir="output", compress=False, **kwargs):
+    """Stream `rows` to the next free output/<filename> (plus .gz); returns the path."""
+    if compress and not filename.endswith(".gz"):
+        filename += ".gz"
+    path = next_output_path(output_dir, filename)
+    stream_csv(path, rows, fieldnames, compress, **kwargs)
+    return path
@@ -0,0 +1,135 @@
+import numpy as np
+
+from rules import compile_screens, rule_matrix
+from strategies import SCREENS
+
+# ------------------ Score Components ------------------
+# The built-in screens, compiled once from rules.SCREEN_DEFINITIONS: every
+# condition, points value and sort key below comes from those definitions
+SCREEN_RULES = compile_screens()
+
+# Points each screen gives a rule, in rule order
+# (the swing weights are configurable, like strategies.SWING_WEIGHTS)
+WEIGHTS = {
+    name: {rule.name: rule.weight for rule in screen.rules}
+    for name, screen in SCREEN_RULES.items()
+}
+
+# Score components of the swing screen, in rule order
+SWING_COMPONENTS = tuple(WEIGHTS["swing"])
+
+
+# ------------------ Screen Features ------------------
+class ScreenFeatures:
+    """
+    Which score components (rules) of one screen fire for each symbol, as a
+    boolean matrix (symbols × components). A weights vector turns it into
+    the screen's scores with one dot product.
+
+    Attributes:
+        name (str): screen name
+        symbols: symbol of each row
+        flags (np.ndarray): bool, n × len(WEIGHTS[name])
+        valid (np.ndarray): bool, rows the screen scores at all
+    """
+
+    def __init__(self, screen, frame, flags, valid):
+        self.name = screen.name
+        self.symbols = frame.symbols
+        self.flags = flags
+        self.valid = valid
+        self.screen = screen
+        self.frame = frame
+
+    def scores(self, weights=None):
+        """Score of every row; `weights` updates the screen's default points."""
+        return self.flags @ weight_vector(weights, WEIGHTS[self.name])
+
+    def order(self, weights=None, top_k=None):
+        """
+        Listed rows in the screen's ranking order (ties keep universe order),
+        only the best `top_k` if given.
+        """
+        with np.errstate(invalid="ignore"):
+            return self.screen.order(self.frame, self.flags, self.valid, weights, top_k)
+
+
+def weight_vector(weights=None, defaults=WEIGHTS["swing"]):
+    """Component-ordered vector of `defaults` updated with `weights`."""
+    merged = dict(defaults)
+    if weights:
+        merged.update(weights)
+    return np.array([merged[name] for name in defaults], dtype=np.float64)
+
+
+# ------------------ Feature Matrix ------------------
+class FeatureMatrix:
+    """
+    Features of every screen for one snapshot, extracted once. Each screen
+    is then a weighted reduction over its flags, and result rows (with
+    their reason strings) are only built for the rows that are read.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.symbols = matrix.frame.symbols
+        self.screens = {
+            name: ScreenFeatures(screen, matrix.frame, *matrix.flags[name])
+            for name, screen in matrix.screens.items()
+        }
+
+    def __getitem__(self, name):
+        return self.screens[name]
+
+    def __contains__(self, name):
+        return name in self.screens
+
+    def scores(self, name, weights=None):
+        return self.screens[name].scores(weights)
+
+    def rank(self, name, swing_config=None, top_k=None):
+        """
+        Ranked results of a screen, equal to its recommend_* / find_* list
+        (cut to the best `top_k` if given).
+
+        Returns:
+            RankedRows: rows are built from the screen's definition on first
+            access, so reasons are only formatted for displayed rows
+        """
+        return self.matrix.rank(name, swing_config if name == "swing" else None, top_k)
+
+
+def feature_matrix(json_data, read_previous_day_price=False, screens=SCREENS, memo=None):
+    """
+    Evaluate the rules of `screens` for every symbol at once.
+
+    The definitions score exactly like the strategies, so
+    matrix.scores(name)[row] equals the strategy's score for every valid
+    row and matrix.rank(name) equals its ranked list.
+
+    Args:
+        json_data: {symbol: details} dict or snapshot equities
+        read_previous_day_price (bool): price from "ldcp" instead of "c"
+        screens: names from SCREENS to extract
+        memo: indicators.IndicatorMemo; one is created so building rows
+            later does not recompute indicators
+
+    Returns:
+        FeatureMatrix
+    """
+    selected = {name: SCREEN_RULES[name] for name in screens}
+    return FeatureMatrix(rule_matrix(json_data, read_previous_day_price, selected, memo))
+
+
+def swing_features(json_data, read_previous_day_price=False, memo=None):
+    """The swing screen's features (see feature_matrix)."""
+    return feature_matrix(json_data, read_previous_day_price, ("swing",), memo)["swing"]
+
+
+def recommend_day_trade_batch(json_data, read_previous_day_price=False, top_k=None):
+    """
+    Array version of strategies.recommend_day_trade over the whole universe:
+    the same ranking (only the best `top_k` if given) as a RankedRows
+    sequence whose dicts are built on access.
+    """
+    return feature_matrix(json_data, read_previous_day_price, ("day",)).rank("day", top_k=top_k)
@@ -0,0 +1,218 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from bars import FIELDS, Bars, BarStore, merge_bars
+from indicators import IndicatorState, attach, dump_states, load_states
+
+# ------------------ Layout ------------------
+#   <root>/manifest.json      per-symbol last timestamp and bar count, partition
+#                             list, and each symbol's IndicatorState as of its
+#                             last bar and as of the bar before it
+#   <root>/<YYYY-MM-DD>.npz   that day's bars for every symbol (BarStore.save)
+MANIFEST = "manifest.json"
+DAY = 86400
+
+
+def _day(ts):
+    return str(np.datetime64(int(ts) // DAY, "D"))
+
+
+class HistoryStore:
+    """
+    Append-only OHLCV history per symbol, partitioned by bar date.
+
+    `append` keeps only bars newer than what the store already holds for the
+    symbol, so replaying an overlapping capture adds nothing, except that a
+    bar at the symbol's last timestamp replaces it (the still-forming bar of
+    an intraday capture). Only the date
+    partitions that receive bars are rewritten. Per-symbol indicator states
+    are kept in step on every append, so screens can read just the last N
+    bars each indicator window needs and still get full-history values.
+    """
+
+    def __init__(self, root="history"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        path = os.path.join(root, MANIFEST)
+        manifest = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        self.symbols = manifest.get("symbols", {})       # symbol -> {"last_ts", "count"}
+        self.partitions = manifest.get("partitions", [])  # sorted day names
+        self.states = load_states(manifest.get("states", {}))
+        # State before each symbol's last bar, to re-step a revised last bar
+        self.previous = load_states(manifest.get("previous", {}))
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.symbols
+
+    # ------------------ Writing ------------------
+    def append(self, technicals_by_symbol):
+        """
+        Add {symbol: [[ts, o, h, l, c, v], ...]} bars. Bars before a
+        symbol's last stored timestamp are dropped, and repeats within the
+        input keep the later bar. A bar at the last stored timestamp replaces
+        that bar, and the indicator state is re-stepped from the state as of
+        the bar before it.
+
+        Returns:
+            int: number of bars added or replaced
+        """
+        by_day = {}  # day -> {symbol: [bars]}
+        added = 0
+        for symbol, technicals in technicals_by_symbol.items():
+            if isinstance(technicals, Bars):
+                technicals = technicals.tolist()
+            bars = merge_bars([], [bar for bar in technicals if isinstance(bar[0], (int, float))])
+            info = self.symbols.get(symbol)
+            state = self.states.get(symbol)
+            replaced = 0
+            if info is not None:
+                bars = [bar for bar in bars if bar[0] >= info["last_ts"]]
+                if bars and bars[0][0] == info["last_ts"]:
+                    previous = self.previous.get(symbol)
+                    if previous is None:
+                        bars = bars[1:]  # stored without the state to re-step from
+                    else:
+                        state = previous.copy()
+                        replaced = 1
+            if not bars:
+                continue
+
+            if state is None:
+                state = IndicatorState()
+            for bar in bars:
+                by_day.setdefault(_day(bar[0]), {}).setdefault(symbol, []).append(bar)
+            for bar in bars[:-1]:
+                state.update(bar)
+            self.previous[symbol] = state.copy()
+            state.update(bars[-1])
+            self.states[symbol] = state
+            self.symbols[symbol] = {
+                "last_ts": bars[-1][0],
+                "count": (info["count"] if info else 0) + len(bars) - replaced,
+            }
+            added += len(bars)
+
+        for day, new_bars in by_day.items():
+            self._write_partition(day, new_bars)
+        if by_day:
+            self.partitions = sorted(set(self.partitions) | set(by_day))
+            self._write_manifest()
+        return added
+
+    def append_equities(self, equities):
+        """Append the `technicals` of a merged {symbol: details} universe."""
+        return self.append({
+            symbol: details["technicals"]
+            for symbol, details in equities.items()
+            if details.get("technicals")
+        })
+
+    def _write_partition(self, day, new_bars):
+        path = os.path.join(self.root, f"{day}.npz")
+        bars = {}
+        if os.path.exists(path):
+            store = BarStore.load(path)
+            bars = {symbol: store[symbol].tolist() for symbol in store.symbols}
+        for symbol, rows in new_bars.items():
+            merge_bars(bars.setdefault(symbol, []), rows)
+        tmp_path = f"{path}.tmp"
+        BarStore.from_technicals(bars).save(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _write_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": 1,
+                "symbols": self.symbols,
+                "partitions": self.partitions,
+                "states": dump_states(self.states),
+                "previous": dump_states(self.previous),
+            }, f)
+        os.replace(tmp_path, path)
+
+    # ------------------ Reading ------------------
+    def read(self, symbols=None, last=None):
+        """
+        Bars as a BarStore, oldest first.
+
+        Args:
+            symbols: symbols to read (default: all)
+            last (int): keep only each symbol's last `last` bars; partitions
+                are read newest first and reading stops once every symbol
+                has enough
+
+        Returns:
+            BarStore
+        """
+        symbols = [s for s in (symbols if symbols is not None else self.symbols) if s in self.symbols]
+        wanted = {
+            symbol: self.symbols[symbol]["count"] if last is None else min(last, self.symbols[symbol]["count"])
+            for symbol in symbols
+        }
+        chunks = {symbol: [] for symbol in symbols}  # newest partition first
+        have = dict.fromkeys(symbols, 0)
+        pending = {symbol for symbol in symbols if wanted[symbol] > 0}
+
+        for day in reversed(self.partitions):
+            if not pending:
+                break
+            store = BarStore.load(os.path.join(self.root, f"{day}.npz"))
+            for symbol in list(pending):
+                if symbol not in store:
+                    continue
+                bars = store[symbol]
+                chunks[symbol].append(bars)
+                have[symbol] += len(bars)
+                if have[symbol] >= wanted[symbol]:
+                    pending.discard(symbol)
+
+        lengths = []
+        columns = {name: [] for name in FIELDS}
+        for symbol in symbols:
+            parts = chunks[symbol][::-1]
+            n = wanted[symbol]
+            for name in FIELDS:
+                values = np.concatenate([getattr(bars, name) for bars in parts]) if parts else np.zeros(0)
+                columns[name].append(values[len(values) - n:] if n else values[:0])
+            lengths.append(n)
+
+        offsets = np.zeros(len(symbols) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        arrays = [
+            np.concatenate(columns[name]).astype(np.int64 if name == "ts" else np.float64)
+            if symbols else np.zeros(0, dtype=np.int64 if name == "ts" else np.float64)
+            for name in FIELDS
+        ]
+        return BarStore(symbols, offsets, *arrays)
+
+    def attach(self, equities, last=None):
+        """
+        Set each symbol's `technicals` to its last `last` stored bars with its
+        IndicatorState attached, so RSI / SMA / MACD read the full-history
+        state even though only a tail of the bars is loaded.
+        """
+        store = self.read([symbol for symbol in equities if symbol in self.symbols], last)
+        store.attach(equities)
+        attach(equities, {symbol: self.states[symbol] for symbol in store.symbols if symbol in self.states})
+        return equities
+
+
+if __name__ == "__main__":
+    # Usage: python history.py [stocks.json] [history_dir]
+    args = sys.argv[1:]
+    with open(args[0] if args else "stocks.json", "r", encoding="utf-8") as f:
+        equities = json.load(f)
+    store = HistoryStore(args[1] if len(args) > 1 else "history")
+    added = store.append_equities(equities)
+    print(f"✅ Appended {added} new or revised bars for {len(store)} symbols to {store.root}")
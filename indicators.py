@@ -0,0 +1,334 @@
+from collections import deque
+
+import numpy as np
+
+from bars import Bars, padded
+from batch import round2
+
+
+# ------------------ Incremental Indicator State ------------------
+class IndicatorState:
+    """
+    Running RSI / SMA / MACD state for one symbol.
+
+    `update` folds one new bar in with constant work (bounded by the longest
+    window, not by the history length). Readings match calculate_rsi,
+    calculate_sma and calculate_macd run over the full history: the windows
+    are summed in the same order, so values agree to the last bit.
+    """
+
+    def __init__(self, rsi_period=14, sma_periods=(20, 50), macd_periods=(12, 26, 9)):
+        self.rsi_period = int(rsi_period)
+        self.sma_periods = tuple(sma_periods)
+        self.macd_periods = tuple(macd_periods)
+        short, long, signal = self.macd_periods
+
+        self.count = 0
+        self.last_ts = None
+        self.prev_close = None
+        self.avg_gain = 0
+        self.avg_loss = 0
+        self.closes = deque(maxlen=max(self.sma_periods + (short, long)))
+        self.macd_values = deque(maxlen=signal)
+
+    def update(self, bar):
+        """
+        Add one [ts, o, h, l, c, v] bar. Bars not newer than the last one seen
+        are ignored, so replaying an overlapping capture does not double count.
+        """
+        ts, close = bar[0], bar[4]
+        if not isinstance(close, (int, float)):
+            return
+        if self.last_ts is not None and ts is not None and ts <= self.last_ts:
+            return
+        self.last_ts = ts
+
+        # RSI — same Wilder steps as calculate_rsi, one bar at a time
+        n = self.rsi_period
+        o = self.count
+        if o > 0:
+            gain = 0
+            loss = 0
+            diff = close - self.prev_close
+            if diff > 0:
+                gain = diff
+            elif diff < 0:
+                loss = abs(diff)
+
+            if o <= n:
+                self.avg_gain += gain
+                self.avg_loss += loss
+            if o == n:
+                self.avg_gain /= n
+                self.avg_loss /= n
+            if o > n:
+                self.avg_gain = (self.avg_gain * (n - 1) + gain) / n
+                self.avg_loss = (self.avg_loss * (n - 1) + loss) / n
+
+        self.prev_close = close
+        self.count += 1
+        self.closes.append(close)
+
+        # MACD line for this bar, once the long window is full
+        short, long, _ = self.macd_periods
+        if self.count >= max(short, long):
+            window = list(self.closes)
+            short_sma = sum(window[-short:]) / short
+            long_sma = sum(window[-long:]) / long
+            self.macd_values.append(short_sma - long_sma)
+
+    def rsi(self):
+        if self.count < self.rsi_period + 1:
+            return None
+        if self.avg_loss == 0:
+            return 100  # prevent division by zero
+        rs = self.avg_gain / self.avg_loss
+        return 100 - (100 / (1 + rs))
+
+    def sma(self, period):
+        if self.count < period:
+            return None
+        window = list(self.closes)[-period:]
+        return round(sum(window) / len(window), 2)
+
+    def macd_all(self):
+        """(macd, signal, histogram) like strategies.calculate_macd_all."""
+        short, long, signal = self.macd_periods
+        if self.count < max(short, long) + signal or not self.macd_values:
+            return None, None, None
+        macd_last = self.macd_values[-1]
+        signal_avg = sum(self.macd_values) / len(self.macd_values)
+        return round(macd_last, 2), round(signal_avg, 2), round(macd_last - signal_avg, 2)
+
+    def macd(self, mode='M'):
+        index = {'M': 0, 'S': 1, 'H': 2}.get(mode)
+        return None if index is None else self.macd_all()[index]
+
+    def to_dict(self):
+        return {
+            "rsi_period": self.rsi_period,
+            "sma_periods": list(self.sma_periods),
+            "macd_periods": list(self.macd_periods),
+            "count": self.count,
+            "last_ts": self.last_ts,
+            "prev_close": self.prev_close,
+            "avg_gain": self.avg_gain,
+            "avg_loss": self.avg_loss,
+            "closes": list(self.closes),
+            "macd_values": list(self.macd_values),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data["rsi_period"], data["sma_periods"], data["macd_periods"])
+        state.count = data["count"]
+        state.last_ts = data["last_ts"]
+        state.prev_close = data["prev_close"]
+        state.avg_gain = data["avg_gain"]
+        state.avg_loss = data["avg_loss"]
+        state.closes.extend(data["closes"])
+        state.macd_values.extend(data["macd_values"])
+        return state
+
+    def copy(self):
+        return IndicatorState.from_dict(self.to_dict())
+
+
+def state_for(technicals, count):
+    """
+    The IndicatorState attached to `technicals`, if it is in step with the
+    data: it has seen exactly `count` bars, or the data is the tail of a
+    longer history the state has seen (history.HistoryStore reads) and both
+    end on the same bar. Else None.
+    """
+    state = getattr(technicals, "state", None)
+    if state is None:
+        return None
+    if state.count == count:
+        return state
+    if state.count > count and count and state.last_ts == _last_ts(technicals):
+        return state
+    return None
+
+
+class LiveBars(list):
+    """
+    `technicals` list that keeps its IndicatorState in step as bars are
+    appended, so intraday re-screens read indicators without replaying history.
+    """
+
+    def __init__(self, bars=(), state=None):
+        super().__init__(bars)
+        self.state = state
+
+    def append(self, bar):
+        super().append(bar)
+        if self.state is not None:
+            self.state.update(bar)
+
+    def extend(self, bars):
+        for bar in bars:
+            self.append(bar)
+
+
+# ------------------ Tracking a Universe ------------------
+def track(equities, **params):
+    """
+    Build an IndicatorState per symbol (replaying each history once) and
+    attach it to the symbol's technicals. List technicals are wrapped in
+    LiveBars; use append_bar to add new bars afterwards.
+
+    Returns:
+        dict: {symbol: IndicatorState}
+    """
+    states = {}
+    for symbol, details in equities.items():
+        technicals = details.get("technicals")
+        if not technicals:
+            continue
+        state = IndicatorState(**params)
+        if isinstance(technicals, Bars):
+            for ts, close in zip(technicals.ts.tolist(), technicals.close.tolist()):
+                state.update((ts, None, None, None, close))
+        else:
+            for bar in technicals:
+                state.update(bar)
+        states[symbol] = state
+
+    attach(equities, states)
+    return states
+
+
+def attach(equities, states):
+    """Attach previously built or loaded states to the equities' technicals."""
+    snap = getattr(equities, "snapshot", None)
+    if snap is not None:
+        snap.states.update(states)
+        return equities
+
+    for symbol, state in states.items():
+        details = equities.get(symbol)
+        if not details or not details.get("technicals"):
+            continue
+        technicals = details["technicals"]
+        if isinstance(technicals, (Bars, LiveBars)):
+            technicals.state = state
+        else:
+            details["technicals"] = LiveBars(technicals, state)
+    return equities
+
+
+def append_bar(equities, symbol, bar):
+    """Append one bar to a tracked symbol; its state updates in O(1)."""
+    details = equities.setdefault(symbol, {})
+    technicals = details.get("technicals")
+    if not isinstance(technicals, LiveBars):
+        technicals = details["technicals"] = LiveBars(technicals or [], IndicatorState())
+        for existing in technicals:
+            technicals.state.update(existing)
+    technicals.append(bar)
+
+
+def dump_states(states):
+    return {symbol: state.to_dict() for symbol, state in states.items()}
+
+
+def load_states(data):
+    return {symbol: IndicatorState.from_dict(state) for symbol, state in data.items()}
+
+
+# ------------------ Shared Indicator Values ------------------
+def _last_ts(technicals):
+    if not len(technicals):
+        return None
+    if isinstance(technicals, Bars):
+        return int(technicals.ts[-1])
+    return technicals[-1][0]
+
+
+class IndicatorMemo:
+    """
+    Per-screen cache of indicator values keyed by (symbol, last bar
+    timestamp), so strategies run over the same data compute each indicator
+    once. Pass the same memo to every strategy of a screening run.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(symbol, technicals, name):
+        return symbol, _last_ts(technicals), len(technicals), name
+
+    def get(self, symbol, technicals, name, compute):
+        key = self.key(symbol, technicals, name)
+        if key in self._values:
+            self.hits += 1
+            return self._values[key]
+        self.misses += 1
+        value = self._values[key] = compute(technicals)
+        return value
+
+    def prefill_macd(self, equities, short_period=12, long_period=26, signal_period=9, name="macd"):
+        """Compute MACD for every symbol in one batched call and store it."""
+        symbols = [symbol for symbol, details in equities.items() if details.get("technicals")]
+        technicals_list = [equities[symbol].get("technicals") for symbol in symbols]
+        required = max(short_period, long_period) + signal_period
+
+        snap = getattr(equities, "snapshot", None)
+        if snap is not None:
+            closes, _ = snap.bar_store().matrix("close", required)
+            closes = closes[[snap.row[symbol] for symbol in symbols]]
+        else:
+            closes, _ = padded(technicals_list, "close", required)
+
+        lines = macd_matrix(closes, short_period, long_period, signal_period)
+        for i, (symbol, technicals) in enumerate(zip(symbols, technicals_list)):
+            self._values[self.key(symbol, technicals, name)] = tuple(
+                None if value != value else value for value in (line[i] for line in lines)
+            )
+
+
+def macd_matrix(closes, short_period=12, long_period=26, signal_period=9):
+    """
+    MACD for many symbols at once.
+
+    Args:
+        closes (np.ndarray): right-aligned close matrix (symbols × bars),
+            NaN-padded on the left, e.g. from bars.padded or BarStore.matrix
+
+    Returns:
+        (macd, signal, histogram) float lists, rounded to 2 decimals, NaN for
+        rows with fewer than long_period + signal_period closes. Windows are
+        summed left to right like the scalar helper.
+    """
+    n = closes.shape[0]
+    required = max(short_period, long_period) + signal_period
+    if closes.shape[1] < required:
+        return [[np.nan] * n for _ in range(3)]
+
+    tail = closes[:, -required:]
+    valid = ~np.isnan(tail).any(axis=1)
+
+    macd_values = []
+    for i in range(required - signal_period, required):
+        short_sum = np.zeros(n)
+        for k in range(i - short_period + 1, i + 1):
+            short_sum = short_sum + tail[:, k]
+        long_sum = np.zeros(n)
+        for k in range(i - long_period + 1, i + 1):
+            long_sum = long_sum + tail[:, k]
+        macd_values.append(short_sum / short_period - long_sum / long_period)
+
+    signal_sum = np.zeros(n)
+    for values in macd_values:
+        signal_sum = signal_sum + values
+    macd_last = macd_values[-1]
+    signal_avg = signal_sum / signal_period
+
+    lines = []
+    for line in (macd_last, signal_avg, macd_last - signal_avg):
+        lines.append(np.where(valid, round2(np.where(valid, line, 0.0)), np.nan).tolist())
+    return lines
@@ -0,0 +1,96 @@
+import threading
+import time
+
+from cache import file_fingerprint
+
+
+# ------------------ Background Data Loader ------------------
+class DataLoader:
+    """
+    Keeps the dataset in memory and reloads it in a background thread.
+
+    The thread polls the data file and, when it changes, parses a fresh copy
+    off the request path and swaps it in with a single assignment: readers
+    see either the old (data, fingerprint) pair or the new one, never a mix.
+    A file that fails to parse, or changes while being read, is skipped and
+    retried on the next poll, so a half-written file is never served.
+    """
+
+    def __init__(self, resolve_path, load, interval=1.0):
+        """
+        Args:
+            resolve_path: callable returning the file to load right now
+            load: callable(path) returning the parsed dataset
+            interval (float): seconds between file checks
+        """
+        self.resolve_path = resolve_path
+        self.load = load
+        self.interval = interval
+        self.ready = threading.Event()
+        self.version = 0
+        self.loaded_at = None
+        self.load_seconds = None
+        self.error = None
+        self._current = (None, None)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="data-loader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def refresh(self):
+        """Load the data file if it changed since the last load; True if swapped."""
+        path = self.resolve_path()
+        fingerprint = file_fingerprint(path)
+        if fingerprint is None or fingerprint == self._current[1]:
+            return False
+
+        started = time.perf_counter()
+        try:
+            data = self.load(path)
+        except Exception as e:
+            self.error = f"{path}: {e!r}"
+            return False
+        if file_fingerprint(path) != fingerprint:
+            return False  # rewritten while we read it; pick it up next time
+
+        self._current = (data, fingerprint)
+        self.version += 1
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - started
+        self.error = None
+        self.ready.set()
+        return True
+
+    def get(self, timeout=None):
+        """
+        (data, fingerprint) of the current dataset. Waits up to `timeout`
+        seconds for the first load; returns (None, None) if not ready.
+        """
+        self.ready.wait(timeout)
+        return self._current
+
+    def status(self):
+        fingerprint = self._current[1]
+        return {
+            "ready": self.ready.is_set(),
+            "file": fingerprint[0] if fingerprint else None,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "load_seconds": None if self.load_seconds is None else round(self.load_seconds, 4),
+            "error": self.error,
+        }
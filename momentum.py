@@ -0,0 +1,189 @@
+import sys
+
+import numpy as np
+
+from batch import load_columns, price_column, rank_order
+from sectors import group_ranks
+
+# Lookback horizons: (name, feed field with the price that far back, trading bars)
+HORIZONS = (("1w", "p1w", 5), ("1m", "p1m", 21), ("3m", "p3m", 63), ("1y", "p1y", 252))
+SOURCES = ("fields", "bars", "auto")
+
+
+# ------------------ Returns ------------------
+def change(price, past):
+    """% change from `past` to `price`; NaN where either is missing or not positive."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where((price > 0) & (past > 0), (price - past) / past * 100, np.nan)
+
+
+def field_returns(columns, price, horizons=HORIZONS):
+    """
+    {horizon: % change} of every symbol from the feed's past prices
+    (p1w, p1m, …) to `price`.
+    """
+    return {name: change(price, columns[field]) for name, field, _ in horizons}
+
+
+def bar_closes(json_data, symbols, lags):
+    """
+    Close `lag` bars before the last one for every symbol and lag, read
+    straight from the bars (no padded matrix of the whole history).
+
+    Returns:
+        np.ndarray (symbols × len(lags)), NaN where the history is too short
+    """
+    lags = np.asarray(lags, dtype=np.int64)
+    closes = np.full((len(symbols), len(lags)), np.nan)
+    snap = getattr(json_data, "snapshot", None)
+    if snap is not None:
+        # Snapshot rows are the universe rows: one gather over the bar store
+        store = snap.bar_store()
+        starts, ends = store.offsets[:-1], store.offsets[1:]
+        index = ends[:, None] - 1 - lags
+        valid = index >= starts[:, None]
+        if len(store.close):
+            closes = np.where(valid, store.close[np.clip(index, 0, len(store.close) - 1)], np.nan)
+        return closes
+
+    for row, symbol in enumerate(symbols):
+        technicals = json_data[symbol].get("technicals")
+        if not technicals:
+            continue
+        n = len(technicals)
+        fits = lags < n
+        if hasattr(technicals, "close"):  # bars.Bars
+            closes[row, fits] = technicals.close[n - 1 - lags[fits]]
+            continue
+        for j in np.flatnonzero(fits).tolist():
+            bar = technicals[n - 1 - lags[j]]
+            if len(bar) > 4 and isinstance(bar[4], (int, float)):
+                closes[row, j] = bar[4]
+    return closes
+
+
+def bar_returns(json_data, symbols, horizons=HORIZONS):
+    """{horizon: % change} of every symbol from the close `bars` bars back to its last close."""
+    closes = bar_closes(json_data, symbols, [0] + [bars for _, _, bars in horizons])
+    return {name: change(closes[:, 0], closes[:, j + 1]) for j, (name, _, _) in enumerate(horizons)}
+
+
+# ------------------ Ranks ------------------
+def cross_ranks(column):
+    """
+    Percentile rank of every value across the universe (0 = weakest,
+    1 = strongest), ties averaged, NaN where the value is missing.
+    """
+    return group_ranks(np.zeros(len(column), dtype=np.intp), 1, column)
+
+
+def composite(ranks, weights=None):
+    """
+    Weighted mean of each symbol's available horizon ranks (NaN if it has
+    none), e.g. weights={"1m": 2, "3m": 1}; equal weights by default.
+    """
+    total = None
+    weight = None
+    for name, column in ranks.items():
+        w = 1.0 if weights is None else float(weights.get(name, 0))
+        if not w:
+            continue
+        have = ~np.isnan(column)
+        part = np.where(have, column * w, 0.0)
+        total = part if total is None else total + part
+        weight = have * w if weight is None else weight + have * w
+    if total is None:
+        return np.full(len(next(iter(ranks.values()), [])), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(weight > 0, total / weight, np.nan)
+
+
+# ------------------ Momentum ------------------
+class Momentum:
+    """
+    Cross-sectional relative strength of one universe.
+
+    Attributes:
+        symbols: symbol of each row
+        returns: {horizon: % change per row}
+        ranks: {horizon: percentile rank per row across the universe}
+        score (np.ndarray): composite of the ranks, 0 … 1
+    """
+
+    def __init__(self, symbols, returns, weights=None):
+        self.symbols = symbols
+        self.returns = returns
+        self.ranks = {name: cross_ranks(column) for name, column in returns.items()}
+        self.score = composite(self.ranks, weights)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def order(self, top_k=None):
+        """Rows by score, strongest first (ties in universe order); unranked rows last."""
+        rows = np.flatnonzero(~np.isnan(self.score))
+        order = rows[rank_order([self.score[rows]], top_k)]
+        if top_k is None or len(order) < top_k:
+            rest = np.flatnonzero(np.isnan(self.score))
+            order = np.concatenate([order, rest if top_k is None else rest[:top_k - len(order)]])
+        return order
+
+    def row(self, i):
+        """JSON-ready dict of row i."""
+        def value(x):
+            return None if x != x else round(x, 4)
+
+        row = {"symbol": self.symbols[i], "score": value(self.score.item(i))}
+        for name in self.returns:
+            row[f"ret_{name}"] = value(self.returns[name].item(i))
+            row[f"rank_{name}"] = value(self.ranks[name].item(i))
+        return row
+
+    def top(self, top_k=None):
+        return [self.row(i) for i in self.order(top_k).tolist()]
+
+
+def momentum(json_data, read_previous_day_price=False, source="fields", horizons=HORIZONS, weights=None):
+    """
+    Returns over every horizon for the whole universe, ranked across it.
+
+    Args:
+        json_data: {symbol: details} dict or snapshot equities
+        read_previous_day_price (bool): price from "ldcp" instead of "c" (fields source)
+        source (str): "fields" (the feed's p1w / p1m / p3m / p1y against the
+            price), "bars" (the last close against the close 5 / 21 / 63 / 252
+            bars back) or "auto" (fields, gaps filled from the bars)
+        horizons: (name, field, bars) lookbacks
+        weights: {horizon: weight} of the composite score
+
+    Returns:
+        Momentum
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Unknown source {source!r}, expected one of {SOURCES}")
+    symbols, columns = load_columns(json_data, ["c", "ldcp"] + [field for _, field, _ in horizons])
+    if source == "bars":
+        return Momentum(symbols, bar_returns(json_data, symbols, horizons), weights)
+
+    returns = field_returns(columns, price_column(columns, read_previous_day_price), horizons)
+    if source == "auto":
+        from_bars = bar_returns(json_data, symbols, horizons)
+        returns = {name: np.where(np.isnan(column), from_bars[name], column) for name, column in returns.items()}
+    return Momentum(symbols, returns, weights)
+
+
+if __name__ == "__main__":
+    # Usage: python momentum.py [stocks.json] [top] [fields|bars|auto]
+    from bars import load_equities
+
+    args = sys.argv[1:]
+    data = load_equities(args[0] if args else "stocks.json", "stocks.bars.npz")
+    top = int(args[1]) if len(args) > 1 else 20
+    ranking = momentum(data, source=args[2] if len(args) > 2 else "fields")
+    names = [name for name, _, _ in HORIZONS]
+    print(f"🚀 Top {top} of {len(ranking)} symbols by relative strength")
+    print(f"  {'symbol':<10} {'score':>6} " + " ".join(f"{name:>8}" for name in names))
+    for row in ranking.top(top):
+        cells = [f"{row[f'ret_{name}']:>7.1f}%" if row[f"ret_{name}"] is not None else f"{'-':>8}" for name in names]
+        score = f"{row['score']:>6.3f}" if row["score"] is not None else f"{'-':>6}"
+        print(f"  {row['symbol']:<10} {score} {' '.join(cells)}")
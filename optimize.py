@@ -0,0 +1,248 @@
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backtest import check_units, forward_trade, replay
+from bars import BarStore
+from features import SWING_COMPONENTS, swing_features, weight_vector
+from strategies import SWING_WEIGHTS
+
+# Default sweep: 3^4 = 81 configurations around the default weights.
+# pch_positive, rel_vol_high and momentum_month never fire on replayed
+# history (see firing_rates), so sweeping them only repeated every result.
+DEFAULT_GRID = {
+    "rsi_oversold": [1, 2, 3],
+    "trend_bullish": [1, 2, 3],
+    "pivot_support_bounce": [1, 2, 3],
+    "macd_bullish": [0, 1, 2],
+}
+
+METRICS = ("total_return", "avg_return", "hit_rate", "n_trades", "max_drawdown")
+
+
+# ------------------ Configurations ------------------
+def grid(space):
+    """
+    Every combination of the values in `space` ({weight: [values]}), each as
+    a full weights dict (unswept weights keep their SWING_WEIGHTS default).
+    """
+    unknown = set(space) - set(SWING_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown swing weights: {sorted(unknown)}")
+    keys = list(space)
+    return [dict(SWING_WEIGHTS, **dict(zip(keys, values))) for values in itertools.product(*space.values())]
+
+
+# ------------------ Historical Samples ------------------
+def collect(equities, hold=5, every=5, warmup=50, store=None, read_previous_day_price=False):
+    """
+    Replay history once and keep, for every rebalance day, the swing feature
+    flags of the day's candidates (in recommend_swing_trade order) and each
+    candidate's forward return over `hold` bars (NaN if it cannot be traded).
+
+    Returns:
+        list of (flags float64 n × components, returns float64 n)
+    """
+    store = store if store is not None else BarStore.from_equities(equities)
+    days = []
+    for _, universe, next_bar in replay(equities, warmup, every, store):
+        features = swing_features(universe, read_previous_day_price)
+        rows = features.order()
+        returns = np.full(len(rows), np.nan)
+        for k, row in enumerate(rows.tolist()):
+            symbol = features.symbols[row]
+            trade = forward_trade(store, symbol, next_bar[symbol], hold)
+            if trade is not None:
+                returns[k] = trade[3] / trade[1] - 1
+        days.append((features.flags[rows].astype(np.float64), returns))
+    return days
+
+
+def firing_rates(days):
+    """
+    {component: share of the replayed candidates it fires for}. A swept
+    weight whose component never fires cannot change any pick (with the
+    feed's units, e.g. pch_positive needs pch > 2, a 200% daily move).
+    """
+    flags = [day_flags for day_flags, _ in days if len(day_flags)]
+    if not flags:
+        return {name: 0.0 for name in SWING_COMPONENTS}
+    rates = np.vstack(flags).mean(axis=0)
+    return {name: rates.item(i) for i, name in enumerate(SWING_COMPONENTS)}
+
+
+def active_space(space, rates):
+    """
+    `space` without the weights whose component never fires (rate 0): every
+    value of such a weight gives the same picks, so it keeps its default.
+    """
+    return {name: values for name, values in space.items() if rates.get(name, 0) > 0}
+
+
+# ------------------ Scoring ------------------
+def evaluate(weights, days, top_n=10):
+    """
+    Backtest metrics for many weight vectors at once.
+
+    Each day's scores for every configuration are one matrix product
+    (candidates × components @ components × configs). Picks are the top_n by
+    score with ties in swing order, the same as backtest(..., by_score=True).
+
+    Args:
+        weights (np.ndarray): configs × len(SWING_COMPONENTS)
+        days: output of collect()
+
+    Returns:
+        dict: metric name -> np.ndarray with one value per configuration
+    """
+    k = len(weights)
+    total = np.zeros(k)
+    trades = np.zeros(k)
+    hits = np.zeros(k)
+    curve = np.ones(k)
+    peak = np.ones(k)
+    drawdown = np.zeros(k)
+
+    for flags, returns in days:
+        if not len(returns):
+            continue
+        scores = flags @ weights.T                                   # n × k
+        picks = np.argsort(-scores, axis=0, kind="stable")[:top_n]   # top_n × k
+        picked = returns[picks]
+        valid = ~np.isnan(picked)
+        count = valid.sum(axis=0)
+        sums = np.where(valid, picked, 0.0).sum(axis=0)
+
+        total += sums
+        trades += count
+        hits += (np.where(valid, picked, 0.0) > 0).sum(axis=0)
+        traded = count > 0
+        curve = np.where(traded, curve * (1 + np.where(traded, sums / np.maximum(count, 1), 0.0)), curve)
+        peak = np.maximum(peak, curve)
+        drawdown = np.maximum(drawdown, 1 - curve / peak)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "total_return": curve - 1,
+            "avg_return": np.where(trades > 0, total / trades, np.nan),
+            "hit_rate": np.where(trades > 0, hits / trades, np.nan),
+            "n_trades": trades.astype(np.int64),
+            "max_drawdown": drawdown,
+        }
+
+
+_worker = {}
+
+
+def _init_worker(days, top_n):
+    _worker["days"] = days
+    _worker["top_n"] = top_n
+
+
+def _evaluate_chunk(weights):
+    return evaluate(weights, _worker["days"], _worker["top_n"])
+
+
+# ------------------ Sweep ------------------
+def sweep(equities, space=None, top_n=10, hold=5, every=None, warmup=50, workers=None,
+          rank_by="total_return", chunk_size=256, read_previous_day_price=False, store=None, rates=None):
+    """
+    Grid-search swing weights against history.
+
+    Features and forward returns are extracted once (collect); each
+    configuration is then only a dot product per day. Configuration chunks
+    are spread over a process pool.
+
+    Args:
+        equities: {symbol: details} with technicals
+        space: {weight: [values]}; defaults to DEFAULT_GRID
+        top_n, hold, every, warmup: as for backtest (every defaults to hold)
+        workers (int): processes; 1 evaluates in-process
+        rank_by (str): metric the table is sorted on (descending)
+        rates (dict): filled with firing_rates() of the replayed days
+
+    Returns:
+        list of dicts, best configuration first: rank, swept weights, metrics.
+        Weights that never fire are not swept (see active_space) and have
+        no column.
+    """
+    space = space or DEFAULT_GRID
+    grid(space)  # reject unknown weights before the replay
+    days = collect(equities, hold, every or hold, warmup, store, read_previous_day_price)
+    replayed = firing_rates(days)
+    if rates is not None:
+        rates.update(replayed)
+    space = active_space(space, replayed)
+    configs = grid(space)
+    weights = np.array([weight_vector(config) for config in configs])
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [weights[i:i + chunk_size] for i in range(0, len(weights), chunk_size)]
+    if workers == 1 or len(chunks) == 1:
+        parts = [evaluate(chunk, days, top_n) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(days, top_n)) as pool:
+            parts = list(pool.map(_evaluate_chunk, chunks))
+    metrics = {name: np.concatenate([part[name] for part in parts]) for name in METRICS}
+
+    key = np.nan_to_num(metrics[rank_by], nan=-np.inf)
+    order = np.argsort(-key, kind="stable")
+    table = []
+    for rank, i in enumerate(order.tolist(), start=1):
+        row = {"rank": rank}
+        row.update({name: configs[i][name] for name in space})
+        row.update({name: metrics[name][i].item() for name in METRICS})
+        table.append(row)
+    return table
+
+
+def print_table(table, limit=20):
+    if not table:
+        print("No configurations")
+        return
+    weight_names = [name for name in table[0] if name in SWING_COMPONENTS]
+    header = ["rank"] + weight_names + ["total %", "avg %", "hit %", "trades", "max dd %"]
+    print("  ".join(f"{h:>8}" for h in header))
+    for row in table[:limit]:
+        cells = [row["rank"]] + [row[name] for name in weight_names] + [
+            f"{row['total_return'] * 100:.2f}",
+            f"{row['avg_return'] * 100:.2f}" if row["avg_return"] == row["avg_return"] else "-",
+            f"{row['hit_rate'] * 100:.1f}" if row["hit_rate"] == row["hit_rate"] else "-",
+            row["n_trades"],
+            f"{row['max_drawdown'] * 100:.2f}",
+        ]
+        print("  ".join(f"{c:>8}" for c in cells))
+
+
+if __name__ == "__main__":
+    # Usage: python optimize.py [top_n] [hold] [workers]
+    from bars import load_equities
+    from export import export_csv
+
+    args = sys.argv[1:]
+    data = load_equities("stocks.json", "stocks.bars.npz")
+    store = BarStore.from_equities(data)
+    # Weights tuned on replayed quotes are only meaningful in the feed's units
+    units = check_units(data, store)
+    if not all(row["ok"] for row in units.values()):
+        print(f"❌ Replayed quote fields do not match the feed's units: {units}")
+        sys.exit(1)
+
+    rates = {}
+    table = sweep(
+        data,
+        top_n=int(args[0]) if args else 10,
+        hold=int(args[1]) if len(args) > 1 else 5,
+        workers=int(args[2]) if len(args) > 2 else None,
+        store=store,
+        rates=rates,
+    )
+    print_table(table)
+    idle = [name for name in SWING_COMPONENTS if rates[name] == 0]
+    if idle:
+        print(f"\n⚠️ Never fire on the replayed days, so their weights were not swept: {', '.join(idle)}")
+    path = export_csv(table, "swing_weights.csv", list(table[0].keys()))
+    print(f"\n✅ Ranked configurations saved to {path}")
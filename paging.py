@@ -0,0 +1,96 @@
+import operator
+import re
+
+# ------------------ Result Filtering ------------------
+COMPARATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "!=": operator.ne,
+    "=": operator.eq,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+_FILTER = re.compile(r"^\s*([^<>=!\s]+)\s*(>=|<=|!=|=|>|<)\s*(.*?)\s*$")
+
+
+def parse_filter(text, fields=None):
+    """
+    Parse "field<op>value" (e.g. "roe>15", "near_level=S1") into
+    (field, op, value). Numeric values are compared as numbers.
+
+    Args:
+        text (str): filter expression
+        fields: columns the field must be one of (any field if None)
+
+    Raises:
+        ValueError: if the text is not a filter expression or names an
+            unknown field
+    """
+    match = _FILTER.match(text)
+    if not match:
+        raise ValueError(f"Invalid filter: {text!r}")
+    field, op, value = match.groups()
+    if fields is not None and field not in fields:
+        raise ValueError(f"Unknown filter field {field!r}")
+    try:
+        value = float(value)
+    except ValueError:
+        pass
+    return field, op, value
+
+
+def _matches(row, field, op, value):
+    cell = row.get(field)
+    if cell is None:
+        return False
+    if isinstance(value, float):
+        if not isinstance(cell, (int, float)):
+            return False
+    else:
+        cell = str(cell)
+    return COMPARATORS[op](cell, value)
+
+
+def _text(value):
+    if isinstance(value, (list, tuple)):
+        return "; ".join(str(v) for v in value)
+    return "" if value is None else str(value)
+
+
+def _sort_value(value):
+    # Numbers before text; None rows are kept apart and always go last
+    if isinstance(value, (int, float)):
+        return 0, value, ""
+    return 1, 0, _text(value).lower()
+
+
+# ------------------ Query ------------------
+def filter_rows(results, search=None, filters=()):
+    """
+    Rows of `results` matching a free-text `search` (case-insensitive,
+    any column) and every (field, op, value) in `filters`.
+    """
+    rows = results
+    if filters:
+        rows = [row for row in rows if all(_matches(row, *f) for f in filters)]
+    if search:
+        needle = search.lower()
+        rows = [row for row in rows if any(needle in _text(v).lower() for v in row.values())]
+    return rows
+
+
+def sort_rows(rows, column=None, descending=False):
+    """Rows ordered by `column`; without one, the ranked order is kept."""
+    if not column:
+        return rows
+    present = [row for row in rows if row.get(column) is not None]
+    missing = [row for row in rows if row.get(column) is None]
+    present.sort(key=lambda row: _sort_value(row[column]), reverse=descending)
+    return present + missing
+
+
+def page(rows, offset=0, limit=None):
+    """The `limit` rows starting at `offset` (all remaining if limit is None)."""
+    offset = max(0, offset)
+    return rows[offset:] if limit is None or limit < 0 else rows[offset:offset + limit]
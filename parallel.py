@@ -0,0 +1,144 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import snapshot
+from bars import FIELDS, BarStore
+from strategies import SCREENS, SORT_KEYS, run_all_screens
+
+ALIGN = 64
+
+
+# ------------------ Shared Bar Store ------------------
+def share_bar_store(store):
+    """
+    Copy a BarStore's arrays into one shared memory block.
+
+    Returns:
+        (shm, layout) — keep `shm` alive while workers use it, then close()
+        and unlink() it. `layout` is what attach_bar_store needs.
+    """
+    arrays = [("offsets", np.asarray(store.offsets, dtype=np.int64))]
+    arrays += [(name, np.ascontiguousarray(getattr(store, name))) for name in FIELDS]
+
+    sections = {}
+    position = 0
+    for name, array in arrays:
+        sections[name] = (position, str(array.dtype), array.shape)
+        position = (position + array.nbytes + ALIGN - 1) // ALIGN * ALIGN
+
+    shm = shared_memory.SharedMemory(create=True, size=max(position, 1))
+    for name, array in arrays:
+        offset, dtype, shape = sections[name]
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)[...] = array
+
+    layout = {"name": shm.name, "symbols": store.symbols, "sections": sections}
+    return shm, layout
+
+
+def attach_bar_store(layout):
+    """Map a shared bar store in another process; returns (shm, BarStore)."""
+    shm = shared_memory.SharedMemory(name=layout["name"])
+    arrays = {
+        name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        for name, (offset, dtype, shape) in layout["sections"].items()
+    }
+    store = BarStore(layout["symbols"], arrays["offsets"], *(arrays[name] for name in FIELDS))
+    return shm, store
+
+
+# ------------------ Worker Side ------------------
+_worker = {}
+
+
+def _init_worker(layout, snapshot_path):
+    # Runs once per worker process: map the bars, never unpickle them
+    if snapshot_path is not None:
+        _worker["equities"] = snapshot.load(snapshot_path)
+    else:
+        _worker["shm"], _worker["store"] = attach_bar_store(layout)
+
+
+def _screen_shard(shard, screens, read_previous_day_price, swing_config, top_k):
+    if "equities" in _worker:
+        equities = _worker["equities"]
+        start, end = shard
+        shard = {symbol: equities[symbol] for symbol in equities.snapshot.symbols[start:end]}
+    else:
+        store = _worker["store"]
+        for symbol, details in shard.items():
+            if symbol in store:
+                details["technicals"] = store[symbol]
+    return run_all_screens(shard, read_previous_day_price, swing_config, screens=screens, top_k=top_k)
+
+
+# ------------------ Parallel Screening ------------------
+def run_all_screens_parallel(json_data, workers=None, read_previous_day_price=False,
+                             swing_config=None, screens=SCREENS, shards_per_worker=4, top_k=None):
+    """
+    run_all_screens across a process pool.
+
+    The universe is cut into contiguous shards. Workers read OHLCV bars from
+    shared memory (or map the snapshot file directly) instead of receiving
+    pickled bar lists; only the small per-symbol fields are sent. Each
+    shard's ranked lists are merged back with heapq.merge, which keeps ties
+    in input order, so the output equals run_all_screens'.
+
+    Args:
+        json_data: {symbol: details} dict or snapshot equities
+        workers (int): pool size, defaults to os.cpu_count()
+        shards_per_worker (int): shards per worker, for load balancing
+        top_k (int): keep only the best top_k rows of each screen; each
+            shard then sends back at most top_k rows per screen
+
+    Returns:
+        dict: {screen name: sorted result list}
+    """
+    workers = workers or os.cpu_count() or 1
+    if top_k is not None:
+        top_k = max(top_k, 0)
+    symbols = list(json_data)
+    n_shards = max(1, min(len(symbols), workers * shards_per_worker))
+    bounds = [len(symbols) * i // n_shards for i in range(n_shards + 1)]
+
+    snap = getattr(json_data, "snapshot", None)
+    shm = None
+    if snap is not None:
+        layout, snapshot_path = None, snap.path
+        shards = list(zip(bounds[:-1], bounds[1:]))
+    else:
+        shm, layout = share_bar_store(BarStore.from_equities(json_data))
+        snapshot_path = None
+        shards = [
+            {
+                symbol: {key: value for key, value in json_data[symbol].items() if key != "technicals"}
+                for symbol in symbols[start:end]
+            }
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(layout, snapshot_path)) as pool:
+            futures = [
+                pool.submit(_screen_shard, shard, screens, read_previous_day_price, swing_config, top_k)
+                for shard in shards
+            ]
+            parts = [future.result() for future in futures]
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    return {
+        name: list(islice(heapq.merge(*(part[name] for part in parts), key=SORT_KEYS[name], reverse=True), top_k))
+        for name in screens
+    }
+
+
+def screen_parallel(name, json_data, workers=None, **kwargs):
+    """One screen ("day", "swing", ...) in parallel; returns its sorted list."""
+    return run_all_screens_parallel(json_data, workers, screens=(name,), **kwargs)[name]
@@ -1,60 +1,531 @@
+import bz2
+import glob
+import gzip
+import io
 import json
+import lzma
 import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 
-def extract_and_merge(har_file, output_file="stocks.json"):
-    # Load HAR file
-    with open(har_file, "r", encoding="utf-8") as f:
-        har_data = json.load(f)
+try:
+    import py7zr
+    from py7zr.io import Py7zIO, WriterFactory
+except ImportError:  # optional: only needed for .7z captures
+    py7zr = None
+    Py7zIO = WriterFactory = object
 
-    merged_data = {}
+from bars import BarStore, merge_bars
+from history import HistoryStore
+
+CHUNK_SIZE = 1 << 20  # 1 MB of text per read
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+# ------------------ Streaming JSON Reader ------------------
+class _JSONStream:
+    """
+    Incremental reader over a text file that decodes one JSON value at a time.
+    Only the current value (e.g. one HAR entry) plus one chunk of text is held
+    in memory, so peak memory does not grow with the file size.
+    """
+
+    def __init__(self, fp, chunk_size=CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        chunk = self.fp.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next significant character ('' at EOF)."""
+        while True:
+            buf, pos = self.buf, self.pos
+            n = len(buf)
+            while pos < n and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < n:
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"Malformed JSON: expected one of {chars!r}, got {c!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        """Decode the next complete JSON value, reading more text as needed."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Value runs past the buffer: read more (doubling) and retry
+                if self.eof or not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # A bare number/literal ending exactly at the buffer edge may be cut short
+            if end == len(self.buf) and not isinstance(value, (dict, list, str)) and not self.eof:
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_json_items(fp, path, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of the array found at `path` one at a time.
+
+    Args:
+        fp: text file object positioned at the start of a JSON document
+        path (tuple): object keys leading to the array, e.g. ("log", "entries")
+        chunk_size (int): characters read per refill
+
+    Sibling values met on the way (e.g. "log.pages") are decoded and discarded.
+    Nothing is yielded if a key on the path is missing.
+    """
+    stream = _JSONStream(fp, chunk_size)
+
+    for key in path:
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            name = stream.value()
+            stream.expect(":")
+            if name == key:
+                break
+            stream.value()
+            if stream.expect(",}") == "}":
+                return
+
+    if stream.expect("[") and stream.peek() == "]":
+        return
+    while True:
+        yield stream.value()
+        if stream.expect(",]") == "]":
+            return
+
+
+def iter_har_entries(fp, chunk_size=CHUNK_SIZE):
+    """Yield `log.entries` of a HAR file one entry at a time."""
+    return iter_json_items(fp, ("log", "entries"), chunk_size)
+
+
+# ------------------ Merge Logic ------------------
+def merge_payload(merged_data, request_url, json_data):
+    # ------------------ Case 1: /req → Fundamentals or Metrics ------------------
+    if request_url.endswith("/req"):
+        # Case 1a: data -> eq (symbols as keys)
+        if isinstance(json_data.get("data"), dict) and "eq" in json_data["data"]:
+            for symbol, info in json_data["data"]["eq"].items():
+                merged_data.setdefault(symbol, {}).update(info)
+
+        # Case 1b: data is a list of metrics
+        elif isinstance(json_data.get("data"), list):
+            for item in json_data["data"]:
+                symbol = item.get("symbol")
+                name = item.get("name")
+                value = item.get("value")
+                if symbol and name:
+                    merged_data.setdefault(symbol, {})[name] = value
+
+    # ------------------ Case 2: /rq → Technical data ------------------
+    elif request_url.endswith("/rq"):
+        # Example:
+        # {
+        #   "AASM": [
+        #       [1733914800, 7.14, 7.23, 7.14, 7.2, 5915],
+        #       [1734001200, 7.47, 7.47, 7.06, 7.07, 1231]
+        #   ]
+        # }
+        if isinstance(json_data, dict):
+            for symbol, tech_data in json_data['data'].items():
+                if isinstance(tech_data, list) and all(isinstance(x, list) for x in tech_data):
+                    # Overlapping captures repeat bars: keep one per timestamp
+                    merge_bars(merged_data.setdefault(symbol, {}).setdefault("technicals", []), tech_data)
+
+
+def merge_entry(merged_data, entry):
+    """Merge one HAR entry; bodies are only decoded for /req and /rq URLs."""
+    request_url = entry.get("request", {}).get("url", "")
+    if not (request_url.endswith("/req") or request_url.endswith("/rq")):
+        return
+
+    response_content = entry.get("response", {}).get("content", {})
+    text = response_content.get("text", "")
+    if not text:
+        return
+
+    try:
+        json_data = json.loads(text)
+    except Exception:
+        return
+
+    merge_payload(merged_data, request_url, json_data)
+
+
+def merge_capture(merged_data, capture_data):
+    """
+    Fold one capture's merged symbols into `merged_data`: its fields
+    overwrite older values and its bars win over bars with the same
+    timestamp.
+    """
+    for symbol, details in capture_data.items():
+        target = merged_data.setdefault(symbol, {})
+        for key, value in details.items():
+            if key == "technicals":
+                merge_bars(target.setdefault("technicals", []), value)
+            else:
+                target[key] = value
+
+
+# ------------------ Capture Files ------------------
+# Plain HARs plus their compressed forms; every *.har inside a .7z is a capture
+HAR_SUFFIXES = (".har", ".har.gz", ".har.bz2", ".har.xz", ".7z")
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def _require_py7zr():
+    if py7zr is None:
+        raise ImportError(".7z captures need py7zr: pip install py7zr")
+
+
+class _MemberPipe(io.RawIOBase):
+    """Readable end of one archive member, fed chunk by chunk as py7zr decompresses it."""
+
+    def __init__(self, maxsize=16):
+        self.chunks = queue.Queue(maxsize)
+        self.pending = b""
+        self.done = False
+        self.cancelled = False
+
+    def readable(self):
+        return True
+
+    def cancel(self):
+        # Reader is gone: flag the pipe and empty the queue so a writer
+        # blocked on a full queue wakes up and sees the flag
+        self.cancelled = True
+        while True:
+            try:
+                self.chunks.get_nowait()
+            except queue.Empty:
+                break
+
+    def readinto(self, buffer):
+        while not self.pending and not self.done:
+            chunk = self.chunks.get()
+            if chunk is None:
+                self.done = True
+            elif isinstance(chunk, BaseException):
+                raise chunk
+            else:
+                self.pending = chunk
+        n = min(len(buffer), len(self.pending))
+        buffer[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+
+class _PipeCancelled(Exception):
+    """Raised in the extraction thread once the reader has stopped."""
+
+
+class _PipeWriter(Py7zIO):
+    """py7zr's side of a _MemberPipe (None when the member is skipped)."""
+
+    def __init__(self, pipe):
+        self.pipe = pipe
+        self.length = 0
+
+    def write(self, s):
+        if self.pipe is not None:
+            if self.pipe.cancelled:
+                raise _PipeCancelled()
+            self.pipe.chunks.put(bytes(s))
+        self.length += len(s)
+        return len(s)
 
-    for entry in har_data.get("log", {}).get("entries", []):
-        request_url = entry.get("request", {}).get("url", "")
-        response_content = entry.get("response", {}).get("content", {})
-        text = response_content.get("text", "")
-        if not text:
-            continue
+    def read(self, size=None):
+        return b""
 
+    def seek(self, offset, whence=0):
+        return 0
+
+    def flush(self):
+        pass
+
+    def size(self):
+        return self.length
+
+    def close(self):
+        if self.pipe is not None:
+            self.pipe.chunks.put(None)
+            self.pipe = None
+
+
+class _PipeFactory(WriterFactory):
+    """Hands each *.har member to the reader as a _MemberPipe as soon as it starts."""
+
+    def __init__(self, members):
+        self.members = members
+        self.current = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        if self.current is not None:
+            self.current.cancel()
+
+    def create(self, filename):
+        if self.cancelled:
+            raise _PipeCancelled()
+        if not filename.endswith(".har"):
+            return _PipeWriter(None)
+        self.current = _MemberPipe()
+        if self.cancelled:  # cancel() may have missed the new pipe
+            self.current.cancel()
+        self.members.put((filename, self.current))
+        return _PipeWriter(self.current)
+
+
+def _iter_7z_captures(path):
+    # py7zr pushes decompressed bytes into writers; a producer thread runs the
+    # extraction while each member is parsed from its pipe, so no member is
+    # ever held whole in memory or written to disk
+    _require_py7zr()
+    members = queue.Queue()
+    factory = _PipeFactory(members)
+
+    def produce():
         try:
-            json_data = json.loads(text)
-        except Exception:
-            continue
-
-        # ------------------ Case 1: /req → Fundamentals or Metrics ------------------
-        if request_url.endswith("/req"):
-            # Case 1a: data -> eq (symbols as keys)
-            if isinstance(json_data.get("data"), dict) and "eq" in json_data["data"]:
-                for symbol, info in json_data["data"]["eq"].items():
-                    merged_data.setdefault(symbol, {}).update(info)
-
-            # Case 1b: data is a list of metrics
-            elif isinstance(json_data.get("data"), list):
-                for item in json_data["data"]:
-                    symbol = item.get("symbol")
-                    name = item.get("name")
-                    value = item.get("value")
-                    if symbol and name:
-                        merged_data.setdefault(symbol, {})[name] = value
-
-        # ------------------ Case 2: /rq → Technical data ------------------
-        elif request_url.endswith("/rq"):
-            # Example:
-            # {
-            #   "AASM": [
-            #       [1733914800, 7.14, 7.23, 7.14, 7.2, 5915],
-            #       [1734001200, 7.47, 7.47, 7.06, 7.07, 1231]
-            #   ]
-            # }
-            if isinstance(json_data, dict):
-                for symbol, tech_data in json_data['data'].items():
-                    if isinstance(tech_data, list) and all(isinstance(x, list) for x in tech_data):
-                        merged_data.setdefault(symbol, {}).setdefault("technicals", []).extend(tech_data)
-
-    # Save merged output
-    with open(output_file, "w", encoding="utf-8") as out_file:
-        json.dump(merged_data, out_file, indent=4, ensure_ascii=False)
+            with py7zr.SevenZipFile(path) as archive:
+                names = [name for name in archive.getnames() if name.endswith(".har")]
+                if names:
+                    archive.extract(targets=names, factory=factory)
+        except BaseException as e:
+            if factory.cancelled:
+                return  # the reader stopped us; nobody is waiting for the error
+            if factory.current is not None:
+                factory.current.chunks.put(e)
+            members.put(e)
+        else:
+            members.put(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = members.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            name, pipe = item
+            yield f"{path}:{name}", io.TextIOWrapper(io.BufferedReader(pipe, CHUNK_SIZE), encoding="utf-8")
+            # Drain what the parser did not read, so the producer can go on
+            while pipe.read(CHUNK_SIZE):
+                pass
+    finally:
+        # Stopped early or the parse failed: unblock the producer's pending
+        # write so the extraction aborts, then wait for the thread
+        if producer.is_alive():
+            factory.cancel()
+        producer.join()
+
+
+def iter_captures(path):
+    """
+    Yield (name, text stream) for each HAR capture in `path`: a .har file,
+    a gzip / bz2 / xz compressed one (decompressed as it is read) or every
+    *.har member of a .7z archive.
+    """
+    if path.endswith(".7z"):
+        yield from _iter_7z_captures(path)
+        return
+    opener = next((opener for suffix, opener in OPENERS.items() if path.endswith(suffix)), open)
+    with opener(path, "rt", encoding="utf-8") as f:
+        yield path, f
+
+
+def har_paths(sources):
+    """
+    Capture files named by `sources`: a path, directory (its files ending in
+    HAR_SUFFIXES) or glob pattern, or a list of those. Sorted, without repeats.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.endswith(HAR_SUFFIXES) and os.path.isfile(os.path.join(source, name))
+            )
+        elif glob.has_magic(source):
+            paths.extend(path for path in glob.glob(source) if os.path.isfile(path))
+        else:
+            paths.append(source)
+    return sorted(set(paths))
+
+
+# ------------------ Batch Ingestion ------------------
+def _entry_time(entry):
+    started = entry.get("startedDateTime")
+    if not started:
+        return None
+    try:
+        return datetime.fromisoformat(started.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_capture(fp):
+    """
+    Merge the entries of one HAR stream.
+
+    Returns:
+        (merged_data, capture time): the time is that of the latest entry
+        (startedDateTime, epoch seconds), or None if no entry has one
+    """
+    merged_data = {}
+    latest = None
+    for entry in iter_har_entries(fp):
+        merge_entry(merged_data, entry)
+        started = _entry_time(entry)
+        if started is not None and (latest is None or started > latest):
+            latest = started
+    return merged_data, latest
+
+
+def _parse_file(path):
+    # One capture file (several for a .7z) → [(time, path, member, name, merged_data)]
+    captures = []
+    for member, (name, fp) in enumerate(iter_captures(path)):
+        merged_data, latest = parse_capture(fp)
+        captures.append((latest if latest is not None else os.path.getmtime(path), path, member, name, merged_data))
+    return captures
+
+
+def ingest(sources, output_file="stocks.json", bars_file=None, history_dir=None, workers=None):
+    """
+    Merge many HAR captures (see har_paths / iter_captures) into `output_file`.
+
+    Files are parsed in parallel worker processes. The per-capture results
+    are then merged in capture-time order (latest entry time, then path and
+    archive order), so a capture's values win over those of every earlier
+    capture: last write wins, whatever order the workers finish in.
+
+    Args:
+        sources: directory, glob pattern, file path, or a list of those
+        output_file, bars_file, history_dir: as for extract_and_merge
+        workers (int): worker processes, defaults to os.cpu_count();
+            1 parses in-process
+
+    Returns:
+        dict: the merged {symbol: details}
+    """
+    started = time.perf_counter()
+    paths = har_paths(sources)
+    if not paths:
+        raise FileNotFoundError(f"No HAR captures found in {sources!r}")
+
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers == 1:
+        parts = [_parse_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(_parse_file, paths))
+
+    captures = sorted((capture for part in parts for capture in part), key=lambda c: c[:3])
+    merged_data = {}
+    for capture in captures:
+        merge_capture(merged_data, capture[4])
+
+    elapsed = time.perf_counter() - started
+    size_mb = sum(os.path.getsize(path) for path in paths) / (1024 * 1024)
+    save_merged(merged_data, output_file, bars_file, history_dir)
+    print(f"Ingested {len(captures)} captures from {len(paths)} files ({size_mb:.1f} MB on disk) "
+          f"in {elapsed:.2f}s with {workers} worker(s)")
+    return merged_data
+
+
+def extract_and_merge(har_file, output_file="stocks.json", bars_file=None, history_dir=None):
+    """
+    Merge a HAR capture into `output_file`. When `bars_file` is given, the
+    technicals go to a binary bars.BarStore there instead of the JSON.
+    When `history_dir` is given, bars newer than what the history.HistoryStore
+    there already holds are appended to it (a revised last bar replaces the
+    stored one). Compressed captures are read as
+    by iter_captures.
+    """
+    started = time.perf_counter()
+    merged_data = {}
+
+    # Stream the HAR file entry by entry instead of loading it whole
+    for _, f in iter_captures(har_file):
+        for entry in iter_har_entries(f):
+            merge_entry(merged_data, entry)
+
+    elapsed = time.perf_counter() - started
+    size_mb = os.path.getsize(har_file) / (1024 * 1024)
+
+    save_merged(merged_data, output_file, bars_file, history_dir)
+    print(f"Parsed {size_mb:.1f} MB in {elapsed:.2f}s ({size_mb / max(elapsed, 1e-9):.1f} MB/s)")
+    return merged_data
+
+
+def save_merged(merged_data, output_file="stocks.json", bars_file=None, history_dir=None):
+    """Write merged symbols to `output_file` (bars to `bars_file` / `history_dir` if given)."""
+    output = merged_data
+    if bars_file:
+        BarStore.from_equities(merged_data).save(bars_file)
+        output = {
+            symbol: {k: v for k, v in details.items() if k != "technicals"}
+            for symbol, details in merged_data.items()
+        }
+        print(f"Bars saved to {bars_file}")
+
+    # Write to a temp file and swap it in, so readers never see a partial file
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as out_file:
+        json.dump(output, out_file, indent=4, ensure_ascii=False)
+    os.replace(tmp_file, output_file)
+
+    if history_dir:
+        added = HistoryStore(history_dir).append_equities(merged_data)
+        print(f"Appended {added} new or revised bars to {history_dir}")
 
     print(f"Merged data saved to {output_file}")
 
 # Example usage
-extract_and_merge("research.akdtrade.biz.har")
+if __name__ == "__main__":
+    # Usage: python parser.py [har file | directory | glob ...]
+    sources = sys.argv[1:]
+    if len(sources) == 1 and os.path.isfile(sources[0]):
+        extract_and_merge(sources[0])
+    elif sources:
+        ingest(sources)
+    else:
+        extract_and_merge("research.akdtrade.biz.har")
@@ -0,0 +1,911 @@
+import json
+import string
+import sys
+
+import numpy as np
+
+import bulk
+from batch import PIVOT_LEVELS, RankedRows, _filled, load_columns, nearest_pivot, price_column, rank_order, round2
+from indicators import IndicatorMemo
+from momentum import HORIZONS, change, composite, cross_ranks
+from schema import COLUMNS_FILE, load_schema
+from sectors import sector_index
+from strategies import FAIR_PE, SymbolContext, calculate_pch, calculate_sma
+
+# ------------------ Rule Format ------------------
+# A screen is a plain (JSON-compatible) dict:
+#   filter:   conditions a symbol must meet to be scored at all
+#   rules:    [{name, field, op, threshold, weight, reason, group, and}, ...]
+#             a rule fires when its condition and every "and" condition hold;
+#             within a group only the first firing rule counts (if / elif)
+#   list_if:  conditions on the total "score" a row needs to be listed
+#   sort:     [{field, round, desc, default}, ...] most significant first;
+#             a missing or zero value sorts as `default` (0)
+#   columns:  [[output key, field, default, digits], ...] layout of a result row
+#   reasons:  "list" or "text" ("; "-joined) to add the reasons of fired rules
+#   extra_fields: keys outside columns.json the data may carry
+#
+# A condition is {field, op, threshold} plus optional flags:
+#   nonzero: the value must also be truthy, like `x and x < 2`
+#   default: value used when the field is missing, like details.get(x, 0)
+# `threshold` is a number, [low, high] for "between" (exclusive unless
+# "inclusive": true), a list for "in", a label of a labelled field
+# (e.g. "Pivot") or {"field": other} to compare two fields.
+# Any numeric field also has sector-relative forms, see SECTOR_SUFFIXES.
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+    "between": None,
+    "in": None,
+    "present": None,
+}
+
+REASON_STYLES = (None, "list", "text")
+LEVEL_NAMES = tuple(name for name, _ in PIVOT_LEVELS)
+
+
+# ------------------ Derived Fields ------------------
+class Derived:
+    """
+    A field computed from others: `column(frame)` gives it for every symbol
+    (NaN = missing), `value(context)` for one result row, with the exact
+    Python value the strategies use in their rows and reasons.
+    """
+
+    def __init__(self, fields, column, value, labels=None, indicators=False):
+        self.fields = fields
+        self.column = column
+        self.value = value
+        self.labels = labels  # categorical fields: column holds the label index
+        self.indicators = indicators
+        # value=None: the row value is read from the column (e.g. sector ranks)
+
+
+def _indicators(json_data, symbols, read_previous_day_price, memo):
+    # RSI, SMA20/50 and MACD per symbol through the same helpers (and state
+    # or memo fast paths) the strategies use
+    n = len(symbols)
+    names = ("rsi", "sma20", "sma50", "macd", "macd_signal", "macd_hist")
+    values = {name: np.full(n, np.nan) for name in names}
+    for row, symbol in enumerate(symbols):
+        context = SymbolContext(symbol, json_data[symbol], read_previous_day_price, memo)
+        if not context.technicals:
+            continue
+        values["rsi"][row] = _nan(context.rsi())
+        values["sma20"][row] = _nan(context.indicator("sma20", lambda t: calculate_sma(t, 20)))
+        values["sma50"][row] = _nan(context.indicator("sma50", lambda t: calculate_sma(t, 50)))
+        macd, signal, hist = context.macd_all()
+        values["macd"][row] = _nan(macd)
+        values["macd_signal"][row] = _nan(signal)
+        values["macd_hist"][row] = _nan(hist)
+    return values
+
+
+def _nan(value):
+    return np.nan if value is None else value
+
+
+def _rel_vol(columns):
+    v = _filled(columns["v"])
+    vm = _filled(columns["vm"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(vm != 0, v / vm, 0.0)
+
+
+def _volatility(columns, price):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(price > 0, (_filled(columns["uc"]) - _filled(columns["lc"])) / price * 100, 0.0)
+
+
+def _first_level(context):
+    # First pivot level within 2% of the price (day screen)
+    ldcp = context.ldcp
+    for name, level in context.pivot_levels().items():
+        if level and abs(ldcp - level) / ldcp < 0.02:
+            return name
+    return None
+
+
+def _nearest_level(context):
+    # Closest pivot level to the price (swing screen)
+    ldcp = context.ldcp
+    return min(context.pivot_levels().items(), key=lambda x: abs(ldcp - x[1]) if x[1] else float('inf'))[0]
+
+
+def _first_level_column(frame):
+    near = nearest_pivot(frame.price, frame.columns)
+    return np.where(near >= 0, near, np.nan)
+
+
+def _nearest_level_column(frame):
+    price, columns = frame.price, frame.columns
+    levels = np.vstack([
+        np.where(np.isnan(columns["pp"]), price, columns["pp"]),
+        *(_filled(columns[key]) for _, key in PIVOT_LEVELS[1:]),
+    ])
+    distance = np.where(levels != 0, np.abs(price - levels), np.inf)
+    return distance.argmin(axis=0).astype(np.float64)
+
+
+def _change_column(frame, key):
+    previous = _filled(frame.columns[key])
+    return np.where(previous != 0, (frame.price - previous) / previous, 0.0)
+
+
+def _rel_vol_value(context):
+    v = context.details.get("v", 0)
+    vm = context.details.get("vm", 0)
+    return (v / vm) if vm else 0
+
+
+def _volatility_value(context):
+    details, ldcp = context.details, context.ldcp
+    return ((details.get("uc", 0) - details.get("lc", 0)) / ldcp * 100) if ldcp > 0 else 0
+
+
+def _pe_ratio_value(context):
+    eps = context.details.get("eps", 0)
+    return context.ldcp / eps if eps > 0 else None
+
+
+def _fair_price_value(context):
+    eps = context.details.get("eps", None)
+    return round(eps * FAIR_PE, 2) if eps else None
+
+
+def _rsi_valid_value(context):
+    rsi = context.details.get("rsi", None)
+    return rsi if rsi and abs(rsi) < 1000 else None
+
+
+def _rsi_valid_column(frame):
+    rsi = frame.columns["rsi"]
+    return np.where((rsi != 0) & (np.abs(rsi) < 1000), rsi, np.nan)
+
+
+def _sma_value(period):
+    return lambda context: context.indicator(f"sma{period}", lambda t: calculate_sma(t, period))
+
+
+def _bars_column(frame, indicator, *fields):
+    bars = frame.bars
+    return indicator(*(getattr(bars, field) for field in fields), bars.lengths)
+
+
+def _momentum_fields():
+    # ret_<horizon>: % change from the feed's past price; mom_rank_<horizon>:
+    # its percentile rank across the universe; mom_score: mean of the ranks.
+    # Ranks depend on the whole universe, so rows read them from the column.
+    fields = {}
+    for name, field, _ in HORIZONS:
+        fields[f"ret_{name}"] = Derived(
+            (field,), lambda frame, field=field: change(frame.price, frame.columns[field]), None)
+        fields[f"mom_rank_{name}"] = Derived(
+            (field,), lambda frame, name=name: cross_ranks(frame.column(f"ret_{name}")), None)
+    fields["mom_score"] = Derived(
+        tuple(field for _, field, _ in HORIZONS),
+        lambda frame: composite({name: frame.column(f"mom_rank_{name}") for name, _, _ in HORIZONS}), None)
+    return fields
+
+
+DERIVED = {
+    "price": Derived((), lambda frame: frame.price, lambda context: context.ldcp),
+    "rel_vol": Derived(("v", "vm"), lambda frame: _rel_vol(frame.columns), _rel_vol_value),
+    "volatility": Derived(("uc", "lc"), lambda frame: _volatility(frame.columns, frame.price), _volatility_value),
+    "pch_1w": Derived(("p1w",), lambda frame: _change_column(frame, "p1w"),
+                      lambda context: calculate_pch(context.ldcp, context.details.get("p1w", 0))),
+    "pch_1m": Derived(("p1m",), lambda frame: _change_column(frame, "p1m"),
+                      lambda context: calculate_pch(context.ldcp, context.details.get("p1m", 0))),
+    **_momentum_fields(),
+    "fcf": Derived(("opp", "ppeq"),
+                   lambda frame: _filled(frame.columns["opp"]) - _filled(frame.columns["ppeq"]),
+                   lambda context: (context.details.get("opp", 0) or 0) - (context.details.get("ppeq", 0) or 0)),
+    "pe_ratio": Derived(("eps",),
+                        lambda frame: np.where((frame.price > 0) & (frame.columns["eps"] > 0),
+                                               frame.price / frame.columns["eps"], np.nan),
+                        _pe_ratio_value),
+    "fair_price": Derived(("eps",),
+                          lambda frame: np.where(np.isnan(frame.columns["eps"]) | (frame.columns["eps"] == 0),
+                                                 np.nan, round2(frame.columns["eps"] * FAIR_PE)),
+                          _fair_price_value),
+    "rsi_valid": Derived(("rsi",), _rsi_valid_column, _rsi_valid_value),
+    "near_level": Derived(tuple(key for _, key in PIVOT_LEVELS), _first_level_column, _first_level,
+                          labels=LEVEL_NAMES),
+    "nearest_level": Derived(tuple(key for _, key in PIVOT_LEVELS), _nearest_level_column, _nearest_level,
+                             labels=LEVEL_NAMES),
+    # Indicators computed from the bars (the feed's own "rsi" is a plain field)
+    "rsi_14": Derived((), lambda frame: frame.indicators["rsi"], lambda context: context.rsi(), indicators=True),
+    "sma_20": Derived((), lambda frame: frame.indicators["sma20"], _sma_value(20), indicators=True),
+    "sma_50": Derived((), lambda frame: frame.indicators["sma50"], _sma_value(50), indicators=True),
+    "macd_line": Derived((), lambda frame: frame.indicators["macd"],
+                         lambda context: context.macd_all()[0], indicators=True),
+    "macd_signal": Derived((), lambda frame: frame.indicators["macd_signal"],
+                           lambda context: context.macd_all()[1], indicators=True),
+    "macd_hist": Derived((), lambda frame: frame.indicators["macd_hist"],
+                         lambda context: context.macd_all()[2], indicators=True),
+    # Indicators of the bulk library over the padded bar matrix (no scalar
+    # helpers exist for these, so rows read them from the column)
+    "ema_12": Derived((), lambda frame: bulk.ema(frame.bars.close, frame.bars.lengths, 12), None),
+    "ema_26": Derived((), lambda frame: bulk.ema(frame.bars.close, frame.bars.lengths, 26), None),
+    "atr_14": Derived((), lambda frame: _bars_column(frame, bulk.atr, "high", "low", "close"), None),
+    "adx_14": Derived((), lambda frame: _bars_column(frame, bulk.adx, "high", "low", "close")[0], None),
+    "bb_upper": Derived((), lambda frame: bulk.bollinger(frame.bars.close, frame.bars.lengths)[1], None),
+    "bb_lower": Derived((), lambda frame: bulk.bollinger(frame.bars.close, frame.bars.lengths)[2], None),
+    "vwap_20": Derived((), lambda frame: _bars_column(frame, bulk.vwap, "high", "low", "close", "volume"), None),
+}
+
+
+# Sector-relative forms of any numeric field, e.g. "per_sector_rank"
+# (0 = lowest in its sector, 1 = highest) or "roe_sector_median"
+SECTOR_SUFFIXES = {"_sector_rank": "ranks", "_sector_median": "median"}
+_sector_derived = {}
+
+
+def _sector_field(name):
+    # (base field, SectorIndex method) of a sector-relative name, else None
+    for suffix, method in SECTOR_SUFFIXES.items():
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[:-len(suffix)], method
+    return None
+
+
+def derived(name):
+    """The Derived of a derived or sector-relative field name, else None."""
+    if name in DERIVED:
+        return DERIVED[name]
+    if name not in _sector_derived:
+        sector = _sector_field(name)
+        if sector is None:
+            return None
+        base, method = sector
+        inner = derived(base)
+        _sector_derived[name] = Derived(
+            inner.fields if inner else (base,),
+            lambda frame: getattr(frame.sectors, method)(frame.column(base)),
+            None,
+            indicators=bool(inner and inner.indicators),
+        )
+    return _sector_derived[name]
+
+
+# ------------------ Screen Definitions ------------------
+def _when(field, op, threshold=None, **flags):
+    condition = {"field": field, "op": op}
+    if threshold is not None:
+        condition["threshold"] = threshold
+    condition.update(flags)
+    return condition
+
+
+def _rule(name, field, op, threshold, weight, reason=None, group=None, *more, **flags):
+    rule = _when(field, op, threshold, **flags)
+    rule.update(name=name, weight=weight)
+    if reason is not None:
+        rule["reason"] = reason
+    if group is not None:
+        rule["group"] = group
+    if more:
+        rule["and"] = list(more)
+    return rule
+
+
+PRICE_SET = _when("price", ">", 0)
+EPS_POSITIVE = _when("eps", ">", 0)
+RSI_USABLE = _when("rsi", "between", [-1000, 1000], nonzero=True)
+RSI_14_USABLE = _when("rsi_14", "between", [-1000, 1000], nonzero=True)
+SUPPORTS = ["S1", "S2", "S3"]
+RESISTANCES = ["R1", "R2", "R3"]
+
+SCREEN_DEFINITIONS = {
+    "day": {
+        "filter": [PRICE_SET],
+        "rules": [
+            _rule("pch_up", "pch", ">", 2, 2, group="momentum"),
+            _rule("pch_down", "pch", "<", -2, 1, group="momentum"),
+            _rule("rel_vol_high", "rel_vol", ">", 2, 2, group="volume"),
+            _rule("rel_vol_medium", "rel_vol", ">", 1, 1, group="volume"),
+            _rule("rsi_oversold", "rsi", "<", 30, 2, None, "rsi", RSI_USABLE),
+            _rule("rsi_overbought", "rsi", ">", 70, 1, None, "rsi", RSI_USABLE),
+            _rule("volatility_high", "volatility", ">", 5, 1),
+            _rule("pivot_near", "near_level", "present", None, 1),
+        ],
+        "sort": [{"field": "score"}, {"field": "rel_vol", "round": 2}],
+        "columns": [
+            ["symbol", "symbol"], ["name", "nm", ""], ["price", "price"], ["pch", "pch", 0],
+            ["volume", "v", 0], ["rel_vol", "rel_vol", None, 2], ["rsi", "rsi_valid", None, 2],
+            ["volatility_%", "volatility", None, 2], ["near_level", "near_level"], ["score", "score"],
+        ],
+    },
+    "swing": {
+        "filter": [_when("price", "!=", 0), _when("rsi_14", "present", nonzero=True), _when("v", "!=", 0, default=0)],
+        "rules": [
+            _rule("pch_positive", "pch", ">", 2, 2, "Positive daily change ({pch:.2f}%)", "momentum"),
+            _rule("pch_negative", "pch", "<", -2, -1, "Negative daily change ({pch:.2f}%)", "momentum"),
+            _rule("rel_vol_high", "rel_vol", ">", 2, 2, "High relative volume ({rel_vol:.2f}× avg)", "volume"),
+            _rule("rel_vol_medium", "rel_vol", ">", 1, 1, "Moderate relative volume ({rel_vol:.2f}× avg)", "volume"),
+            _rule("rsi_oversold", "rsi_14", "<", 30, 2, "RSI oversold ({rsi_14:.2f})", "rsi", RSI_14_USABLE),
+            _rule("rsi_overbought", "rsi_14", ">", 70, -1, "RSI overbought ({rsi_14:.2f})", "rsi", RSI_14_USABLE),
+            _rule("volatility_high", "volatility", ">", 5, 1, "High volatility ({volatility:.2f}%)"),
+            _rule("trend_bullish", "sma_20", ">", {"field": "sma_50"}, 2,
+                  "Bullish trend (SMA20 {sma_20:.2f} > SMA50 {sma_50:.2f})", "trend",
+                  _when("sma_50", "present", nonzero=True), nonzero=True),
+            _rule("trend_bearish", "sma_20", "<", {"field": "sma_50"}, -1,
+                  "Bearish trend (SMA20 {sma_20:.2f} < SMA50 {sma_50:.2f})", "trend",
+                  _when("sma_50", "present", nonzero=True), nonzero=True),
+            _rule("momentum_week", "pch_1w", ">", 3, 1, "Weekly momentum strong ({pch_1w:.2f}%)"),
+            _rule("momentum_month", "pch_1m", ">", 5, 1, "Monthly momentum strong ({pch_1m:.2f}%)"),
+            _rule("pivot_near", "nearest_level", "==", "Pivot", 1, "Near {nearest_level} pivot level", "pivot"),
+            _rule("pivot_support_bounce", "nearest_level", "in", SUPPORTS, 2,
+                  "Bounce from {nearest_level} with RSI {rsi_14:.2f}", "pivot", _when("rsi_14", "<", 35, nonzero=True)),
+            _rule("pivot_resistance_reject", "nearest_level", "in", RESISTANCES, -1,
+                  "Rejection from {nearest_level} with RSI {rsi_14:.2f}", "pivot", _when("rsi_14", ">", 65, nonzero=True)),
+            _rule("macd_bullish", "macd_line", ">", {"field": "macd_signal"}, 1,
+                  "MACD bullish crossover ({macd_line:.2f} > {macd_signal:.2f})", "macd",
+                  _when("macd_signal", "present", nonzero=True), nonzero=True),
+            _rule("macd_bearish", "macd_line", "present", None, 0,
+                  "MACD bearish ({macd_line:.2f} < {macd_signal:.2f})", "macd",
+                  _when("macd_signal", "present", nonzero=True), nonzero=True),
+        ],
+        "sort": [{"field": "v"}, {"field": "rsi_14", "round": 2, "desc": False}],
+        "columns": [
+            ["symbol", "symbol"], ["name", "nm", ""], ["price", "price"], ["volume", "v", 0],
+            ["rsi", "rsi_14", 0, 2], ["near_level", "nearest_level"], ["score", "score"],
+            ["fair_price", "fair_price"],
+        ],
+        "reasons": "list",
+    },
+    "long": {
+        "filter": [PRICE_SET],
+        "rules": [
+            _rule("eps_positive", "eps", ">", 0, 2, "EPS positive"),
+            _rule("roe_strong", "roe", ">", 12, 2, "ROE {roe}% strong"),
+            _rule("roa_healthy", "roa", ">", 6, 1, "ROA {roa}% healthy"),
+            _rule("roce_good", "roce", ">", 10, 1, "ROCE {roce}% good"),
+            _rule("pat_positive", "pat", ">", 0, 1, "PAT positive"),
+            _rule("npm_high", "npm", ">", 8, 1, "High Net Profit Margin"),
+            _rule("opm_high", "opm", ">", 12, 1, "High Operating Margin"),
+            _rule("pe_reasonable", "per", "between", [5, 15], 2, "Reasonable PE {per}"),
+            _rule("pb_cheap", "pbr", "<", 2, 1, "Cheap PB {pbr}", nonzero=True),
+            _rule("ps_good", "psr", "<", 2, 1, "Good PS ratio", nonzero=True),
+            _rule("below_book", "price", "<", {"field": "bval"}, 2, "Price below Book Value"),
+            _rule("dividend_yield", "divy", ">", 3, 1, "Attractive Dividend Yield {divy}%"),
+            _rule("dividend_cover", "divc", ">", 2, 1, "Dividend well covered"),
+            _rule("low_debt", "grat", "<", 1, 2, "Low Debt/Equity"),
+            _rule("interest_cover", "intc", ">", 3, 1, "Comfortable Interest Cover"),
+            _rule("current_ratio", "curr", ">", 1.5, 1, "Healthy Current Ratio"),
+            _rule("quick_ratio", " ", ">", 1, 1, "Healthy Quick Ratio"),
+            _rule("free_cash_flow", "fcf", ">", 0, 2, "Positive Free Cash Flow"),
+            _rule("sales_positive", "sales", ">", 0, 1, "Sales positive"),
+            _rule("sales_growth", "%chg1y", ">", 5, 1, "Sales growth {%chg1y}%"),
+        ],
+        "sort": [{"field": "score"}, {"field": "roe"}, {"field": "eps"}],
+        "columns": [
+            ["symbol", "symbol"], ["name", "nm", ""], ["price", "price"], ["eps", "eps", 0],
+            ["roe", "roe"], ["roa", "roa"], ["pat", "pat", 0], ["per", "per"], ["pbr", "pbr"],
+            ["dy", "divy"], ["debt_equity", "grat"], ["int_cover", "intc"], ["current_ratio", "curr"],
+            ["quick_ratio", " "], ["fcf", "fcf"], ["score", "score"],
+        ],
+        "reasons": "text",
+        "extra_fields": [" ", "%chg1y"],
+    },
+    "undervalued": {
+        "filter": [PRICE_SET, EPS_POSITIVE],
+        "rules": [
+            _rule("pe_cheap", "pe_ratio", "<", 10, 2, nonzero=True),
+            _rule("roe_good", "roe", ">", 10, 1),
+            _rule("pat_positive", "pat", ">", 0, 1),
+            _rule("below_book", "price", "<", {"field": "bval"}, 2),
+        ],
+        "list_if": [_when("score", ">", 0)],
+        "sort": [{"field": "score"}, {"field": "pe_ratio", "round": 2, "desc": False, "default": 9999}],
+        "columns": [
+            ["symbol", "symbol"], ["name", "nm", ""], ["price", "price"], ["eps", "eps", 0],
+            ["roe", "roe"], ["pat", "pat", 0], ["pe_ratio", "pe_ratio", None, 2],
+            ["book_value", "bval"], ["score", "score"],
+        ],
+    },
+    "strong": {
+        "filter": [PRICE_SET, EPS_POSITIVE],
+        "rules": [
+            _rule("roe_high", "roe", ">", 15, 2, "High ROE {roe}%"),
+            _rule("roa_healthy", "roa", ">", 6, 1, "Healthy ROA {roa}%"),
+            _rule("npm_good", "npm", ">", 10, 1, "Good NPM {npm}%"),
+            _rule("opm_good", "opm", ">", 12, 1, "Good OPM {opm}%"),
+            _rule("roce_solid", "roce", ">", 10, 1, "Solid ROCE {roce}%"),
+            _rule("pat_positive", "pat", ">", 0, 1, "Positive PAT"),
+            _rule("pe_attractive", "per", "between", [5, 12], 2, "Attractive PE {per}", "pe"),
+            _rule("pe_very_low", "per", "<", 5, 1, "Very Low PE {per} (possible value trap)", "pe", nonzero=True),
+            _rule("pb_low", "pbr", "<", 1.5, 1, "Low PB {pbr}", nonzero=True),
+            _rule("below_book", "price", "<", {"field": "bval"}, 2, "Price below Book Value"),
+            _rule("dividend_yield", "divy", ">", 3, 1, "Good Dividend Yield {divy}%"),
+            _rule("debt_low", "grat", "<", 0.5, 2, "Low Debt/Equity {grat}", "debt"),
+            _rule("debt_moderate", "grat", "<", 1, 1, "Moderate Debt/Equity {grat}", "debt"),
+            _rule("interest_cover", "intc", ">", 3, 1, "Comfortable Interest Coverage"),
+            _rule("current_ratio", "curr", ">", 1.5, 1, "Healthy Current Ratio"),
+            _rule("rsi_oversold", "rsi_14", "<", 30, 1, "RSI {rsi_14} — Oversold (Potential Reversal)", "rsi",
+                  nonzero=True),
+            _rule("rsi_accumulation", "rsi_14", "between", [30, 45], 0.5, "RSI {rsi_14} — Early Accumulation Zone",
+                  "rsi", nonzero=True, inclusive=True),
+            _rule("macd_bullish", "macd_line", ">", {"field": "macd_signal"}, 1.5,
+                  "MACD Bullish Crossover ({macd_line}>{macd_signal})", "macd", _when("macd_hist", ">", 0)),
+            _rule("macd_bearish", "macd_line", "<", {"field": "macd_signal"}, 0,
+                  "MACD Bearish ({macd_line}<{macd_signal})", "macd", _when("macd_hist", "<", 0)),
+        ],
+        "list_if": [_when("score", ">=", 7)],
+        "sort": [{"field": "score"}, {"field": "macd_hist"}, {"field": "roe"}],
+        "columns": [
+            ["symbol", "symbol"], ["name", "nm", ""], ["price", "price"], ["eps", "eps", 0],
+            ["roe", "roe"], ["roa", "roa"], ["per", "per"], ["pbr", "pbr"], ["dy", "divy"], ["bv", "bval"],
+            ["rsi", "rsi_14"], ["macd", "macd_line"], ["macd_signal", "macd_signal"], ["macd_hist", "macd_hist"],
+            ["debt_equity", "grat"], ["npm", "npm"], ["roce", "roce"], ["current_ratio", "curr"],
+            ["sales_growth", "%chg1y"], ["score", "score", None, 2],
+        ],
+        "reasons": "text",
+        "extra_fields": ["%chg1y"],
+    },
+}
+
+
+# ------------------ Validation & Compilation ------------------
+# Names every screen can use besides the data fields
+SPECIAL_FIELDS = ("symbol", "score")
+
+SCREEN_KEYS = {"filter", "rules", "list_if", "sort", "columns", "reasons", "extra_fields"}
+CONDITION_KEYS = {"field", "op", "threshold", "nonzero", "default", "inclusive"}
+RULE_KEYS = CONDITION_KEYS | {"name", "weight", "reason", "group", "and"}
+SORT_SPEC_KEYS = {"field", "round", "desc", "default"}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class _Fields:
+    """Field names a screen may use: columns.json + feed fields, derived fields, its extra_fields."""
+
+    def __init__(self, columns_file, extra_fields):
+        self.types = dict(load_schema(columns_file).types)
+        for key in extra_fields:
+            self.types.setdefault(key, "number")
+        for key in DERIVED:
+            if key in self.types:
+                raise ValueError(f"Derived field {key!r} shadows a data field")
+            self.types[key] = "number"
+
+    def check(self, field, where, numeric=True):
+        if field in SPECIAL_FIELDS:
+            return
+        kind = self.types.get(field)
+        sector = _sector_field(field) if kind is None else None
+        if sector is not None:
+            self.check(sector[0], where)
+            kind = self.types[field] = "number"
+        if kind is None:
+            raise ValueError(f"{where}: unknown field {field!r} (not in columns.json or a derived field)")
+        if numeric and kind == "string":
+            raise ValueError(f"{where}: field {field!r} is a string and cannot be compared")
+
+
+class Condition:
+    """One compiled `{field, op, threshold}` test, evaluated over whole columns."""
+
+    def __init__(self, spec, fields, where):
+        unknown = set(spec) - CONDITION_KEYS
+        if unknown:
+            raise ValueError(f"{where}: unknown condition keys {sorted(unknown)}")
+        self.field = spec.get("field")
+        self.op = spec.get("op")
+        if not isinstance(self.field, str):
+            raise ValueError(f"{where}: condition needs a field")
+        fields.check(self.field, where)
+        if self.op not in OPERATORS:
+            raise ValueError(f"{where}: unknown op {self.op!r}, expected one of {sorted(OPERATORS)}")
+        self.nonzero = bool(spec.get("nonzero", False))
+        self.inclusive = bool(spec.get("inclusive", False))
+        self.default = spec.get("default")
+        if self.default is not None and not _is_number(self.default):
+            raise ValueError(f"{where}: default must be a number")
+
+        labels = derived(self.field).labels if derived(self.field) else None
+        if labels and self.nonzero:
+            raise ValueError(f"{where}: nonzero does not apply to the labelled field {self.field!r}")
+        self.ref = None
+        self.threshold = self._threshold(spec.get("threshold"), labels, fields, where)
+
+    def _threshold(self, threshold, labels, fields, where):
+        def value(item):
+            if labels and isinstance(item, str):
+                if item not in labels:
+                    raise ValueError(f"{where}: {item!r} is not one of {list(labels)}")
+                return labels.index(item)
+            if not _is_number(item):
+                raise ValueError(f"{where}: threshold {item!r} is not a number")
+            return item
+
+        if self.op == "present":
+            if threshold is not None:
+                raise ValueError(f"{where}: 'present' takes no threshold")
+            return None
+        if self.op == "between":
+            if not isinstance(threshold, list) or len(threshold) != 2:
+                raise ValueError(f"{where}: 'between' needs [low, high]")
+            return [value(item) for item in threshold]
+        if self.op == "in":
+            if not isinstance(threshold, list) or not threshold:
+                raise ValueError(f"{where}: 'in' needs a list")
+            return [value(item) for item in threshold]
+        if isinstance(threshold, dict):
+            self.ref = threshold.get("field")
+            if set(threshold) != {"field"} or not isinstance(self.ref, str):
+                raise ValueError(f"{where}: a field threshold is {{\"field\": name}}")
+            fields.check(self.ref, where)
+            return None
+        if threshold is None:
+            raise ValueError(f"{where}: {self.op!r} needs a threshold")
+        return value(threshold)
+
+    def fields(self):
+        return [self.field] + ([self.ref] if self.ref else [])
+
+    def evaluate(self, column):
+        """Bool column of the rows meeting the condition; `column(name)` reads a field."""
+        x = column(self.field)
+        if self.default is not None:
+            x = np.where(np.isnan(x), self.default, x)
+        if self.op == "present":
+            hit = ~np.isnan(x)
+        elif self.op == "between":
+            low, high = self.threshold
+            hit = (low <= x) & (x <= high) if self.inclusive else (low < x) & (x < high)
+        elif self.op == "in":
+            hit = np.isin(x, self.threshold)
+        else:
+            hit = OPERATORS[self.op](x, column(self.ref) if self.ref else self.threshold)
+        if self.nonzero:
+            hit &= ~np.isnan(x) & (x != 0)
+        return hit
+
+
+class Rule:
+    """A scored condition (plus its "and" conditions) with a weight and reason template."""
+
+    def __init__(self, spec, fields, where):
+        unknown = set(spec) - RULE_KEYS
+        if unknown:
+            raise ValueError(f"{where}: unknown rule keys {sorted(unknown)}")
+        self.name = spec.get("name")
+        if not isinstance(self.name, str) or not self.name:
+            raise ValueError(f"{where}: rule needs a name")
+        where = f"{where} rule {self.name!r}"
+        self.weight = spec.get("weight")
+        if not _is_number(self.weight):
+            raise ValueError(f"{where}: weight must be a number")
+        self.group = spec.get("group")
+        self.reason = spec.get("reason")
+        if self.reason is not None:
+            for _, name, _, _ in string.Formatter().parse(self.reason):
+                if name is not None:
+                    fields.check(name, where, numeric=False)
+
+        condition = {key: spec[key] for key in CONDITION_KEYS if key in spec}
+        self.conditions = [Condition(condition, fields, where)]
+        self.conditions += [Condition(more, fields, where) for more in spec.get("and", [])]
+
+    def fields(self):
+        return [field for condition in self.conditions for field in condition.fields()]
+
+    def evaluate(self, column):
+        hit = self.conditions[0].evaluate(column)
+        for condition in self.conditions[1:]:
+            hit &= condition.evaluate(column)
+        return hit
+
+
+class SortKey:
+    def __init__(self, spec, fields, where):
+        unknown = set(spec) - SORT_SPEC_KEYS
+        if unknown:
+            raise ValueError(f"{where}: unknown sort keys {sorted(unknown)}")
+        self.field = spec.get("field")
+        fields.check(self.field, where)
+        self.digits = spec.get("round")
+        self.desc = spec.get("desc", True)
+        self.default = spec.get("default", 0)
+
+    def column(self, column):
+        # Like `x if x else default` on the row value (rounded first)
+        x = column(self.field)
+        if self.digits is not None:
+            x = round2(x) if self.digits == 2 else np.round(x, self.digits)
+        return np.where(~np.isnan(x) & (x != 0), x if self.desc else -x, self.default)
+
+
+class CompiledScreen:
+    """
+    A validated screen definition. `evaluate` runs every rule over the whole
+    universe at once into a flags matrix (symbols × rules); scores are one
+    dot product with the weights, and result rows are built only for the
+    rows that are read.
+    """
+
+    def __init__(self, name, definition, columns_file=COLUMNS_FILE):
+        where = f"screen {name!r}"
+        unknown = set(definition) - SCREEN_KEYS
+        if unknown:
+            raise ValueError(f"{where}: unknown keys {sorted(unknown)}")
+        fields = _Fields(columns_file, definition.get("extra_fields", []))
+
+        self.name = name
+        self.filters = [Condition(spec, fields, f"{where} filter") for spec in definition.get("filter", [])]
+        self.rules = [Rule(spec, fields, where) for spec in definition.get("rules", [])]
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"{where}: rule names must be unique")
+        self.list_if = [Condition(spec, fields, f"{where} list_if") for spec in definition.get("list_if", [])]
+        self.sort = [SortKey(spec, fields, f"{where} sort") for spec in definition.get("sort", [{"field": "score"}])]
+
+        # The score only exists once the rules are summed; symbols are not numbers
+        conditions = self.filters + [condition for rule in self.rules for condition in rule.conditions]
+        if any(field in SPECIAL_FIELDS for condition in conditions for field in condition.fields()):
+            raise ValueError(f"{where}: score can only be tested in list_if and sort")
+        if any("symbol" in condition.fields() for condition in self.list_if) or \
+                any(key.field == "symbol" for key in self.sort):
+            raise ValueError(f"{where}: symbol is not a number")
+
+        self.columns = []
+        for entry in definition.get("columns", [["symbol", "symbol"], ["score", "score"]]):
+            if not isinstance(entry, list) or not 2 <= len(entry) <= 4:
+                raise ValueError(f"{where}: a column is [key, field, default, digits]")
+            fields.check(entry[1], f"{where} column {entry[0]!r}", numeric=False)
+            self.columns.append((entry + [None, None])[:4])
+        self.reasons = definition.get("reasons")
+        if self.reasons not in REASON_STYLES:
+            raise ValueError(f"{where}: reasons must be one of {REASON_STYLES}")
+
+    def row_keys(self):
+        """Keys of the screen's result rows, in row order."""
+        keys = [key for key, _, _, _ in self.columns]
+        return keys + ["reasons"] if self.reasons else keys
+
+    def fields(self):
+        """Data fields (not derived) the screen's conditions and sort keys read."""
+        names = [field for condition in self.filters + self.list_if for field in condition.fields()]
+        names += [field for rule in self.rules for field in rule.fields()]
+        names += [key.field for key in self.sort]
+        needed = []
+        for name in names:
+            for field in derived(name).fields if derived(name) else (name,):
+                if field not in SPECIAL_FIELDS and field not in needed:
+                    needed.append(field)
+        return needed
+
+    def uses_indicators(self):
+        names = [field for rule in self.rules for field in rule.fields()]
+        names += [field for condition in self.filters for field in condition.fields()]
+        names += [key.field for key in self.sort]
+        return any(derived(name) is not None and derived(name).indicators for name in names)
+
+    def weights(self, overrides=None):
+        """Rule weights in rule order; `overrides` ({rule name: weight}) replaces some."""
+        overrides = overrides or {}
+        return [overrides.get(rule.name, rule.weight) for rule in self.rules]
+
+    def evaluate(self, frame):
+        """(flags, valid): which rules fire for each symbol, and which symbols are scored."""
+        valid = np.ones(len(frame.symbols), dtype=bool)
+        for condition in self.filters:
+            valid &= condition.evaluate(frame.column)
+        flags = np.zeros((len(frame.symbols), len(self.rules)), dtype=bool)
+        taken = {}  # group → rows an earlier rule of the group already fired for
+        for j, rule in enumerate(self.rules):
+            hit = rule.evaluate(frame.column) & valid
+            if rule.group is not None:
+                earlier = taken.get(rule.group)
+                taken[rule.group] = hit if earlier is None else earlier | hit
+                if earlier is not None:
+                    hit &= ~earlier
+            flags[:, j] = hit
+        return flags, valid
+
+    def order(self, frame, flags, valid, weights=None, top_k=None):
+        """Listed rows best first (ties in universe order), only the best `top_k` if given."""
+        scores = flags @ np.array(self.weights(weights), dtype=np.float64)
+
+        def column(name):
+            return scores if name == "score" else frame.column(name)
+
+        rows = valid.copy()
+        for condition in self.list_if:
+            rows &= condition.evaluate(column)
+        rows = np.flatnonzero(rows)
+        if not self.sort:
+            return rows if top_k is None else rows[:max(top_k, 0)]
+        return rows[rank_order([key.column(column)[rows] for key in self.sort], top_k)]
+
+    def build_row(self, frame, row, fired, rule_weights):
+        """
+        Result row of the symbol at `row` of the frame, given the rules that
+        fired for it (bool per rule) and the rule weights (see weights()).
+        """
+        values = _RowValues(frame, row)
+        score = 0
+        reasons = []
+        for rule, weight, hit in zip(self.rules, rule_weights, fired.tolist()):
+            if hit:
+                score += weight
+                if rule.reason is not None:
+                    reasons.append(rule.reason.format_map(values))
+        values["score"] = score
+
+        row = {}
+        for key, field, default, digits in self.columns:
+            value = values[field]
+            if value is None:
+                value = default
+            elif digits is not None:
+                value = round(value, digits)
+            row[key] = value
+        if self.reasons == "list":
+            row["reasons"] = reasons
+        elif self.reasons == "text":
+            row["reasons"] = "; ".join(reasons)
+        return row
+
+
+class _RowValues(dict):
+    # Field values of one symbol, looked up on first use
+    def __init__(self, frame, row):
+        self.frame = frame
+        self.row = row
+        self.context = frame.context(row)
+        super().__init__(symbol=self.context.symbol)
+
+    def __missing__(self, key):
+        field = derived(key)
+        if field is None:
+            value = self.context.details.get(key)
+        elif field.value is None:
+            value = self.frame.column(key)[self.row].item()
+            value = None if value != value else value
+        else:
+            value = field.value(self.context)
+        self[key] = value
+        return value
+
+
+def compile_screens(definitions=None, columns_file=COLUMNS_FILE):
+    """{name: CompiledScreen} of `definitions` (default: the built-in five)."""
+    definitions = SCREEN_DEFINITIONS if definitions is None else definitions
+    return {name: CompiledScreen(name, definition, columns_file) for name, definition in definitions.items()}
+
+
+def load_definitions(path, columns_file=COLUMNS_FILE):
+    """Compile the screens of a JSON file ({name: definition}); raises ValueError if one is invalid."""
+    with open(path, "r", encoding="utf-8") as f:
+        definitions = json.load(f)
+    if not isinstance(definitions, dict):
+        raise ValueError(f"{path}: expected {{screen name: definition}}")
+    return compile_screens(definitions, columns_file)
+
+
+# ------------------ Running ------------------
+class Frame:
+    """
+    The columns a set of screens reads, loaded once per universe; derived
+    fields are computed on first use.
+    """
+
+    def __init__(self, json_data, fields, read_previous_day_price=False, memo=None, indicators=False):
+        self.json_data = json_data
+        self.read_previous_day_price = read_previous_day_price
+        self.memo = memo
+        self.symbols, self.columns = load_columns(json_data, list(dict.fromkeys(("c", "ldcp", *fields))))
+        self.price = price_column(self.columns, read_previous_day_price)
+        self.indicators = _indicators(json_data, self.symbols, read_previous_day_price, memo) if indicators else None
+        self._sectors = None
+        self._bars = None
+        self._derived = {}
+
+    @property
+    def sectors(self):
+        if self._sectors is None:
+            self._sectors = sector_index(self.json_data, self.symbols)
+        return self._sectors
+
+    @property
+    def bars(self):
+        if self._bars is None:
+            self._bars = bulk.BarMatrix.from_equities(self.json_data, self.symbols)
+        return self._bars
+
+    def column(self, name):
+        field = derived(name)
+        if field is not None:
+            if name not in self._derived:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    self._derived[name] = field.column(self)
+            return self._derived[name]
+        if name not in self.columns:  # e.g. the base of a sector field shown only in a column
+            self.columns.update(load_columns(self.json_data, [name])[1])
+        return self.columns[name]
+
+    def context(self, row):
+        symbol = self.symbols[row]
+        return SymbolContext(symbol, self.json_data[symbol], self.read_previous_day_price, self.memo)
+
+
+class RuleMatrix:
+    """Rule flags of several compiled screens over one universe."""
+
+    def __init__(self, frame, screens):
+        self.frame = frame
+        self.screens = screens
+        self.flags = {}
+        with np.errstate(invalid="ignore"):
+            for name, screen in screens.items():
+                self.flags[name] = screen.evaluate(frame)
+
+    def scores(self, name, weights=None):
+        flags, _ = self.flags[name]
+        return flags @ np.array(self.screens[name].weights(weights), dtype=np.float64)
+
+    def rank(self, name, weights=None, top_k=None):
+        """Ranked rows of a screen as a RankedRows sequence; rows are built on access."""
+        screen = self.screens[name]
+        flags, valid = self.flags[name]
+        with np.errstate(invalid="ignore"):
+            order = screen.order(self.frame, flags, valid, weights, top_k)
+        frame = self.frame
+        rule_weights = screen.weights(weights)
+        return RankedRows(order.tolist(), lambda i: screen.build_row(frame, i, flags[i], rule_weights))
+
+
+def rule_matrix(json_data, read_previous_day_price=False, screens=None, memo=None):
+    """
+    Evaluate compiled screens (default: the built-in five) over the whole
+    universe at once.
+
+    Args:
+        json_data: {symbol: details} dict or snapshot equities
+        read_previous_day_price (bool): price from "ldcp" instead of "c"
+        screens: {name: CompiledScreen}, e.g. from load_definitions()
+        memo: indicators.IndicatorMemo shared with row building
+
+    Returns:
+        RuleMatrix
+    """
+    screens = compile_screens() if screens is None else screens
+    memo = memo if memo is not None else IndicatorMemo()
+    fields = list(dict.fromkeys(field for screen in screens.values() for field in screen.fields()))
+    indicators = any(screen.uses_indicators() for screen in screens.values())
+    frame = Frame(json_data, fields, read_previous_day_price, memo, indicators)
+    return RuleMatrix(frame, screens)
+
+
+def run_rules(json_data, read_previous_day_price=False, screens=None, weights=None, top_k=None):
+    """
+    {screen name: ranked rows} of compiled screens; with the built-in
+    definitions this equals strategies.run_all_screens. `weights` maps a
+    screen name to rule weight overrides (e.g. {"swing": swing_config}).
+    """
+    matrix = rule_matrix(json_data, read_previous_day_price, screens)
+    weights = weights or {}
+    return {name: matrix.rank(name, weights.get(name), top_k) for name in matrix.screens}
+
+
+if __name__ == "__main__":
+    # Usage: python rules.py [screens.json] [stocks.json]
+    from bars import load_equities
+
+    args = sys.argv[1:]
+    screens = load_definitions(args[0]) if args else compile_screens()
+    print(f"✅ {len(screens)} screen(s) valid: {', '.join(screens)}")
+    data = load_equities(args[1] if len(args) > 1 else "stocks.json", "stocks.bars.npz")
+    for name, rows in run_rules(data, screens=screens, top_k=10).items():
+        print(f"\n📊 {name} — top {len(rows)}")
+        for row in rows:
+            print(f"  {row['symbol']:<10} score {row.get('score')}")
@@ -0,0 +1,67 @@
+import json
+import os
+
+# The schema shipped next to this module, wherever the process runs from
+COLUMNS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "columns.json")
+
+# Quote fields the screener feed sends next to the columns.json fields
+FEED_FIELDS = {
+    "number": (
+        "o", "h", "l", "c", "v", "ch", "pch", "h52", "l52", "ldcv", "uc", "lc",
+        "avg", "tr", "var", "hc", "std", "bidp", "bidv", "askp", "askv", "sh", "ff",
+        "sa", "as", "pat", "pm", "di", "pr", "sg3y", "eg3y", "scagr5y", "pcagr5y",
+        "p1w", "p1m", "p3m", "p6m", "p1y", "pytd", "pfy", "p5y",
+        "vw", "vm", "v3m", "v6m", "vy", "vytd", "vfy",
+        "vaw", "va10d", "vam", "va3m", "va6m", "vay", "vaytd", "v30a",
+        "sw", "sm", "s3m", "s6m", "sy", "sytd", "sfy", "ty", "st",
+    ),
+    "string": ("nm", "sc", "d", "ds"),
+    "bool": ("xb", "xd", "xr", "sd"),
+}
+
+FIELD_TYPES = ("number", "string", "bool")
+
+
+# ------------------ Schema ------------------
+class Schema:
+    """
+    Field keys, types and groups of columns.json plus the feed quote fields.
+
+    Attributes:
+        types: {key: "number" | "string" | "bool"} in declaration order
+        groups: {group: [keys]} as declared in columns.json ("feed" for the quote fields)
+    """
+
+    def __init__(self, columns, feed_fields=FEED_FIELDS):
+        self.types = {}
+        self.groups = {}
+        for key, spec in columns.items():
+            self._add(key, spec.get("type", "number"), spec.get("group", "other"))
+        for kind, keys in feed_fields.items():
+            for key in keys:
+                if key not in self.types:
+                    self._add(key, kind, "feed")
+
+    def _add(self, key, kind, group):
+        if kind not in FIELD_TYPES:
+            raise ValueError(f"Unknown type {kind!r} for field {key!r}")
+        self.types[key] = kind
+        self.groups.setdefault(group, []).append(key)
+
+    def numeric(self):
+        """Keys of the number fields, in declaration order."""
+        return [key for key, kind in self.types.items() if kind == "number"]
+
+
+_schemas = {}
+
+
+def load_schema(columns_file=COLUMNS_FILE):
+    """Schema of `columns_file`, read once and reused until the file changes."""
+    path = os.path.abspath(columns_file)
+    mtime = os.path.getmtime(path)
+    cached = _schemas.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = _schemas[path] = (mtime, Schema(json.load(f)))
+    return cached[1]
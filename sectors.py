@@ -0,0 +1,221 @@
+import sys
+
+import numpy as np
+
+from batch import load_columns
+
+# Sector keys in lookup order: columns.json's "sector", then the feed's sector code
+SECTOR_FIELDS = ("sector", "sc")
+NO_SECTOR = ""
+
+# Fields summarised per sector by default
+STAT_FIELDS = ("per", "pbr", "psr", "eps", "roe", "roa", "roce", "npm", "opm", "divy", "divc", "grat", "intc", "curr")
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def sector_of(details):
+    """Sector of one symbol's details, NO_SECTOR if it has none."""
+    for key in SECTOR_FIELDS:
+        value = details.get(key)
+        if value:
+            return value
+    return NO_SECTOR
+
+
+def sector_labels(json_data):
+    """Sector of every symbol, in universe order."""
+    snap = getattr(json_data, "snapshot", None)
+    if snap is not None:
+        for key in SECTOR_FIELDS:
+            if key in snap.values:
+                return [value or NO_SECTOR for value in snap.values[key]]
+        return [NO_SECTOR] * len(snap.symbols)
+    return [sector_of(details) for details in json_data.values()]
+
+
+# ------------------ Sector Index ------------------
+class SectorIndex:
+    """
+    Rows of every sector, laid out like the BarStore: row indexes grouped by
+    sector in `order`, with sector k's rows at order[offsets[k]:offsets[k + 1]].
+    Selecting a sector is a slice, so it only touches that sector's rows.
+
+    Attributes:
+        symbols: symbol of each row
+        sectors: sector names, sorted
+        codes (np.ndarray): sector number of each row
+    """
+
+    def __init__(self, symbols, labels):
+        self.symbols = symbols
+        self.sectors = sorted(set(labels))
+        number = {sector: k for k, sector in enumerate(self.sectors)}
+        self.codes = np.array([number[label] for label in labels], dtype=np.intp)
+        self.order = np.argsort(self.codes, kind="stable")
+        counts = np.bincount(self.codes, minlength=len(self.sectors))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._number = number
+
+    def __len__(self):
+        return len(self.sectors)
+
+    def __contains__(self, sector):
+        return sector in self._number
+
+    def counts(self):
+        """{sector: number of symbols}."""
+        return {sector: int(n) for sector, n in zip(self.sectors, np.diff(self.offsets))}
+
+    def rows(self, sector):
+        """Row indexes of `sector` in universe order (empty if unknown)."""
+        k = self._number.get(sector)
+        if k is None:
+            return self.order[:0]
+        return self.order[self.offsets[k]:self.offsets[k + 1]]
+
+    def symbols_in(self, sector):
+        symbols = self.symbols
+        return [symbols[row] for row in self.rows(sector).tolist()]
+
+    def subset(self, json_data, sector):
+        """
+        {symbol: details} of one sector, in universe order. Any screen run
+        on it only reads that sector's rows; sector ranks computed on it
+        equal the ranks in the whole universe.
+        """
+        return {symbol: json_data[symbol] for symbol in self.symbols_in(sector)}
+
+    def stats(self, column, percentiles=PERCENTILES):
+        """Per-sector statistics of one column, see group_stats()."""
+        return group_stats(self.codes, len(self.sectors), column, percentiles)
+
+    def median(self, column):
+        """Median of `column` within each row's own sector (NaN where the sector has no values)."""
+        return self.stats(column, (50,))["median"][self.codes]
+
+    def ranks(self, column):
+        """Percentile rank of each row within its sector, see group_ranks()."""
+        return group_ranks(self.codes, len(self.sectors), column)
+
+
+def sector_index(json_data, symbols=None):
+    """SectorIndex of a {symbol: details} dict or snapshot equities."""
+    return SectorIndex(list(json_data) if symbols is None else symbols, sector_labels(json_data))
+
+
+# ------------------ Group-By ------------------
+def _sorted_groups(codes, n_groups, column):
+    # Non-missing values sorted by (group, value), each group's count and start
+    valid = ~np.isnan(column)
+    rows = np.flatnonzero(valid)
+    groups = codes[rows]
+    order = np.lexsort((column[rows], groups))
+    rows, groups = rows[order], groups[order]
+    count = np.bincount(groups, minlength=n_groups)
+    start = np.cumsum(count) - count
+    return rows, groups, column[rows], count, start
+
+
+def group_stats(codes, n_groups, column, percentiles=PERCENTILES):
+    """
+    Count, mean, min, max and percentiles of `column` in every group at
+    once (NaN values are skipped): one sort by (group, value), then each
+    percentile is read off every group's sorted run with the same linear
+    interpolation as np.percentile.
+
+    Args:
+        codes (np.ndarray): group number (0 .. n_groups - 1) of each row
+        n_groups (int): number of groups
+        column (np.ndarray): float64 values, NaN = missing
+        percentiles: percentiles to compute; 50 is reported as "median"
+
+    Returns:
+        {"count", "mean", "min", "max", "median" / "p<q>": np.ndarray per group},
+        NaN for groups without values
+    """
+    _, groups, values, count, start = _sorted_groups(codes, n_groups, column)
+    names = ["mean", "min", "max"] + ["median" if q == 50 else f"p{q:g}" for q in percentiles]
+    if not len(values):
+        return {"count": count, **{name: np.full(n_groups, np.nan) for name in names}}
+
+    has = count > 0
+    first = np.minimum(start, len(values) - 1)  # any valid index for empty groups
+    last = np.maximum(start + count - 1, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stats = {
+            "count": count,
+            "mean": np.bincount(groups, weights=values, minlength=n_groups) / count,
+            "min": np.where(has, values[first], np.nan),
+            "max": np.where(has, values[last], np.nan),
+        }
+    for q, name in zip(percentiles, names[3:]):
+        position = (count - 1) * (q / 100)
+        below = np.floor(position).astype(np.intp)
+        lo = np.clip(start + below, 0, len(values) - 1)
+        hi = np.clip(start + np.minimum(below + 1, count - 1), 0, len(values) - 1)
+        value = values[lo] + (values[hi] - values[lo]) * (position - below)
+        stats[name] = np.where(has, value, np.nan)
+    return stats
+
+
+def group_ranks(codes, n_groups, column):
+    """
+    Percentile rank (0 = lowest, 1 = highest) of every row's value among
+    the non-missing values of its group; tied values share their average
+    rank, a group's only value ranks 0.5 and missing values stay NaN.
+    """
+    rows, groups, values, count, start = _sorted_groups(codes, n_groups, column)
+    ranks = np.full(len(column), np.nan)
+    if not len(rows):
+        return ranks
+    # Runs of equal (group, value): every row of a run gets its mean position
+    index = np.arange(len(rows))
+    new_run = np.ones(len(rows), dtype=bool)
+    new_run[1:] = (groups[1:] != groups[:-1]) | (values[1:] != values[:-1])
+    first = np.maximum.accumulate(np.where(new_run, index, 0))
+    run_end = np.ones(len(rows), dtype=bool)
+    run_end[:-1] = new_run[1:]
+    last = np.minimum.accumulate(np.where(run_end, index, len(rows))[::-1])[::-1]
+    position = (first + last) / 2 - start[groups]
+    size = count[groups] - 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ranks[rows] = np.where(size > 0, position / size, 0.5)
+    return ranks
+
+
+# ------------------ Sector Statistics ------------------
+def sector_stats(json_data, fields=STAT_FIELDS, percentiles=PERCENTILES, index=None):
+    """
+    Per-sector statistics of `fields` over the whole universe, with the
+    columns loaded once.
+
+    Returns:
+        {sector: {"count": symbols, field: {"count", "mean", "min", "max",
+        "median", "p10", ...}}} with None for missing statistics
+    """
+    symbols, columns = load_columns(json_data, fields)
+    index = index if index is not None else sector_index(json_data, symbols)
+    table = {sector: {"count": n} for sector, n in index.counts().items()}
+    for field in fields:
+        stats = index.stats(columns[field], percentiles)
+        for k, sector in enumerate(index.sectors):
+            table[sector][field] = {
+                name: (None if values[k] != values[k] else values[k].item()) for name, values in stats.items()
+            }
+    return table
+
+
+if __name__ == "__main__":
+    # Usage: python sectors.py [stocks.json] [field]
+    from bars import load_equities
+
+    args = sys.argv[1:]
+    data = load_equities(args[0] if args else "stocks.json")
+    field = args[1] if len(args) > 1 else "per"
+    table = sector_stats(data, (field,))
+    print(f"📊 {field} by sector ({len(table)} sectors)")
+    print(f"  {'sector':<10} {'n':>5} {'p25':>10} {'median':>10} {'p75':>10}")
+    for sector, row in sorted(table.items(), key=lambda item: -item[1]["count"]):
+        stats = row[field]
+        cells = [f"{stats[name]:>10.2f}" if stats[name] is not None else f"{'-':>10}" for name in ("p25", "median", "p75")]
+        print(f"  {sector or '(none)':<10} {row['count']:>5} {' '.join(cells)}")
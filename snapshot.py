@@ -0,0 +1,315 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+
+import numpy as np
+
+from bars import FIELDS, Bars, BarStore, load_equities
+from indicators import dump_states, load_states
+
+# ------------------ File Layout ------------------
+#   magic (8 bytes) | header length (uint64 LE) | header JSON (padded to 64 bytes)
+#   matrix   float64[n_fields, n_symbols]   one contiguous column per field, NaN = missing
+#   ints     uint8[n_fields, n_symbols]     1 where the matrix value was a JSON int
+#   offsets  int64[n_symbols + 1]           bar range of each symbol
+#   ts       int64[n_bars]
+#   open, high, low, close, volume  float64[n_bars] each
+MAGIC = b"PSXSNAP1"
+ALIGN = 64
+
+# The nested "pp" dict is flattened into the pivot columns of columns.json
+PIVOT_KEYS = ("pp", "r1", "r2", "r3", "s1", "s2", "s3")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _schema(columns_file):
+    """Numeric field keys declared in columns.json, in file order."""
+    with open(columns_file, "r", encoding="utf-8") as f:
+        columns = json.load(f)
+    return [key for key, spec in columns.items() if spec.get("type") == "number"]
+
+
+# ------------------ Writer ------------------
+def write_snapshot(equities, path, columns_file="columns.json", indicator_states=None):
+    """
+    Write the merged equities to a binary snapshot at `path`.
+
+    The numeric matrix holds every number field of columns.json, followed by
+    any other numeric field found in the data (quote fields like c, v, vm).
+    Strings and other values (nm, li, bt, ...) go into the JSON header.
+    `indicator_states` ({symbol: IndicatorState}) are persisted alongside,
+    so a re-screen of the snapshot does not replay bar history.
+    The file is written to a temp name and swapped in with os.replace, so a
+    reader never maps a half-written snapshot.
+    """
+    symbols = list(equities)
+    cells = {}  # field -> {row: value}
+
+    for row, details in enumerate(equities.values()):
+        for key, value in details.items():
+            if key == "technicals" or value is None:
+                continue
+            if key == "pp":
+                if isinstance(value, dict):
+                    for level in PIVOT_KEYS:
+                        if _is_number(value.get(level)):
+                            cells.setdefault(level, {})[row] = value[level]
+                continue
+            cells.setdefault(key, {})[row] = value
+
+    fields = _schema(columns_file)
+    bool_fields = []
+    values = {}
+    for key, column in cells.items():
+        if all(isinstance(v, bool) for v in column.values()):
+            bool_fields.append(key)
+        elif not all(_is_number(v) for v in column.values()):
+            values[key] = [column.get(row) for row in range(len(symbols))]
+            continue
+        if key not in fields:
+            fields.append(key)
+
+    # The feed mixes 1 and 1.0 within a column, so int-ness is kept per value
+    matrix = np.full((len(fields), len(symbols)), np.nan)
+    ints = np.zeros((len(fields), len(symbols)), dtype=np.uint8)
+    for j, key in enumerate(fields):
+        for row, value in cells.get(key, {}).items():
+            matrix[j, row] = value
+            ints[j, row] = _is_int(value)
+
+    store = BarStore.from_equities(equities)
+    offsets = np.zeros(len(symbols) + 1, dtype=np.int64)
+    for row, symbol in enumerate(symbols):
+        n = 0
+        if symbol in store:
+            i = store.index[symbol]
+            n = store.offsets[i + 1] - store.offsets[i]
+        offsets[row + 1] = offsets[row] + n
+    # BarStore skips symbols without bars, so re-order its rows to snapshot order
+    order = np.concatenate([
+        np.arange(store.offsets[store.index[s]], store.offsets[store.index[s] + 1])
+        for s in symbols if s in store
+    ] or [np.zeros(0, dtype=np.int64)])
+
+    sections = [("matrix", matrix), ("ints", ints), ("offsets", offsets)]
+    sections += [(name, getattr(store, name)[order]) for name in FIELDS]
+
+    header = {
+        "version": 2,
+        "symbols": symbols,
+        "fields": fields,
+        "bool_fields": bool_fields,
+        "values": values,
+        "indicators": dump_states(indicator_states or {}),
+        "sections": {},
+    }
+    # Section offsets depend on the header size, so lay out twice
+    for _ in range(2):
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        position = _align(len(MAGIC) + 8 + len(header_bytes))
+        for name, array in sections:
+            header["sections"][name] = [position, str(array.dtype), list(array.shape)]
+            position = _align(position + array.nbytes)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in sections:
+            f.write(b"\0" * (header["sections"][name][0] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+def _align(position):
+    return (position + ALIGN - 1) // ALIGN * ALIGN
+
+
+# ------------------ Reader ------------------
+class Snapshot:
+    """
+    Memory-mapped view of a snapshot file. Columns are read straight from the
+    mapping; nothing is parsed except the small JSON header.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a snapshot file")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self._mmap[start:start + header_len].decode("utf-8"))
+
+        self.symbols = header["symbols"]
+        self.fields = header["fields"]
+        self.bool_fields = set(header["bool_fields"])
+        self.values = header["values"]
+        self.states = load_states(header.get("indicators", {}))
+        self.field_index = {key: j for j, key in enumerate(self.fields)}
+        self.row = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        self._sections = {}
+        for name, (offset, dtype, shape) in header["sections"].items():
+            count = int(np.prod(shape)) if shape else 1
+            array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            self._sections[name] = array.reshape(shape)
+        self.matrix = self._sections["matrix"]
+        self.ints = self._sections.get("ints")  # None in version 1 snapshots
+        self.offsets = self._sections["offsets"]
+        self._lists = {}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def column(self, key):
+        """Float64 column for `key` (zero-copy), or None if not in the schema."""
+        j = self.field_index.get(key)
+        return None if j is None else self.matrix[j]
+
+    def column_list(self, key):
+        """
+        The column as Python numbers, ints where the data had ints (floats
+        otherwise), converted once and cached.
+        """
+        if key not in self._lists:
+            j = self.field_index[key]
+            values = self.matrix[j].tolist()
+            if self.ints is None:
+                # Version 1 snapshots did not record ints; read integral values as ints
+                values = [int(v) if v == v and v.is_integer() else v for v in values]
+            else:
+                values = [int(v) if i else v for v, i in zip(values, self.ints[j].tolist())]
+            self._lists[key] = values
+        return self._lists[key]
+
+    def bars(self, symbol):
+        i = self.row[symbol]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        bars = Bars(*(self._sections[name][start:end] for name in FIELDS))
+        bars.state = self.states.get(symbol)
+        return bars
+
+    def bar_store(self):
+        """All bars as a BarStore backed by the mapping."""
+        return BarStore(self.symbols, self.offsets, *(self._sections[name] for name in FIELDS))
+
+    def equities(self):
+        return SnapshotEquities(self)
+
+
+class SnapshotRecord(Mapping):
+    """One symbol of a snapshot, read like the `details` dict of stocks.json."""
+
+    __slots__ = ("_snapshot", "_row", "symbol")
+
+    def __init__(self, snapshot, row):
+        self._snapshot = snapshot
+        self._row = row
+        self.symbol = snapshot.symbols[row]
+
+    def get(self, key, default=None):
+        snapshot = self._snapshot
+        if key == "technicals":
+            bars = snapshot.bars(self.symbol)
+            return bars if len(bars) else default
+        if key == "pp":
+            pivots = {}
+            for level in PIVOT_KEYS:
+                if level in snapshot.field_index:
+                    value = snapshot.column_list(level)[self._row]
+                    if value == value:
+                        pivots[level] = value
+            return pivots or default
+        if key in snapshot.field_index:
+            value = snapshot.column_list(key)[self._row]
+            if value != value:  # NaN → missing
+                return default
+            return bool(value) if key in snapshot.bool_fields else value
+        if key in snapshot.values:
+            value = snapshot.values[key][self._row]
+            return default if value is None else value
+        return default
+
+    def __getitem__(self, key):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        for key in self._snapshot.fields:
+            if key not in PIVOT_KEYS and key in self:
+                yield key
+        if self.get("pp") is not None:
+            yield "pp"
+        for key in self._snapshot.values:
+            if key in self:
+                yield key
+        if self.get("technicals") is not None:
+            yield "technicals"
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class SnapshotEquities(Mapping):
+    """
+    {symbol: record} mapping over a snapshot, usable anywhere the strategies
+    expect the stocks.json dict. `snapshot` exposes the underlying columns.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self._records = [SnapshotRecord(snapshot, row) for row in range(len(snapshot))]
+
+    def __getitem__(self, symbol):
+        return self._records[self.snapshot.row[symbol]]
+
+    def __iter__(self):
+        return iter(self.snapshot.symbols)
+
+    def __len__(self):
+        return len(self.snapshot.symbols)
+
+    def items(self):
+        return zip(self.snapshot.symbols, self._records)
+
+    def values(self):
+        return iter(self._records)
+
+
+def load(path):
+    """Open a snapshot and return it as a strategy-ready equities mapping."""
+    return Snapshot(path).equities()
+
+
+def convert(json_file="stocks.json", path="stocks.snap", bars_file=None, columns_file="columns.json"):
+    """Convert stocks.json (plus an optional bar store file) into a snapshot."""
+    equities = load_equities(json_file, bars_file)
+    write_snapshot(equities, path, columns_file)
+    return path
+
+
+if __name__ == "__main__":
+    # Usage: python snapshot.py [stocks.json] [stocks.snap] [stocks.bars.npz]
+    args = sys.argv[1:]
+    out = convert(*args[:3])
+    print(f"✅ Snapshot saved to {out}")
@@ -1,83 +1,231 @@
-def recommend_day_trade(json_data,read_previous_day_price=False):
-    results = []
-    equities = json_data
+import heapq
+from functools import partial
+
+from bars import Bars
+from indicators import state_for
+
+# Screens run by run_all_screens, in output order
+SCREENS = ("day", "swing", "long", "undervalued", "strong")
+
+# ------------------ Shared Per-Symbol Fields ------------------
+class SymbolContext:
+    """
+    Fields several screens derive from one symbol: the price, the bars, the
+    pivot levels and indicator values. Each is worked out once per symbol,
+    however many screens read it.
+    """
+
+    __slots__ = ("symbol", "details", "ldcp", "memo", "_technicals", "_pivot_levels", "_indicators")
+
+    def __init__(self, symbol, details, read_previous_day_price=False, memo=None):
+        self.symbol = symbol
+        self.details = details
+        self.ldcp = read_previous_day_price and details.get("ldcp", 0) or details.get("c", 0)
+        self.memo = memo
+        self._technicals = None
+        self._pivot_levels = None
+        self._indicators = {}
+
+    @property
+    def technicals(self):
+        if self._technicals is None:
+            self._technicals = self.details.get("technicals", [])
+        return self._technicals
+
+    def pivot_levels(self):
+        if self._pivot_levels is None:
+            pp_data = self.details.get("pp") or {}
+            self._pivot_levels = {
+                "Pivot": pp_data.get("pp", self.ldcp),
+                "R1": pp_data.get("r1", 0),
+                "R2": pp_data.get("r2", 0),
+                "R3": pp_data.get("r3", 0),
+                "S1": pp_data.get("s1", 0),
+                "S2": pp_data.get("s2", 0),
+                "S3": pp_data.get("s3", 0),
+            }
+        return self._pivot_levels
+
+    def indicator(self, name, compute):
+        if name not in self._indicators:
+            self._indicators[name] = _memoized(self.memo, self.symbol, self.technicals, name, compute)
+        return self._indicators[name]
+
+    def rsi(self):
+        return self.indicator("rsi", lambda t: calculate_rsi(t, 14))
+
+    def macd_all(self):
+        return self.indicator("macd", calculate_macd_all)
+
+
+def row_function(screen, swing_config=None):
+    """
+    The per-symbol function of a screen: SymbolContext → result row, or None
+    if the symbol is filtered out.
+    """
+    if screen == "swing":
+        return partial(_swing_trade_row, weights=_swing_weights(swing_config))
+    return {
+        "day": _day_trade_row,
+        "long": _long_term_row,
+        "undervalued": _undervalued_row,
+        "strong": _fundamentally_strong_row,
+    }[screen]
+
+
+def iter_screens(json_data, read_previous_day_price=False, swing_config=None, memo=None, screens=SCREENS):
+    """
+    Walk the universe once and yield (screen name, row) for every symbol
+    that passes a screen, in universe order (unsorted). Price, pivots, RSI
+    and MACD are derived once per symbol and shared by every screen.
+    Rows can be streamed straight to an export without keeping them all.
+    """
+    selected = [(name, row_function(name, swing_config)) for name in screens]
+
+    for symbol, details in json_data.items():
+        context = SymbolContext(symbol, details, read_previous_day_price, memo)
+        for name, build_row in selected:
+            row = build_row(context)
+            if row is not None:
+                yield name, row
+
+
+def iter_screen(json_data, screen, read_previous_day_price=False, swing_config=None, memo=None):
+    """Unsorted rows of one screen, generated symbol by symbol."""
+    for _, row in iter_screens(json_data, read_previous_day_price, swing_config, memo, (screen,)):
+        yield row
+
+
+def ranked(rows, screen, top_k=None):
+    """
+    A screen's rows best first. With `top_k` only the best top_k are kept,
+    picked with a heap instead of sorting every row (same order and ties
+    as the full sort).
+    """
+    if top_k is None:
+        return sorted(rows, key=SORT_KEYS[screen], reverse=True)
+    return heapq.nlargest(max(top_k, 0), rows, key=SORT_KEYS[screen])
+
+def run_all_screens(json_data, read_previous_day_price=False, swing_config=None, memo=None, screens=SCREENS,
+                    top_k=None):
+    """
+    Run several screens in one pass over the universe (see iter_screens).
+
+    Args:
+        json_data: {symbol: details} dict or snapshot equities
+        read_previous_day_price (bool): price from "ldcp" instead of "c"
+        swing_config: optional swing scoring weights (see SWING_WEIGHTS)
+        memo: optional indicators.IndicatorMemo kept across runs
+        screens: names from SCREENS to run
+        top_k (int): keep only the best top_k rows of each screen
+    Returns:
+        dict: {screen name: sorted result list}, same rows as the
+        individual recommend_* / find_* functions
+    """
+    results = {name: [] for name in screens}
+    for name, row in iter_screens(json_data, read_previous_day_price, swing_config, memo, screens):
+        results[name].append(row)
+
+    return {name: ranked(rows, name, top_k) for name, rows in results.items()}
+
+# ------------------ Day Trading Strategy ------------------
+def recommend_day_trade(json_data,read_previous_day_price=False, top_k=None):
+    return run_all_screens(json_data, read_previous_day_price, screens=("day",), top_k=top_k)["day"]
+
+def _day_trade_row(context):
+    details = context.details
+    ldcp = context.ldcp
+    pch = details.get("pch", 0)
+    v = details.get("v", 0)
+    vm = details.get("vm", 0)
+    rsi = details.get("rsi", None)
+    uc = details.get("uc", 0)
+    lc = details.get("lc", 0)
+
+    if ldcp <= 0:
+        return None
     
-    for symbol, details in equities.items():
-        ldcp = read_previous_day_price and details.get("ldcp", 0) or details.get("c", 0)
-        pch = details.get("pch", 0)
-        v = details.get("v", 0)
-        vm = details.get("vm", 0)
-        rsi = details.get("rsi", None)
-        uc = details.get("uc", 0)
-        lc = details.get("lc", 0)
-        pp_data = details.get("pp") or {}
-
-        if ldcp <= 0:
-            continue
-        
-        rel_vol = (v / vm) if vm else 0
-        volatility = ((uc - lc) / ldcp * 100) if ldcp > 0 else 0
-        
-        score = 0
-        near_level = None
-        
-        # Momentum
-        if pch > 2:
-            score += 2
-        elif pch < -2:
-            score += 1
-        
-        # Volume
-        if rel_vol > 2:
+    rel_vol = (v / vm) if vm else 0
+    volatility = ((uc - lc) / ldcp * 100) if ldcp > 0 else 0
+    
+    score = 0
+    near_level = None
+    
+    # Momentum
+    if pch > 2:
+        score += 2
+    elif pch < -2:
+        score += 1
+    
+    # Volume
+    if rel_vol > 2:
+        score += 2
+    elif rel_vol > 1:
+        score += 1
+    
+    # RSI
+    if rsi and abs(rsi) < 1000:
+        if rsi < 30:
             score += 2
-        elif rel_vol > 1:
+        elif rsi > 70:
             score += 1
-        
-        # RSI
-        if rsi and abs(rsi) < 1000:
-            if rsi < 30:
-                score += 2
-            elif rsi > 70:
-                score += 1
-        
-        # Volatility
-        if volatility > 5:
+    
+    # Volatility
+    if volatility > 5:
+        score += 1
+    
+    # Pivot proximity
+    for level_name, level_value in context.pivot_levels().items():
+        if level_value and abs(ldcp - level_value) / ldcp < 0.02:
+            near_level = level_name
             score += 1
-        
-        # Pivot proximity
-        pivot_levels = {
-            "Pivot": pp_data.get("pp", ldcp),
-            "R1": pp_data.get("r1", 0),
-            "R2": pp_data.get("r2", 0),
-            "R3": pp_data.get("r3", 0),
-            "S1": pp_data.get("s1", 0),
-            "S2": pp_data.get("s2", 0),
-            "S3": pp_data.get("s3", 0),
-        }
-        
-        for level_name, level_value in pivot_levels.items():
-            if level_value and abs(ldcp - level_value) / ldcp < 0.02:
-                near_level = level_name
-                score += 1
-                break
-        
-        results.append({
-            "symbol": symbol,
-            "name": details.get("nm", ""),
-            "price": ldcp,
-            "pch": pch,
-            "volume": v,
-            "rel_vol": round(rel_vol, 2),
-            "rsi": round(rsi, 2) if rsi and abs(rsi) < 1000 else None,
-            "volatility_%": round(volatility, 2),
-            "near_level": near_level,
-            "score": score
-        })
+            break
     
-    return sorted(results, key=lambda x: (x["score"], x["rel_vol"]), reverse=True)
+    return {
+        "symbol": context.symbol,
+        "name": details.get("nm", ""),
+        "price": ldcp,
+        "pch": pch,
+        "volume": v,
+        "rel_vol": round(rel_vol, 2),
+        "rsi": round(rsi, 2) if rsi and abs(rsi) < 1000 else None,
+        "volatility_%": round(volatility, 2),
+        "near_level": near_level,
+        "score": score
+    }
+
+def _day_trade_key(x):
+    return (x["score"], x["rel_vol"])
 
 # ------------------ Swing Trading Strategy ------------------
-def recommend_swing_trade(json_data, config=None, read_previous_day_price=False):
+# --- Default weights ---
+SWING_WEIGHTS = {
+    "pch_positive": 2,
+    "pch_negative": -1,
+    "rel_vol_high": 2,
+    "rel_vol_medium": 1,
+    "rsi_oversold": 2,
+    "rsi_overbought": -1,
+    "volatility_high": 1,
+    "trend_bullish": 2,
+    "trend_bearish": -1,
+    "momentum_week": 1,
+    "momentum_month": 1,
+    "pivot_near": 1,
+    "pivot_support_bounce": 2,
+    "pivot_resistance_reject": -1,
+    "macd_bullish": 1,
+}
+
+FAIR_PE = 15  # assumed fair P/E for valuation
+
+def _swing_weights(config=None):
+    weights = dict(SWING_WEIGHTS)
+    if config:
+        weights.update(config)
+    return weights
+
+def recommend_swing_trade(json_data, config=None, read_previous_day_price=False, memo=None, top_k=None):
     """
     Swing trade screener — enhanced logic with trend, momentum, volume, RSI, and pivots.
     Includes reasons for each score component.
@@ -85,465 +233,447 @@ def recommend_swing_trade(json_data, config=None, read_previous_day_price=False)
     Args:
         json_data: JSON data from screener (with 'data' > 'eq' structure)
         config: optional dict of scoring weights
+        memo: optional indicators.IndicatorMemo shared with other screens
+        top_k: optional number of best candidates to return
     Returns:
         Sorted list of swing trade candidates with reasons
     """
+    return run_all_screens(json_data, read_previous_day_price, config, memo, screens=("swing",), top_k=top_k)["swing"]
+
+def _swing_trade_row(context, weights):
+    details = context.details
+    symbol = context.symbol
+    technicals = context.technicals
+    memo = context.memo
+    reasons = []  # <-- store explanations
+    ldcp = context.ldcp
+    pch = details.get("pch", 0)
+    v = details.get("v", 0)
+    vm = details.get("vm", 0)
+    uc = details.get("uc", 0)
+    lc = details.get("lc", 0)
+    eps = details.get("eps", None)
+    fair_price = None
+
+    if eps:
+        fair_price = round(eps * FAIR_PE, 2)
+
+    rsi = context.rsi()
+    # Skip invalids / illiquid
+    if not ldcp or rsi == None or rsi == 0 or v == 0:
+        return None
+    # --- Derived Metrics ---
+    rel_vol = (v / vm) if vm else 0
+    volatility = ((uc - lc) / ldcp * 100) if ldcp > 0 else 0
+    score = 0
+    near_level = None
+
+    # --- Momentum (Daily) ---
+    if pch > 2:
+        score += weights["pch_positive"]
+        reasons.append(f"Positive daily change ({pch:.2f}%)")
+    elif pch < -2:
+        score += weights["pch_negative"]
+        reasons.append(f"Negative daily change ({pch:.2f}%)")
+
+    # --- Volume Strength ---
+    if rel_vol > 2:
+        score += weights["rel_vol_high"]
+        reasons.append(f"High relative volume ({rel_vol:.2f}× avg)")
+    elif rel_vol > 1:
+        score += weights["rel_vol_medium"]
+        reasons.append(f"Moderate relative volume ({rel_vol:.2f}× avg)")
+
+    # --- RSI ---
+    if rsi and abs(rsi) < 1000:
+        if rsi < 30:
+            score += weights["rsi_oversold"]
+            reasons.append(f"RSI oversold ({rsi:.2f})")
+        elif rsi > 70:
+            score += weights["rsi_overbought"]
+            reasons.append(f"RSI overbought ({rsi:.2f})")
+
+    # --- Volatility ---
+    if volatility > 5:
+        score += weights["volatility_high"]
+        reasons.append(f"High volatility ({volatility:.2f}%)")
+
+    # --- Trend Confirmation (SMA) ---
+    sma_20 = context.indicator("sma20", lambda t: calculate_sma(t, 20))
+    sma_50 = context.indicator("sma50", lambda t: calculate_sma(t, 50))
+    if sma_20 and sma_50:
+        if sma_20 > sma_50:
+            score += weights["trend_bullish"]
+            reasons.append(f"Bullish trend (SMA20 {sma_20:.2f} > SMA50 {sma_50:.2f})")
+        elif sma_20 < sma_50:
+            score += weights["trend_bearish"]
+            reasons.append(f"Bearish trend (SMA20 {sma_20:.2f} < SMA50 {sma_50:.2f})")
+
+    # --- Multi-Timeframe Momentum ---
+    p1m = details.get("p1m", 0)
+    p1w = details.get("p1w", 0)
+    pch_1w = calculate_pch(ldcp, p1w)
+    pch_1m = calculate_pch(ldcp, p1m)
+
+    if pch_1w > 3:
+        score += weights["momentum_week"]
+        reasons.append(f"Weekly momentum strong ({pch_1w:.2f}%)")
+    if pch_1m > 5:
+        score += weights["momentum_month"]
+        reasons.append(f"Monthly momentum strong ({pch_1m:.2f}%)")
+
+    # --- Pivot Point Proximity ---
+    pivot_levels = context.pivot_levels()
+    near_level = min(pivot_levels.items(), key=lambda x: abs(ldcp - x[1]) if x[1] else float('inf'))[0]
+    if(near_level == "Pivot"):
+        score += weights["pivot_near"]
+        reasons.append(f"Near {near_level} pivot level")
+    # Bounce/Reject Logic
+    elif near_level in ("S1", "S2","S3") and rsi and rsi < 35:
+        score += weights["pivot_support_bounce"]
+        reasons.append(f"Bounce from {near_level} with RSI {rsi:.2f}")
+    elif near_level in ("R1", "R2","R3") and rsi and rsi > 65:
+        score += weights["pivot_resistance_reject"]
+        reasons.append(f"Rejection from {near_level} with RSI {rsi:.2f}")
+    
 
-    # --- Default weights ---
-    weights = {
-        "pch_positive": 2,
-        "pch_negative": -1,
-        "rel_vol_high": 2,
-        "rel_vol_medium": 1,
-        "rsi_oversold": 2,
-        "rsi_overbought": -1,
-        "volatility_high": 1,
-        "trend_bullish": 2,
-        "trend_bearish": -1,
-        "momentum_week": 1,
-        "momentum_month": 1,
-        "pivot_near": 1,
-        "pivot_support_bounce": 2,
-        "pivot_resistance_reject": -1,
-        "macd_bullish": 1,
+    # --- MACD Confirmation ---
+    macd, macd_signal, _ = context.macd_all()
+    if macd and macd_signal and macd > macd_signal:
+        score += weights["macd_bullish"]
+        reasons.append(f"MACD bullish crossover ({macd:.2f} > {macd_signal:.2f})")
+    elif macd and macd_signal:
+        reasons.append(f"MACD bearish ({macd:.2f} < {macd_signal:.2f})")
+
+    # --- Collect Result ---
+    return {
+        "symbol": symbol,
+        "name": details.get("nm", ""),
+        "price": ldcp,
+        "volume": v,
+        "rsi": round(rsi, 2) if rsi and abs(rsi) < 1000 else 0,
+        "near_level": near_level,
+        "score": score,
+        "fair_price": fair_price,
+        "reasons": reasons,  # <-- added
     }
 
-    if config:
-        weights.update(config)
-
-    results = []
-    equities = json_data
-    FAIR_PE = 15  # assumed fair P/E for valuation
-    for symbol, details in equities.items():
-        if(symbol=="UNITY"):
-            print(pivot_levels)
-        reasons = []  # <-- store explanations
-        ldcp = read_previous_day_price and details.get("ldcp", 0) or details.get("c", 0)
-        pch = details.get("pch", 0)
-        v = details.get("v", 0)
-        vm = details.get("vm", 0)
-        rsi = details.get("rsi", None)
-        uc = details.get("uc", 0)
-        lc = details.get("lc", 0)
-        pp_data = details.get("pp") or {}
-        eps = details.get("eps", None)
-        fair_price = None
-        valuation_note = None
-
-        if eps:
-            fair_price = round(eps * FAIR_PE, 2)
-        
-
-        technicals = details.get("technicals", [])
-        rsi = calculate_rsi(technicals, 14)
-# Skip invalids / illiquid
-        if not ldcp or rsi == None or rsi == 0 or v == 0:
-            continue
-        # --- Derived Metrics ---
-        rel_vol = (v / vm) if vm else 0
-        volatility = ((uc - lc) / ldcp * 100) if ldcp > 0 else 0
-        score = 0
-        near_level = None
-
-        # --- Momentum (Daily) ---
-        if pch > 2:
-            score += weights["pch_positive"]
-            reasons.append(f"Positive daily change ({pch:.2f}%)")
-        elif pch < -2:
-            score += weights["pch_negative"]
-            reasons.append(f"Negative daily change ({pch:.2f}%)")
-
-        # --- Volume Strength ---
-        if rel_vol > 2:
-            score += weights["rel_vol_high"]
-            reasons.append(f"High relative volume ({rel_vol:.2f}× avg)")
-        elif rel_vol > 1:
-            score += weights["rel_vol_medium"]
-            reasons.append(f"Moderate relative volume ({rel_vol:.2f}× avg)")
-
-        # --- RSI ---
-        if rsi and abs(rsi) < 1000:
-            if rsi < 30:
-                score += weights["rsi_oversold"]
-                reasons.append(f"RSI oversold ({rsi:.2f})")
-            elif rsi > 70:
-                score += weights["rsi_overbought"]
-                reasons.append(f"RSI overbought ({rsi:.2f})")
-
-        # --- Volatility ---
-        if volatility > 5:
-            score += weights["volatility_high"]
-            reasons.append(f"High volatility ({volatility:.2f}%)")
-
-        # --- Trend Confirmation (SMA) ---
-        sma_20 = calculate_sma(technicals, 20)
-        sma_50 = calculate_sma(technicals, 50)
-        if sma_20 and sma_50:
-            if sma_20 > sma_50:
-                score += weights["trend_bullish"]
-                reasons.append(f"Bullish trend (SMA20 {sma_20:.2f} > SMA50 {sma_50:.2f})")
-            elif sma_20 < sma_50:
-                score += weights["trend_bearish"]
-                reasons.append(f"Bearish trend (SMA20 {sma_20:.2f} < SMA50 {sma_50:.2f})")
-
-        # --- Multi-Timeframe Momentum ---
-        p1m = details.get("p1m", 0)
-        p1w = details.get("p1w", 0)
-        pch_1w = calculate_pch(ldcp, p1w)
-        pch_1m = calculate_pch(ldcp, p1m)
-
-        if pch_1w > 3:
-            score += weights["momentum_week"]
-            reasons.append(f"Weekly momentum strong ({pch_1w:.2f}%)")
-        if pch_1m > 5:
-            score += weights["momentum_month"]
-            reasons.append(f"Monthly momentum strong ({pch_1m:.2f}%)")
-
-        # --- Pivot Point Proximity ---
-        pivot_levels = {
-            "Pivot": pp_data.get("pp", ldcp),
-            "R1": pp_data.get("r1", 0),
-            "R2": pp_data.get("r2", 0),
-            "R3": pp_data.get("r3", 0),
-            "S1": pp_data.get("s1", 0),
-            "S2": pp_data.get("s2", 0),
-            "S3": pp_data.get("s3", 0),
-        }
-        near_level = min(pivot_levels.items(), key=lambda x: abs(ldcp - x[1]) if x[1] else float('inf'))[0]
-        if(near_level == "Pivot"):
-            score += weights["pivot_near"]
-            reasons.append(f"Near {near_level} pivot level")
-        # Bounce/Reject Logic
-        elif near_level in ("S1", "S2","S3") and rsi and rsi < 35:
-            score += weights["pivot_support_bounce"]
-            reasons.append(f"Bounce from {near_level} with RSI {rsi:.2f}")
-        elif near_level in ("R1", "R2","R3") and rsi and rsi > 65:
-            score += weights["pivot_resistance_reject"]
-            reasons.append(f"Rejection from {near_level} with RSI {rsi:.2f}")
-        
-
-        # --- MACD Confirmation ---
-        macd = calculate_macd(technicals, 12, 26, 9, 'M')
-        macd_signal = calculate_macd(technicals, 12, 26, 9, 'S')
-        if macd and macd_signal and macd > macd_signal:
-            score += weights["macd_bullish"]
-            reasons.append(f"MACD bullish crossover ({macd:.2f} > {macd_signal:.2f})")
-        elif macd and macd_signal:
-            reasons.append(f"MACD bearish ({macd:.2f} < {macd_signal:.2f})")
-
-        # --- Collect Result ---
-        results.append({
-            "symbol": symbol,
-            "name": details.get("nm", ""),
-            "price": ldcp,
-            "volume": v,
-            "rsi": round(rsi, 2) if rsi and abs(rsi) < 1000 else 0,
-            "near_level": near_level,
-            "score": score,
-            "fair_price": fair_price,
-            "reasons": reasons,  # <-- added
-        })
-
-    # --- Sort & Return ---
-    return sorted(results, key=lambda x: (x["volume"], -x['rsi']), reverse=True)
+def _swing_trade_key(x):
+    return (x["volume"], -x['rsi'])
 
 # ------------------ Long Term Strategy ------------------
 # ------------------ Long Term Strategy (Extended) ------------------
-def recommend_long_term(json_data,read_previous_day_price=False):
-    results = []
-    equities = json_data
-
-    for symbol, details in equities.items():
-        ldcp = read_previous_day_price and details.get("ldcp", 0) or details.get("c", 0)
-        eps = details.get("eps", 0)
-        roe = details.get("roe", None)
-        roa = details.get("roa", None)
-        pat = details.get("pat", 0)
-        bv = details.get("bval", None)
-        per = details.get("per", None)  # P/E
-        pbr = details.get("pbr", None)  # P/B
-        psr = details.get("psr", None)  # P/S
-        dy = details.get("divy", None)    # Dividend Yield %
-        div_cover = details.get("divc", None)
-        npm = details.get("npm", None)  # Net Profit Margin %
-        opm = details.get("opm", None)  # Operating Profit Margin %
-        roce = details.get("roce", None)  # Return on Capital Employed
-
-        # --- Balance Sheet Strength ---
-        # Calculate equity
-        equity = (details.get("share_cap", 0) or 0) + (details.get("res", 0) or 0)
-        total_debt = details.get("tr_debt", 0) or 0
-
-        debt_equity = details.get("grat", None)  # Debt/Equity ratio
-        
-
-        if debt_equity is not None and debt_equity < 1:
-            score += 2; reasons.append(f"Low Debt/Equity {round(debt_equity, 2)}")
-        
-        
-        
-        int_cover = details.get("intc", None)  # Interest Cover
-        current_ratio = details.get("curr", None)
-        quick_ratio = details.get(" ", None)
-        fcf = details.get("fc", None)   # Free Cash Flow
-        fcf = (details.get("opp", 0) or 0) - (details.get("ppeq", 0) or 0)
-        sales = details.get("sales", 0)
-        sales_growth = details.get("%chg1y", None)  # Approx using 1Y % Change
-
-        if ldcp <= 0:
-            continue
+def recommend_long_term(json_data,read_previous_day_price=False, top_k=None):
+    return run_all_screens(json_data, read_previous_day_price, screens=("long",), top_k=top_k)["long"]
+
+def _long_term_row(context):
+    details = context.details
+    ldcp = context.ldcp
+    eps = details.get("eps", 0)
+    roe = details.get("roe", None)
+    roa = details.get("roa", None)
+    pat = details.get("pat", 0)
+    bv = details.get("bval", None)
+    per = details.get("per", None)  # P/E
+    pbr = details.get("pbr", None)  # P/B
+    psr = details.get("psr", None)  # P/S
+    dy = details.get("divy", None)    # Dividend Yield %
+    div_cover = details.get("divc", None)
+    npm = details.get("npm", None)  # Net Profit Margin %
+    opm = details.get("opm", None)  # Operating Profit Margin %
+    roce = details.get("roce", None)  # Return on Capital Employed
+
+    # --- Balance Sheet Strength ---
+    debt_equity = details.get("grat", None)  # Debt/Equity ratio
+    int_cover = details.get("intc", None)  # Interest Cover
+    current_ratio = details.get("curr", None)
+    quick_ratio = details.get(" ", None)
+    fcf = (details.get("opp", 0) or 0) - (details.get("ppeq", 0) or 0)  # Free Cash Flow
+    sales = details.get("sales", 0)
+    sales_growth = details.get("%chg1y", None)  # Approx using 1Y % Change
+
+    if ldcp <= 0:
+        return None
 
-        score = 0
-        reasons = []
-
-        # --- Profitability ---
-        if eps > 0:
-            score += 2; reasons.append("EPS positive")
-        if roe and roe > 12:
-            score += 2; reasons.append(f"ROE {roe}% strong")
-        if roa and roa > 6:
-            score += 1; reasons.append(f"ROA {roa}% healthy")
-        if roce and roce > 10:
-            score += 1; reasons.append(f"ROCE {roce}% good")
-        if pat > 0:
-            score += 1; reasons.append("PAT positive")
-        if npm and npm > 8:
-            score += 1; reasons.append("High Net Profit Margin")
-        if opm and opm > 12:
-            score += 1; reasons.append("High Operating Margin")
-
-        # --- Valuation ---
-        if per and 5 < per < 15:
-            score += 2; reasons.append(f"Reasonable PE {per}")
-        if pbr and pbr < 2:
-            score += 1; reasons.append(f"Cheap PB {pbr}")
-        if psr and psr < 2:
-            score += 1; reasons.append("Good PS ratio")
-        if bv and ldcp < bv:
-            score += 2; reasons.append("Price below Book Value")
-        if dy and dy > 3:
-            score += 1; reasons.append(f"Attractive Dividend Yield {dy}%")
-        if div_cover and div_cover > 2:
-            score += 1; reasons.append("Dividend well covered")
-
-        # --- Balance Sheet Strength ---
-        if debt_equity is not None and debt_equity < 1:
-            score += 2; reasons.append("Low Debt/Equity")
-        if int_cover and int_cover > 3:
-            score += 1; reasons.append("Comfortable Interest Cover")
-        if current_ratio and current_ratio > 1.5:
-            score += 1; reasons.append("Healthy Current Ratio")
-        if quick_ratio and quick_ratio > 1:
-            score += 1; reasons.append("Healthy Quick Ratio")
-
-        # --- Cash Flow ---
-        if fcf and fcf > 0:
-            score += 2; reasons.append("Positive Free Cash Flow")
-
-        # --- Growth ---
-        if sales and sales > 0:
-            score += 1; reasons.append("Sales positive")
-        if sales_growth and sales_growth > 5:
-            score += 1; reasons.append(f"Sales growth {sales_growth}%")
-
-        results.append({
-            "symbol": symbol,
-            "name": details.get("nm", ""),
-            "price": ldcp,
-            "eps": eps,
-            "roe": roe,
-            "roa": roa,
-            "pat": pat,
-            "per": per,
-            "pbr": pbr,
-            "dy": dy,
-            "debt_equity": debt_equity,
-            "int_cover": int_cover,
-            "current_ratio": current_ratio,
-            "quick_ratio": quick_ratio,
-            "fcf": fcf,
-            "score": score,
-            "reasons": "; ".join(reasons)
-        })
+    score = 0
+    reasons = []
+
+    # --- Profitability ---
+    if eps > 0:
+        score += 2; reasons.append("EPS positive")
+    if roe and roe > 12:
+        score += 2; reasons.append(f"ROE {roe}% strong")
+    if roa and roa > 6:
+        score += 1; reasons.append(f"ROA {roa}% healthy")
+    if roce and roce > 10:
+        score += 1; reasons.append(f"ROCE {roce}% good")
+    if pat > 0:
+        score += 1; reasons.append("PAT positive")
+    if npm and npm > 8:
+        score += 1; reasons.append("High Net Profit Margin")
+    if opm and opm > 12:
+        score += 1; reasons.append("High Operating Margin")
+
+    # --- Valuation ---
+    if per and 5 < per < 15:
+        score += 2; reasons.append(f"Reasonable PE {per}")
+    if pbr and pbr < 2:
+        score += 1; reasons.append(f"Cheap PB {pbr}")
+    if psr and psr < 2:
+        score += 1; reasons.append("Good PS ratio")
+    if bv and ldcp < bv:
+        score += 2; reasons.append("Price below Book Value")
+    if dy and dy > 3:
+        score += 1; reasons.append(f"Attractive Dividend Yield {dy}%")
+    if div_cover and div_cover > 2:
+        score += 1; reasons.append("Dividend well covered")
+
+    # --- Balance Sheet Strength ---
+    if debt_equity is not None and debt_equity < 1:
+        score += 2; reasons.append("Low Debt/Equity")
+    if int_cover and int_cover > 3:
+        score += 1; reasons.append("Comfortable Interest Cover")
+    if current_ratio and current_ratio > 1.5:
+        score += 1; reasons.append("Healthy Current Ratio")
+    if quick_ratio and quick_ratio > 1:
+        score += 1; reasons.append("Healthy Quick Ratio")
+
+    # --- Cash Flow ---
+    if fcf and fcf > 0:
+        score += 2; reasons.append("Positive Free Cash Flow")
+
+    # --- Growth ---
+    if sales and sales > 0:
+        score += 1; reasons.append("Sales positive")
+    if sales_growth and sales_growth > 5:
+        score += 1; reasons.append(f"Sales growth {sales_growth}%")
+
+    return {
+        "symbol": context.symbol,
+        "name": details.get("nm", ""),
+        "price": ldcp,
+        "eps": eps,
+        "roe": roe,
+        "roa": roa,
+        "pat": pat,
+        "per": per,
+        "pbr": pbr,
+        "dy": dy,
+        "debt_equity": debt_equity,
+        "int_cover": int_cover,
+        "current_ratio": current_ratio,
+        "quick_ratio": quick_ratio,
+        "fcf": fcf,
+        "score": score,
+        "reasons": "; ".join(reasons)
+    }
 
+def _long_term_key(x):
     # Sort by score (high to low), then by ROE, then by EPS
-    return sorted(results, key=lambda x: (x["score"], x["roe"] if x["roe"] else 0, x["eps"]), reverse=True)
+    return (x["score"], x["roe"] if x["roe"] else 0, x["eps"])
 
 # ------------------ Undervalued Strategy ------------------
-def find_undervalued(json_data,read_previous_day_price=False):
-    results = []
-    equities = json_data
-
-    for symbol, details in equities.items():
-        ldcp = read_previous_day_price and details.get("ldcp", 0) or details.get("c", 0)  # last price
-        eps = details.get("eps", 0)
-        roe = details.get("roe", None)
-        pat = details.get("pat", 0)
-        bv = details.get("bval", None)  # book value (if available)
-
-        if ldcp <= 0 or eps <= 0:
-            continue
-
-        pe_ratio = ldcp / eps if eps > 0 else None
-        score = 0
+def find_undervalued(json_data,read_previous_day_price=False, top_k=None):
+    return run_all_screens(json_data, read_previous_day_price, screens=("undervalued",), top_k=top_k)["undervalued"]
+
+def _undervalued_row(context):
+    details = context.details
+    ldcp = context.ldcp  # last price
+    eps = details.get("eps", 0)
+    roe = details.get("roe", None)
+    pat = details.get("pat", 0)
+    bv = details.get("bval", None)  # book value (if available)
+
+    if ldcp <= 0 or eps <= 0:
+        return None
 
-        # undervaluation logic
-        if pe_ratio and pe_ratio < 10:  # cheap PE
-            score += 2
-        if roe and roe > 10:  # good return
-            score += 1
-        if pat > 0:
-            score += 1
-        if bv and ldcp < bv:  # trading below book value
-            score += 2
+    pe_ratio = ldcp / eps if eps > 0 else None
+    score = 0
+
+    # undervaluation logic
+    if pe_ratio and pe_ratio < 10:  # cheap PE
+        score += 2
+    if roe and roe > 10:  # good return
+        score += 1
+    if pat > 0:
+        score += 1
+    if bv and ldcp < bv:  # trading below book value
+        score += 2
+
+    if score > 0:
+        return {
+            "symbol": context.symbol,
+            "name": details.get("nm", ""),
+            "price": ldcp,
+            "eps": eps,
+            "roe": roe,
+            "pat": pat,
+            "pe_ratio": round(pe_ratio, 2) if pe_ratio else None,
+            "book_value": bv,
+            "score": score
+        }
+    return None
 
-        if score > 0:
-            results.append({
-                "symbol": symbol,
-                "name": details.get("nm", ""),
-                "price": ldcp,
-                "eps": eps,
-                "roe": roe,
-                "pat": pat,
-                "pe_ratio": round(pe_ratio, 2) if pe_ratio else None,
-                "book_value": bv,
-                "score": score
-            })
-
-    return sorted(results, key=lambda x: (x["score"], -x["pe_ratio"] if x["pe_ratio"] else 9999), reverse=True)
+def _undervalued_key(x):
+    return (x["score"], -x["pe_ratio"] if x["pe_ratio"] else 9999)
 
 # ------------------ Fundamentally Strong & Undervalued Strategy ------------------
-def find_fundamentally_strong(json_data,read_previous_day_price=False):
+def find_fundamentally_strong(json_data,read_previous_day_price=False, memo=None, top_k=None):
     """
     Identify fundamentally strong and undervalued stocks.
     Combines profitability, balance sheet health, valuation,
     and adds technical confirmation using RSI and MACD.
+    Pass an indicators.IndicatorMemo as `memo` to share indicator values
+    with other screens over the same data, and `top_k` to get only the
+    best top_k stocks.
     """
-    results = []
-    equities = json_data
-
-    for symbol, details in equities.items():
-        ldcp = read_previous_day_price and details.get("ldcp", 0) or details.get("c", 0)
-        eps = details.get("eps", 0)
-        roe = details.get("roe")
-        roa = details.get("roa")
-        per = details.get("per")
-        pbr = details.get("pbr")
-        dy = details.get("divy")
-        bv = details.get("bval")
-        pat = details.get("pat", 0)
-        npm = details.get("npm")
-        opm = details.get("opm")
-        roce = details.get("roce")
-        debt_equity = details.get("grat")
-        int_cover = details.get("intc")
-        current_ratio = details.get("curr")
-        sales_growth = details.get("%chg1y")
-        technicals = details.get("technicals", [])
-
-        rsi = calculate_rsi(technicals, 14)
-
-        if ldcp <= 0 or eps <= 0:
-            continue
+    return run_all_screens(json_data, read_previous_day_price, memo=memo, screens=("strong",), top_k=top_k)["strong"]
+
+def _fundamentally_strong_row(context):
+    details = context.details
+    ldcp = context.ldcp
+    eps = details.get("eps", 0)
+    roe = details.get("roe")
+    roa = details.get("roa")
+    per = details.get("per")
+    pbr = details.get("pbr")
+    dy = details.get("divy")
+    bv = details.get("bval")
+    pat = details.get("pat", 0)
+    npm = details.get("npm")
+    opm = details.get("opm")
+    roce = details.get("roce")
+    debt_equity = details.get("grat")
+    int_cover = details.get("intc")
+    current_ratio = details.get("curr")
+    sales_growth = details.get("%chg1y")
+    technicals = context.technicals
+
+    rsi = context.rsi()
+
+    if ldcp <= 0 or eps <= 0:
+        return None
 
-        score = 0
-        reasons = []
-
-        # --- Profitability ---
-        if roe and roe > 15:
-            score += 2; reasons.append(f"High ROE {roe}%")
-        if roa and roa > 6:
-            score += 1; reasons.append(f"Healthy ROA {roa}%")
-        if npm and npm > 10:
-            score += 1; reasons.append(f"Good NPM {npm}%")
-        if opm and opm > 12:
-            score += 1; reasons.append(f"Good OPM {opm}%")
-        if roce and roce > 10:
-            score += 1; reasons.append(f"Solid ROCE {roce}%")
-        if pat > 0:
-            score += 1; reasons.append("Positive PAT")
-
-        # --- Valuation ---
-        if per and 5 < per < 12:
-            score += 2; reasons.append(f"Attractive PE {per}")
-        elif per and per < 5:
-            score += 1; reasons.append(f"Very Low PE {per} (possible value trap)")
-        if pbr and pbr < 1.5:
-            score += 1; reasons.append(f"Low PB {pbr}")
-        if bv and ldcp < bv:
-            score += 2; reasons.append("Price below Book Value")
-        if dy and dy > 3:
-            score += 1; reasons.append(f"Good Dividend Yield {dy}%")
-
-        # --- Balance Sheet Strength ---
-        if debt_equity is not None and debt_equity < 0.5:
-            score += 2; reasons.append(f"Low Debt/Equity {debt_equity}")
-        elif debt_equity is not None and debt_equity < 1:
-            score += 1; reasons.append(f"Moderate Debt/Equity {debt_equity}")
-        if int_cover and int_cover > 3:
-            score += 1; reasons.append("Comfortable Interest Coverage")
-        if current_ratio and current_ratio > 1.5:
-            score += 1; reasons.append("Healthy Current Ratio")
-
-        # --- Technical Indicators ---
-        macd_value = None
-        macd_signal = None
-        macd_hist = None
-
-        if technicals:
-            try:
-                macd_value = calculate_macd(technicals, mode='M')
-                macd_signal = calculate_macd(technicals, mode='S')
-                macd_hist = calculate_macd(technicals, mode='H')
-            except Exception as e:
-                macd_value = macd_signal = macd_hist = None
-
-        # RSI Buy Zone (oversold / rising)
-        if rsi:
-            if rsi < 30:
-                score += 1; reasons.append(f"RSI {rsi} — Oversold (Potential Reversal)")
-            elif 30 <= rsi <= 45:
-                score += 0.5; reasons.append(f"RSI {rsi} — Early Accumulation Zone")
-
-        # MACD Confirmation (MACD > Signal and Histogram > 0)
-        if macd_value is not None and macd_signal is not None:
-            if macd_value > macd_signal and macd_hist and macd_hist > 0:
-                score += 1.5; reasons.append(f"MACD Bullish Crossover ({macd_value}>{macd_signal})")
-            elif macd_value < macd_signal and macd_hist and macd_hist < 0:
-                reasons.append(f"MACD Bearish ({macd_value}<{macd_signal})")
-
-        # --- Combine Undervaluation & Strength ---
-        if score >= 7:
-            results.append({
-                "symbol": symbol,
-                "name": details.get("nm", ""),
-                "price": ldcp,
-                "eps": eps,
-                "roe": roe,
-                "roa": roa,
-                "per": per,
-                "pbr": pbr,
-                "dy": dy,
-                "bv": bv,
-                "rsi": rsi,
-                "macd": macd_value,
-                "macd_signal": macd_signal,
-                "macd_hist": macd_hist,
-                "debt_equity": debt_equity,
-                "npm": npm,
-                "roce": roce,
-                "current_ratio": current_ratio,
-                "sales_growth": sales_growth,
-                "score": round(score, 2),
-                "reasons": "; ".join(reasons)
-            })
+    score = 0
+    reasons = []
+
+    # --- Profitability ---
+    if roe and roe > 15:
+        score += 2; reasons.append(f"High ROE {roe}%")
+    if roa and roa > 6:
+        score += 1; reasons.append(f"Healthy ROA {roa}%")
+    if npm and npm > 10:
+        score += 1; reasons.append(f"Good NPM {npm}%")
+    if opm and opm > 12:
+        score += 1; reasons.append(f"Good OPM {opm}%")
+    if roce and roce > 10:
+        score += 1; reasons.append(f"Solid ROCE {roce}%")
+    if pat > 0:
+        score += 1; reasons.append("Positive PAT")
+
+    # --- Valuation ---
+    if per and 5 < per < 12:
+        score += 2; reasons.append(f"Attractive PE {per}")
+    elif per and per < 5:
+        score += 1; reasons.append(f"Very Low PE {per} (possible value trap)")
+    if pbr and pbr < 1.5:
+        score += 1; reasons.append(f"Low PB {pbr}")
+    if bv and ldcp < bv:
+        score += 2; reasons.append("Price below Book Value")
+    if dy and dy > 3:
+        score += 1; reasons.append(f"Good Dividend Yield {dy}%")
+
+    # --- Balance Sheet Strength ---
+    if debt_equity is not None and debt_equity < 0.5:
+        score += 2; reasons.append(f"Low Debt/Equity {debt_equity}")
+    elif debt_equity is not None and debt_equity < 1:
+        score += 1; reasons.append(f"Moderate Debt/Equity {debt_equity}")
+    if int_cover and int_cover > 3:
+        score += 1; reasons.append("Comfortable Interest Coverage")
+    if current_ratio and current_ratio > 1.5:
+        score += 1; reasons.append("Healthy Current Ratio")
+
+    # --- Technical Indicators ---
+    macd_value = None
+    macd_signal = None
+    macd_hist = None
+
+    if technicals:
+        try:
+            macd_value, macd_signal, macd_hist = context.macd_all()
+        except Exception as e:
+            macd_value = macd_signal = macd_hist = None
+
+    # RSI Buy Zone (oversold / rising)
+    if rsi:
+        if rsi < 30:
+            score += 1; reasons.append(f"RSI {rsi} — Oversold (Potential Reversal)")
+        elif 30 <= rsi <= 45:
+            score += 0.5; reasons.append(f"RSI {rsi} — Early Accumulation Zone")
+
+    # MACD Confirmation (MACD > Signal and Histogram > 0)
+    if macd_value is not None and macd_signal is not None:
+        if macd_value > macd_signal and macd_hist and macd_hist > 0:
+            score += 1.5; reasons.append(f"MACD Bullish Crossover ({macd_value}>{macd_signal})")
+        elif macd_value < macd_signal and macd_hist and macd_hist < 0:
+            reasons.append(f"MACD Bearish ({macd_value}<{macd_signal})")
+
+    # --- Combine Undervaluation & Strength ---
+    if score >= 7:
+        return {
+            "symbol": context.symbol,
+            "name": details.get("nm", ""),
+            "price": ldcp,
+            "eps": eps,
+            "roe": roe,
+            "roa": roa,
+            "per": per,
+            "pbr": pbr,
+            "dy": dy,
+            "bv": bv,
+            "rsi": rsi,
+            "macd": macd_value,
+            "macd_signal": macd_signal,
+            "macd_hist": macd_hist,
+            "debt_equity": debt_equity,
+            "npm": npm,
+            "roce": roce,
+            "current_ratio": current_ratio,
+            "sales_growth": sales_growth,
+            "score": round(score, 2),
+            "reasons": "; ".join(reasons)
+        }
+    return None
 
+def _fundamentally_strong_key(x):
     # Sort primarily by score, then by bullish MACD and ROE
-    return sorted(results, key=lambda x: (
+    return (
         x["score"],
         (x["macd_hist"] if x["macd_hist"] else 0),
         (x["roe"] if x["roe"] else 0)
-    ), reverse=True)
+    )
+
+SORT_KEYS = {
+    "day": _day_trade_key,
+    "swing": _swing_trade_key,
+    "long": _long_term_key,
+    "undervalued": _undervalued_key,
+    "strong": _fundamentally_strong_key,
+}
+
+def _memoized(memo, symbol, technicals, name, compute):
+    if memo is None:
+        return compute(technicals)
+    return memo.get(symbol, technicals, name, compute)
+
+def _closes(technicals):
+    """
+    Closing prices from either a list of bars ([ts, o, h, l, c, v]) or a
+    columnar bars.Bars view. Non-numeric closes are skipped.
+    """
+    if isinstance(technicals, Bars):
+        return [c for c in technicals.close.tolist() if c == c]
+    return [bar[4] for bar in technicals if len(bar) > 4 and isinstance(bar[4], (int, float))]
 
 def calculate_sma(technicals, period):
     """
@@ -551,7 +681,7 @@ def calculate_sma(technicals, period):
     from the 'technicals' array (each bar = [timestamp, open, high, low, close, volume]).
 
     Args:
-        technicals (list): List of bar arrays
+        technicals (list | Bars): List of bar arrays or a columnar Bars view
         period (int): Number of bars to include in the average
 
     Returns:
@@ -560,11 +690,13 @@ def calculate_sma(technicals, period):
     if not technicals or len(technicals) < period:
         return None
 
-    # Get the last `period` bars
-    recent_bars = technicals[-period:]
+    # Tracked symbols keep a running window (see indicators.track)
+    state = state_for(technicals, len(technicals))
+    if state is not None and period in state.sma_periods:
+        return state.sma(period)
 
-    # Extract closing prices safely (index 4)
-    closes = [bar[4] for bar in recent_bars if len(bar) > 4 and isinstance(bar[4], (int, float))]
+    # Closing prices of the last `period` bars
+    closes = _closes(technicals[-period:])
 
     if not closes:
         return None
@@ -588,16 +720,21 @@ def calculate_rsi(data, period):
     if len(data) < n + 1:
         return None
 
+    state = state_for(data, len(data))
+    if state is not None and state.rsi_period == n:
+        return state.rsi()
+
+    closes = _closes(data)
     avg_gain = 0
     avg_loss = 0
 
-    for o in range(len(data)):
+    for o in range(len(closes)):
         if o == 0:
             continue
 
         gain = 0
         loss = 0
-        diff = data[o][4] - data[o - 1][4]  # assuming close price is at index 4
+        diff = closes[o] - closes[o - 1]
 
         if diff > 0:
             gain = diff
@@ -622,23 +759,27 @@ def calculate_rsi(data, period):
     rs = avg_gain / avg_loss
     return 100 - (100 / (1 + rs))
 
-def calculate_macd(technicals, short_period=12, long_period=26, signal_period=9, mode='M'):
+def calculate_macd_all(technicals, short_period=12, long_period=26, signal_period=9):
     """
-    Calculate MACD (Moving Average Convergence Divergence)
-    for a list of technical bars (each bar = [timestamp, open, high, low, close, volume]).
+    MACD line, signal line and histogram from one pass over the closes
+    (each bar = [timestamp, open, high, low, close, volume]).
 
     Args:
-        technicals (list): List of bars
+        technicals (list | Bars): List of bars or a columnar Bars view
         short_period (int): Short-term SMA period (default 12)
         long_period (int): Long-term SMA period (default 26)
         signal_period (int): Signal line SMA period (default 9)
-        mode (str): 'M' = MACD line, 'S' = Signal line, 'H' = Histogram
 
     Returns:
-        float or None: Calculated MACD value based on mode
+        tuple: (macd, signal, histogram) rounded to 2 decimals,
+        or (None, None, None) if there is not enough data
     """
     if not technicals:
-        return None
+        return None, None, None
+
+    state = state_for(technicals, len(technicals))
+    if state is not None and state.macd_periods == (short_period, long_period, signal_period):
+        return state.macd_all()
 
     max_period = max(short_period, long_period)
     required_bars = max_period + signal_period
@@ -647,11 +788,11 @@ def calculate_macd(technicals, short_period=12, long_period=26, signal_period=9,
     data = technicals[-required_bars:]
 
     if len(data) < required_bars:
-        return None
+        return None, None, None
 
-    closes = [bar[4] for bar in data if len(bar) > 4 and isinstance(bar[4], (int, float))]
+    closes = _closes(data)
     if len(closes) < required_bars:
-        return None
+        return None, None, None
 
     # Compute MACD values for last `signal_period` bars
     macd_values = []
@@ -664,16 +805,34 @@ def calculate_macd(technicals, short_period=12, long_period=26, signal_period=9,
         macd_values.append(short_sma - long_sma)
 
     if not macd_values:
-        return None
+        return None, None, None
 
     macd_last = macd_values[-1]
     signal_avg = sum(macd_values) / len(macd_values)
+    return round(macd_last, 2), round(signal_avg, 2), round(macd_last - signal_avg, 2)
+
+def calculate_macd(technicals, short_period=12, long_period=26, signal_period=9, mode='M'):
+    """
+    Calculate MACD (Moving Average Convergence Divergence)
+    for a list of technical bars (each bar = [timestamp, open, high, low, close, volume]).
+    Use calculate_macd_all when more than one of the lines is needed.
 
+    Args:
+        technicals (list | Bars): List of bars or a columnar Bars view
+        short_period (int): Short-term SMA period (default 12)
+        long_period (int): Long-term SMA period (default 26)
+        signal_period (int): Signal line SMA period (default 9)
+        mode (str): 'M' = MACD line, 'S' = Signal line, 'H' = Histogram
+
+    Returns:
+        float or None: Calculated MACD value based on mode
+    """
+    macd, signal, hist = calculate_macd_all(technicals, short_period, long_period, signal_period)
     if mode == 'M':
-        return round(macd_last, 2)
+        return macd
     elif mode == 'S':
-        return round(signal_avg, 2)
+        return signal
     elif mode == 'H':
-        return round(macd_last - signal_avg, 2)
+        return hist
     else:
         return None
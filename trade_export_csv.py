@@ -1,5 +1,6 @@
 import json
-import csv
+
+from export import stream_csv
 
 # ------------------ Day Trading Strategy ------------------
 def recommend_day_trade(json_data):
@@ -201,11 +202,8 @@ def find_undervalued(json_data):
 
 # ------------------ Save to CSV ------------------
 def save_to_csv(filename, results, fieldnames):
-    with open(filename, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in results:
-            writer.writerow(row)
+    # Rows may be any iterable (e.g. a generator); written in buffered batches
+    stream_csv(filename, results, fieldnames)
 
 def calculate_roe(details):
     pat = details.get("pat", 0)